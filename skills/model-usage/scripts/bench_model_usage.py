@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Benchmark model_usage phases on synthetic codexbar payloads.
+
+Generates deterministic codexbar-shaped payloads, times each phase (load,
+filter, aggregate, index, render) at several row counts, records peak
+memory with tracemalloc and compares the results against a stored baseline
+(bench_baseline.json next to this script, recorded at 1000,100000 rows;
+phases at other sizes are not compared). Each payload's dates end today, so
+the --days windows select real rows.
+The e2e_* phases time whole reports from a loaded payload through the
+legacy helpers and through the views the CLI builds (an EntryView for
+unwindowed current/all reports, DailyIndex otherwise); `e2eSpeedup` pairs
+them up.
+`startup` records `import model_usage` in a fresh interpreter and fails the
+run when it loads one of STARTUP_FORBIDDEN.
+
+Usage:
+    bench_model_usage.py [--sizes 1000,100000,1000000] [--output results.json]
+                         [--baseline bench_baseline.json] [--threshold 1.25]
+    bench_model_usage.py --sizes 1000,100000 --update-baseline
+    bench_model_usage.py --write-payload cost.json --sizes 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import model_usage
+from model_usage import (
+    DailyIndex,
+    EntryView,
+    aggregate_costs,
+    build_report,
+    filter_by_days,
+    latest_day_cost,
+    load_payload,
+    load_streamed_views,
+    one_shot_report,
+    parse_daily_entries,
+    pick_current_model,
+)
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+DEFAULT_THRESHOLD = 1.25
+# Phases faster than this are too noisy to flag as regressions.
+MIN_REGRESSION_SECONDS = 0.005
+# Reports timed from a loaded payload through the legacy helpers and through DailyIndex.
+E2E_REPORTS = (
+    ["--mode", "current"],
+    ["--mode", "all"],
+    ["--mode", "current", "--days", "30"],
+    ["--mode", "all", "--days", "365"],
+)
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE_PATH = SCRIPT_DIR / "bench_baseline.json"
+# Modules a plain codexbar report must not load; the paths that need them import them lazily.
+STARTUP_FORBIDDEN = (
+    "usage_logs",
+    "usage_openclaw",
+    "usage_store",
+    "usage_columnar",
+    "usage_stream",
+    "concurrent.futures",
+    "multiprocessing",
+    "sqlite3",
+    "mmap",
+    "tempfile",
+)
+MODEL_NAMES = (
+    "gpt-5-codex",
+    "gpt-5",
+    "gpt-5-mini",
+    "claude-sonnet-4-5",
+    "claude-opus-4-1",
+    "claude-haiku-4-5",
+    "o3",
+    "o4-mini",
+)
+
+
+def generate_payloads(
+    rows: int,
+    models_per_day: int = 3,
+    providers: int = 1,
+    malformed_ratio: float = 0.01,
+    seed: int = 0,
+    end: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """Build codexbar `cost --format json` output with `rows` daily rows in total.
+
+    Rows are split evenly across `providers` (codex, claude, then provider-N),
+    one per day up to `end` (default today), and are identical for the same
+    arguments. About `malformed_ratio` of the
+    rows are corrupted the way real exports are: bad dates, non-object rows,
+    non-numeric costs or missing breakdowns.
+    """
+    rng = random.Random(seed)
+    end = end or date.today()
+    names = list(model_usage.PROVIDERS) + [f"provider-{index}" for index in range(2, providers)]
+    payloads: List[Dict[str, Any]] = []
+    per_provider, extra = divmod(rows, providers)
+    for index, provider in enumerate(names[:providers]):
+        count = per_provider + (1 if index < extra else 0)
+        start = end - timedelta(days=count - 1)
+        daily: List[Any] = []
+        for offset in range(count):
+            day = (start + timedelta(days=offset)).isoformat()
+            models = rng.sample(MODEL_NAMES, min(models_per_day, len(MODEL_NAMES)))
+            breakdowns = [
+                {"modelName": model, "cost": round(rng.uniform(0.01, 25.0), 4)} for model in models
+            ]
+            input_tokens = rng.randrange(1_000, 5_000_000)
+            output_tokens = rng.randrange(100, 500_000)
+            cache_read = rng.randrange(0, input_tokens)
+            entry: Any = {
+                "date": day,
+                "inputTokens": input_tokens,
+                "outputTokens": output_tokens,
+                "cacheReadTokens": cache_read,
+                "cacheCreationTokens": rng.randrange(0, 200_000),
+                "totalTokens": input_tokens + output_tokens,
+                "totalCost": round(sum(item["cost"] for item in breakdowns), 4),
+                "modelsUsed": models,
+                "modelBreakdowns": breakdowns,
+            }
+            if rng.random() < malformed_ratio:
+                entry = corrupt_entry(entry, rng)
+            daily.append(entry)
+        payloads.append(
+            {
+                "provider": provider,
+                "source": "synthetic",
+                "updatedAt": f"{end.isoformat()}T23:59:59Z",
+                "daily": daily,
+            }
+        )
+    return payloads
+
+
+def corrupt_entry(entry: Dict[str, Any], rng: random.Random) -> Any:
+    kind = rng.randrange(4)
+    if kind == 0:
+        entry["date"] = "not-a-date"
+    elif kind == 1:
+        return "malformed-row"
+    elif kind == 2:
+        entry["modelBreakdowns"][0]["cost"] = "n/a"
+    else:
+        del entry["modelBreakdowns"]
+    return entry
+
+
+def measure(
+    func: Callable[[], Any], repeat: int, memory: bool
+) -> Tuple[Any, float, Optional[int]]:
+    """Return (result, best wall seconds over `repeat` runs, tracemalloc peak bytes)."""
+    best = float("inf")
+    result: Any = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    peak: Optional[int] = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, best, peak
+
+
+def bench_size(
+    rows: int, args: argparse.Namespace, work_dir: Path
+) -> List[Dict[str, Any]]:
+    payloads = generate_payloads(
+        rows, args.models_per_day, args.providers, args.malformed_ratio, args.seed
+    )
+    path = work_dir / f"cost-{rows}.json"
+    path.write_text(json.dumps(payloads), encoding="utf-8")
+    input_bytes = path.stat().st_size
+    del payloads
+    provider = model_usage.PROVIDERS[0]
+    all_args = model_usage.build_parser().parse_args(["--mode", "all", "--format", "json"])
+    current_args = model_usage.build_parser().parse_args(["--mode", "current"])
+
+    results: List[Dict[str, Any]] = []
+    state: Dict[str, Any] = {}
+
+    def phase(name: str, func: Callable[[], Any]) -> Any:
+        result, seconds, peak = measure(func, args.repeat, not args.no_memory)
+        results.append(
+            {"rows": rows, "phase": name, "seconds": seconds, "peakBytes": peak, "inputBytes": input_bytes}
+        )
+        print(f"{rows:>9} {name:<20} {seconds * 1000:10.2f} ms", file=sys.stderr)
+        return result
+
+    payload = phase("load_payload", lambda: load_payload(str(path), provider))
+    phase("load_streamed", lambda: load_streamed_views(str(path), [provider]))
+    entries = phase("parse_daily_entries", lambda: parse_daily_entries(payload))
+    phase("filter_by_days", lambda: filter_by_days(entries, 30))
+    phase("aggregate_costs", lambda: aggregate_costs(entries))
+    state["model"], _ = phase("pick_current_model", lambda: pick_current_model(entries))
+    phase("latest_day_cost", lambda: latest_day_cost(entries, state["model"]))
+    index = phase("daily_index", lambda: DailyIndex.from_entries(entries))
+    views = {provider: index}
+    phase("render_all_json", lambda: build_report(all_args, views))
+    phase("render_current_text", lambda: build_report(current_args, views))
+    for argv in E2E_REPORTS:
+        name = "_".join(part.lstrip("-") for part in argv)
+        report_args = model_usage.build_parser().parse_args(argv)
+        phase(f"e2e_legacy_{name}", lambda: legacy_report(payload, report_args))
+        phase(f"e2e_index_{name}", lambda: index_report(payload, report_args, provider))
+    return results
+
+
+def legacy_report(payload: Dict[str, Any], args: argparse.Namespace) -> Any:
+    """The pre-index report path: filter the entry list, then one pass per question."""
+    entries = filter_by_days(parse_daily_entries(payload), args.days)
+    totals = aggregate_costs(entries)
+    if args.mode == "all":
+        return totals
+    model, latest_date = pick_current_model(entries)
+    return model, latest_date, totals.get(model), latest_day_cost(entries, model)
+
+
+def index_report(payload: Dict[str, Any], args: argparse.Namespace, provider: str) -> Any:
+    """The CLI report path: the view `load_views(..., one_shot=True)` would build, then the report."""
+    entries = parse_daily_entries(payload)
+    view = EntryView(entries) if one_shot_report(args) else DailyIndex.from_entries(entries)
+    return build_report(args, {provider: view})
+
+
+def e2e_speedups(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Pair e2e_legacy_* with e2e_index_* phases: legacy seconds / index seconds per row count."""
+    seconds = {(item["rows"], item["phase"]): item["seconds"] for item in results}
+    speedups: List[Dict[str, Any]] = []
+    for (rows, name), legacy in seconds.items():
+        if not name.startswith("e2e_legacy_"):
+            continue
+        report = name[len("e2e_legacy_") :]
+        indexed = seconds.get((rows, f"e2e_index_{report}"))
+        if indexed:
+            speedups.append({"rows": rows, "report": report, "speedup": round(legacy / indexed, 2)})
+    return speedups
+
+
+def measure_startup(python: str = sys.executable) -> Dict[str, Any]:
+    """Import model_usage under `-X importtime` and list what it loaded."""
+    completed = subprocess.run(
+        [python, "-X", "importtime", "-c", "import model_usage"],
+        cwd=str(SCRIPT_DIR),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    records = []
+    for line in completed.stderr.splitlines():
+        fields = line[len("import time:") :].split("|")
+        if line.startswith("import time:") and len(fields) == 3 and fields[1].strip().isdigit():
+            records.append((fields[2].rstrip(), int(fields[1])))
+    # model_usage is the last top-level line; the nested lines right above it are what it loaded.
+    end = max(i for i, (name, _) in enumerate(records) if name == " model_usage")
+    first = end
+    while first > 0 and records[first - 1][0].startswith("   "):
+        first -= 1
+    return {
+        "importMs": round(records[end][1] / 1000, 2),
+        "modules": sorted({name.strip() for name, _ in records[first : end + 1]}),
+    }
+
+
+def check_startup(startup: Dict[str, Any]) -> List[str]:
+    loaded = set(startup["modules"])
+    return [f"model_usage imports {module} at load time" for module in STARTUP_FORBIDDEN if module in loaded]
+
+
+def compare(
+    results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Return one message per phase that is more than `threshold` times slower than baseline."""
+    previous = {(item["rows"], item["phase"]): item for item in baseline.get("results", [])}
+    regressions: List[str] = []
+    for item in results:
+        before = previous.get((item["rows"], item["phase"]))
+        if not before or not before.get("seconds"):
+            continue
+        ratio = item["seconds"] / before["seconds"]
+        item["baselineRatio"] = round(ratio, 3)
+        if ratio > threshold and item["seconds"] - before["seconds"] > MIN_REGRESSION_SECONDS:
+            regressions.append(
+                f"{item['phase']} @ {item['rows']} rows: {before['seconds'] * 1000:.2f} ms -> "
+                f"{item['seconds'] * 1000:.2f} ms ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def parse_sizes(value: str) -> List[int]:
+    try:
+        sizes = [int(part.replace("_", "")) for part in value.split(",") if part.strip()]
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError("must be comma-separated integers") from exc
+    if not sizes or min(sizes) < 1:
+        raise argparse.ArgumentTypeError("must be positive integers")
+    return sizes
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark model_usage on synthetic payloads.")
+    parser.add_argument(
+        "--sizes",
+        type=parse_sizes,
+        default=list(DEFAULT_SIZES),
+        help="Comma-separated daily row counts (default: 1000,100000,1000000).",
+    )
+    parser.add_argument("--models-per-day", type=model_usage.positive_int, default=3)
+    parser.add_argument("--providers", type=model_usage.positive_int, default=1)
+    parser.add_argument("--malformed-ratio", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=model_usage.positive_int, default=3, help="Best-of runs per phase.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass.")
+    parser.add_argument("--output", help="Write JSON results here (default: stdout).")
+    parser.add_argument(
+        "--baseline",
+        default=str(DEFAULT_BASELINE_PATH),
+        help="Compare against a previous --output file (default: bench_baseline.json).",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Write the results to --baseline instead of comparing against it.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Slowdown ratio that counts as a regression (default: {DEFAULT_THRESHOLD}).",
+    )
+    parser.add_argument(
+        "--write-payload",
+        metavar="PATH",
+        help="Only write a synthetic payload with the first --sizes row count and exit.",
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.write_payload:
+        payloads = generate_payloads(
+            args.sizes[0], args.models_per_day, args.providers, args.malformed_ratio, args.seed
+        )
+        Path(args.write_payload).write_text(json.dumps(payloads), encoding="utf-8")
+        return 0
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="bench_model_usage_") as work_dir:
+        for rows in args.sizes:
+            results.extend(bench_size(rows, args, Path(work_dir)))
+
+    startup = measure_startup()
+    print(f"{'startup':<30} {startup['importMs']:10.2f} ms", file=sys.stderr)
+    regressions: List[str] = check_startup(startup)
+    if args.baseline and not args.update_baseline:
+        try:
+            baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            baseline = {}
+        except (OSError, ValueError) as exc:
+            print(f"Failed to read baseline: {exc}", file=sys.stderr)
+            return 1
+        regressions += compare(results, baseline, args.threshold)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "generator": {
+            "modelsPerDay": args.models_per_day,
+            "providers": args.providers,
+            "malformedRatio": args.malformed_ratio,
+            "seed": args.seed,
+        },
+        "repeat": args.repeat,
+        "results": results,
+        "e2eSpeedup": e2e_speedups(results),
+        "startup": startup,
+        "regressions": regressions,
+    }
+    text = json.dumps(report, indent=2)
+    if args.update_baseline:
+        Path(args.baseline).write_text(text + "\n", encoding="utf-8")
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    for message in regressions:
+        print(f"Regression: {message}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -8,13 +8,105 @@ Defaults to current model (most recent daily entry), or list all models.
 from __future__ import annotations
 
 import argparse
+import heapq
+import io
 import json
 import os
 import subprocess
 import sys
+from array import array
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from operator import itemgetter
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import usage_timings
+from usage_cache import ALL_KEY, DEFAULT_CACHE_DIR, CodexbarCache
+from usage_snapshots import HOST_FROM_CHOICES, is_pattern, load_snapshot_payloads
+from usage_topk import TOP_CAPACITY_FACTOR, SpaceSaving
+
+# The log scanner, store, columnar reader and stream decoder are imported where
+# they are used, so a plain codexbar report does not load multiprocessing,
+# sqlite3, mmap or tempfile (see STARTUP_FORBIDDEN in bench_model_usage.py).
+if TYPE_CHECKING:
+    from usage_store import UsageStore
+
+PROVIDERS = ("codex", "claude")
+# Same value as usage_openclaw.OPENCLAW_PROVIDER, which imports the log scanner.
+OPENCLAW_PROVIDER = "openclaw"
+DEFAULT_FETCH_TIMEOUT = 120.0
+# Options that shape the report (forwarded to a `serve` instance by --server).
+REPORT_OPTIONS = (
+    "provider",
+    "mode",
+    "model",
+    "days",
+    "since",
+    "until",
+    "group_by",
+    "top",
+    "format",
+    "pretty",
+)
+# Options that choose what data is loaded. A `serve` instance was started with its own,
+# so a request that sets any of these away from its default is answered locally.
+DATA_SOURCE_OPTIONS = (
+    "input",
+    "source",
+    "stream",
+    "host_from",
+    "log_index",
+    "backfill",
+    "workers",
+    "agent",
+    "session",
+    "project",
+    "store",
+    "store_only",
+    "export_columnar",
+    "timeout",
+    "cache_ttl",
+    "cache_dir",
+)
+GROUP_BY_CHOICES = ("day", "week", "month")
+# Splits Claude log costs by project directory instead of by period.
+PROJECT_GROUP = "project"
+# Split --source openclaw costs by agent or by agent/session instead of by period.
+OPENCLAW_GROUPS = ("agent", "session")
+# Group-bys whose buckets are separate views rather than periods of one view.
+VIEW_GROUPS = (PROJECT_GROUP,) + OPENCLAW_GROUPS
+FORMAT_CHOICES = ("text", "json", "openmetrics", "ndjson")
+MODE_CHOICES = ("current", "all", "tokens", "rows")
+# --mode rows record fields after "provider"; token and dayCostUSD columns are day-level.
+ROW_FIELDS = (
+    "date",
+    "model",
+    "costUSD",
+    "inputTokens",
+    "outputTokens",
+    "cacheReadTokens",
+    "cacheCreationTokens",
+    "totalTokens",
+    "dayCostUSD",
+)
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+TOKEN_COLUMNS = ("inputTokens", "outputTokens", "cacheReadTokens", "cacheCreationTokens", "totalTokens")
+# Below this many day rows the NumPy import/conversion costs more than it saves.
+NUMPY_MIN_ROWS = 4096
+_NUMPY: Any = False
+
+
+def _numpy() -> Any:
+    """Return the numpy module when installed (imported lazily), else None."""
+    global _NUMPY
+    if _NUMPY is False:
+        try:
+            import numpy
+        except ModuleNotFoundError:
+            numpy = None
+        _NUMPY = numpy
+    return _NUMPY
 
 
 def positive_int(value: str) -> int:
@@ -31,16 +123,26 @@ def eprint(msg: str) -> None:
     print(msg, file=sys.stderr)
 
 
-def run_codexbar_cost(provider: str) -> List[Dict[str, Any]]:
-    cmd = ["codexbar", "cost", "--format", "json", "--provider", provider]
+def run_codexbar_cost(
+    provider: Optional[str], timeout: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    cmd = ["codexbar", "cost", "--format", "json"]
+    if provider:
+        cmd += ["--provider", provider]
     try:
-        output = subprocess.check_output(cmd, text=True)
+        with usage_timings.phase("fetch", provider=provider or "all") as record:
+            output = subprocess.check_output(cmd, text=True, timeout=timeout)
+            record["bytes"] = len(output)
+            usage_timings.count("payloadBytes", len(output))
     except FileNotFoundError:
         raise RuntimeError("codexbar not found on PATH. Install CodexBar CLI first.")
     except subprocess.CalledProcessError as exc:
         raise RuntimeError(f"codexbar cost failed (exit {exc.returncode}).")
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"codexbar cost timed out after {timeout:g}s.")
     try:
-        payload = json.loads(output)
+        with usage_timings.phase("decode", provider=provider or "all"):
+            payload = json.loads(output)
     except json.JSONDecodeError as exc:
         raise RuntimeError(f"Failed to parse codexbar JSON output: {exc}")
     if not isinstance(payload, list):
@@ -48,17 +150,20 @@ def run_codexbar_cost(provider: str) -> List[Dict[str, Any]]:
     return payload
 
 
-def load_payload(input_path: Optional[str], provider: str) -> Dict[str, Any]:
-    if input_path:
+def read_json_input(input_path: str) -> Any:
+    with usage_timings.phase("read") as record:
         if input_path == "-":
             raw = sys.stdin.read()
         else:
             with open(input_path, "r", encoding="utf-8") as handle:
                 raw = handle.read()
-        data = json.loads(raw)
-    else:
-        data = run_codexbar_cost(provider)
+        record["bytes"] = len(raw)
+        usage_timings.count("payloadBytes", len(raw))
+    with usage_timings.phase("decode"):
+        return json.loads(raw)
+
 
+def select_provider(data: Any, provider: str) -> Dict[str, Any]:
     if isinstance(data, dict):
         return data
 
@@ -71,6 +176,103 @@ def load_payload(input_path: Optional[str], provider: str) -> Dict[str, Any]:
     raise RuntimeError("Unsupported JSON input format.")
 
 
+def fetch_codexbar(
+    provider: Optional[str], timeout: Optional[float] = None, cache: Optional[CodexbarCache] = None
+) -> List[Dict[str, Any]]:
+    """Run `codexbar cost`, going through the shared TTL cache when one is configured."""
+    if cache is None:
+        return run_codexbar_cost(provider, timeout)
+    with usage_timings.phase("cache", provider=provider or ALL_KEY):
+        return cache.get(provider or ALL_KEY, lambda: run_codexbar_cost(provider, timeout))
+
+
+def load_payload(
+    input_path: Optional[str],
+    provider: str,
+    source: str = "codexbar",
+    log_index: Optional[str] = None,
+    timeout: Optional[float] = None,
+    cache: Optional[CodexbarCache] = None,
+) -> Dict[str, Any]:
+    if source == "logs":
+        if input_path:
+            raise RuntimeError("--input cannot be combined with --source logs.")
+        from usage_logs import load_log_payload
+
+        with usage_timings.phase("scan", provider=provider):
+            return load_log_payload(provider, log_index)
+
+    if input_path:
+        data = read_json_input(input_path)
+    else:
+        data = fetch_codexbar(provider, timeout, cache)
+    return select_provider(data, provider)
+
+
+def load_payloads(
+    input_path: Optional[str],
+    providers: List[str],
+    source: str = "codexbar",
+    log_index: Optional[str] = None,
+    timeout: Optional[float] = None,
+    cache: Optional[CodexbarCache] = None,
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """Load one payload per provider, returning (payloads, errors).
+
+    A single combined `codexbar cost` call is tried first; providers it does
+    not cover are fetched concurrently, each bounded by `timeout`.
+    """
+    if len(providers) == 1:
+        payload = load_payload(input_path, providers[0], source, log_index, timeout, cache)
+        return {providers[0]: payload}, {}
+    if source == "logs":
+        if input_path:
+            raise RuntimeError("--input cannot be combined with --source logs.")
+        from usage_logs import load_log_payloads
+
+        with usage_timings.phase("scan", provider="all"):
+            return load_log_payloads(providers, log_index), {}
+
+    payloads: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, str] = {}
+    if input_path:
+        data = read_json_input(input_path)
+        if isinstance(data, dict):
+            raise RuntimeError("--provider all needs a codexbar JSON array input.")
+    else:
+        try:
+            data = fetch_codexbar(None, timeout, cache)
+        except RuntimeError as exc:
+            eprint(f"Combined codexbar fetch failed ({exc}); fetching providers separately.")
+            data = []
+    missing: List[str] = []
+    for provider in providers:
+        try:
+            payloads[provider] = select_provider(data, provider)
+        except RuntimeError as exc:
+            if input_path:
+                errors[provider] = str(exc)
+            else:
+                missing.append(provider)
+
+    if missing:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+            futures = {
+                provider: pool.submit(
+                    load_payload, None, provider, source, log_index, timeout, cache
+                )
+                for provider in missing
+            }
+            for provider, future in futures.items():
+                try:
+                    payloads[provider] = future.result()
+                except Exception as exc:
+                    errors[provider] = str(exc)
+    return payloads, errors
+
+
 @dataclass
 class ModelCost:
     model: str
@@ -93,10 +295,30 @@ def parse_date(value: str) -> Optional[date]:
         return None
 
 
-def filter_by_days(entries: List[Dict[str, Any]], days: Optional[int]) -> List[Dict[str, Any]]:
+def cutoff_date(days: Optional[int]) -> Optional[date]:
     if not days:
+        return None
+    return date.today() - timedelta(days=days - 1)
+
+
+def iso_date(value: str) -> date:
+    parsed = parse_date(value)
+    if parsed is None:
+        raise argparse.ArgumentTypeError("must be a YYYY-MM-DD date")
+    return parsed
+
+
+def report_window(args: argparse.Namespace) -> Tuple[Optional[date], Optional[date]]:
+    since = cutoff_date(args.days)
+    if args.since is not None and (since is None or args.since > since):
+        since = args.since
+    return since, args.until
+
+
+def filter_by_days(entries: List[Dict[str, Any]], days: Optional[int]) -> List[Dict[str, Any]]:
+    cutoff = cutoff_date(days)
+    if cutoff is None:
         return entries
-    cutoff = date.today() - timedelta(days=days - 1)
     filtered: List[Dict[str, Any]] = []
     for entry in entries:
         day = entry.get("date")
@@ -158,6 +380,801 @@ def pick_current_model(entries: List[Dict[str, Any]]) -> Tuple[Optional[str], Op
     return None, None
 
 
+def date_ordinal(value: Any) -> int:
+    """Return the proleptic ordinal of a YYYY-MM-DD string, or 0 when invalid."""
+    if not isinstance(value, str):
+        return 0
+    if len(value) == 10 and value[4] == "-" and value[7] == "-":
+        try:
+            return _fromisoformat(value).toordinal()
+        except ValueError:
+            return 0
+    parsed = parse_date(value)
+    return parsed.toordinal() if parsed else 0
+
+
+_fromisoformat = date.fromisoformat
+
+
+def _token_row(get: Any) -> Tuple[Any, ...]:
+    """Token columns plus totalCost (None when missing) of one day, read via `entry.get`."""
+    number = (int, float)
+    value = get("inputTokens")
+    input_tokens = int(value) if isinstance(value, number) else 0
+    value = get("outputTokens")
+    output_tokens = int(value) if isinstance(value, number) else 0
+    value = get("cacheReadTokens")
+    cache_read = int(value) if isinstance(value, number) else 0
+    value = get("cacheCreationTokens")
+    cache_creation = int(value) if isinstance(value, number) else 0
+    value = get("totalTokens")
+    total = int(value) if isinstance(value, number) else input_tokens + output_tokens + cache_read + cache_creation
+    value = get("totalCost")
+    return (
+        input_tokens,
+        output_tokens,
+        cache_read,
+        cache_creation,
+        total,
+        float(value) if isinstance(value, number) else None,
+    )
+
+
+class DailyIndex:
+    """Columnar index over codexbar daily rows, built in a single pass.
+
+    Days are kept sorted by date ordinal and per-model cost rows are stored
+    contiguously per day. Unwindowed answers are precomputed; short windows
+    sum their rows directly and long ones use per-model cumulative cost
+    prefix sums (built lazily) plus bisect.
+    Token columns of a list of entries are read from the day dicts on first
+    use. Breakdown items with a non-numeric cost are kept as NaN rows so
+    `latest_day_cost` still sees them, but never count towards totals.
+    Rows with a missing or invalid date get ordinal 0 and only show up in
+    unwindowed queries, matching `filter_by_days`.
+    """
+
+    __slots__ = (
+        "models",
+        "model_ids",
+        "day_ordinals",
+        "day_dates",
+        "day_current",
+        "day_row_start",
+        "row_models",
+        "row_costs",
+        "totals",
+        "row_counts",
+        "latest",
+        "prefix",
+        "day_tokens",
+        "day_cost",
+        "entries",
+    )
+
+    def __init__(self) -> None:
+        self.models: List[str] = []
+        self.model_ids: Dict[str, int] = {}
+        self.day_ordinals = array("i")
+        self.day_dates: List[Optional[str]] = []
+        self.day_current = array("i")
+        self.day_row_start = array("i", [0])
+        self.row_models = array("i")
+        self.row_costs = array("d")
+        self.totals = array("d")
+        self.row_counts = array("i")
+        # model id -> row of its first breakdown item on the latest day it appears (built lazily)
+        self.latest: Optional[Dict[int, int]] = None
+        self.prefix: Optional[Tuple[List[array], List[array], List[array], List[array]]] = None
+        self.day_tokens: Optional[Dict[str, array]] = {field: array("q") for field in TOKEN_COLUMNS}
+        self.day_cost: Optional[array] = array("d")
+        # day dicts in index order while the token columns above are still unbuilt
+        self.entries: Optional[List[Dict[str, Any]]] = None
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Dict[str, Any]]) -> "DailyIndex":
+        """Build the index in one pass; out-of-order days cost one extra sort of day positions.
+
+        A list of entries is already in memory, so its token columns are read
+        from the day dicts on first use; other iterables are read eagerly.
+        """
+        index = cls()
+        keep = isinstance(entries, list)
+        model_ids = index.model_ids
+        models = index.models
+        totals: List[float] = []
+        row_counts: List[int] = []
+        ordinals: List[int] = []
+        dates: List[Optional[str]] = []
+        currents: List[int] = []
+        row_start: List[int] = [0]
+        row_models: List[int] = []
+        row_costs: List[float] = []
+        token_rows: List[Tuple[Any, ...]] = []
+        add_ordinal, add_date, add_current = ordinals.append, dates.append, currents.append
+        add_row_start, add_token_row = row_start.append, token_rows.append
+        add_row_model, add_row_cost = row_models.append, row_costs.append
+        ordinal_of = date_ordinal
+        fromisoformat = _fromisoformat
+        intern = sys.intern
+        number = (int, float)
+        nan = float("nan")
+        no_cost = float("-inf")
+        last_ordinal = 0
+        in_order = True
+
+        for entry in entries:
+            get = entry.get
+            day = get("date")
+            if type(day) is str and len(day) == 10 and day[4] == "-" and day[7] == "-":
+                try:
+                    ordinal = fromisoformat(day).toordinal()
+                except ValueError:
+                    ordinal = 0
+            else:
+                ordinal = ordinal_of(day)
+            if ordinal < last_ordinal:
+                in_order = False
+            last_ordinal = ordinal
+            current = -1
+            best_cost = no_cost
+            breakdowns = get("modelBreakdowns")
+            if isinstance(breakdowns, list):
+                for item in breakdowns:
+                    if not isinstance(item, dict):
+                        continue
+                    model = item.get("modelName")
+                    if not isinstance(model, str):
+                        continue
+                    model_id = model_ids.get(model)
+                    if model_id is None:
+                        model_id = model_ids[model] = len(models)
+                        models.append(intern(model))
+                        totals.append(0.0)
+                        row_counts.append(0)
+                    cost = item.get("cost")
+                    if isinstance(cost, number):
+                        cost = float(cost)
+                        totals[model_id] += cost
+                        row_counts[model_id] += 1
+                        if cost > best_cost:
+                            current, best_cost = model_id, cost
+                    else:
+                        cost = nan
+                    add_row_model(model_id)
+                    add_row_cost(cost)
+            if current < 0:
+                models_used = get("modelsUsed")
+                if isinstance(models_used, list) and models_used and isinstance(models_used[-1], str):
+                    model = models_used[-1]
+                    current = model_ids.get(model, -1)
+                    if current < 0:
+                        current = model_ids[model] = len(models)
+                        models.append(intern(model))
+                        totals.append(0.0)
+                        row_counts.append(0)
+            if not keep:
+                add_token_row(_token_row(get))
+            add_ordinal(ordinal)
+            add_date(day if isinstance(day, str) else None)
+            add_current(current)
+            add_row_start(len(row_models))
+
+        if not in_order:
+            # One stable sort of day positions by ordinal. Bad dates (ordinal 0) or a
+            # few late days leave long runs of consecutive positions, copied as slices.
+            order = sorted(range(len(ordinals)), key=ordinals.__getitem__)
+            runs: List[Tuple[int, int]] = []
+            first = previous = order[0]
+            for position in order:
+                if position != previous + 1 and position != first:
+                    runs.append((first, previous + 1))
+                    first = position
+                previous = position
+            runs.append((first, previous + 1))
+            sorted_models: List[int] = []
+            sorted_costs: List[float] = []
+            sorted_starts: List[int] = [0]
+            for first, last in runs:
+                low, high = row_start[first], row_start[last]
+                shift = len(sorted_models) - low
+                sorted_models += row_models[low:high]
+                sorted_costs += row_costs[low:high]
+                sorted_starts += [start + shift for start in row_start[first + 1 : last + 1]]
+            row_models, row_costs, row_start = sorted_models, sorted_costs, sorted_starts
+            ordinals = [ordinals[i] for i in order]
+            dates = [dates[i] for i in order]
+            currents = [currents[i] for i in order]
+            if keep:
+                entries = [entries[i] for i in order]  # type: ignore[index]
+            else:
+                token_rows = [token_rows[i] for i in order]
+        index.row_models = array("i", row_models)
+        index.row_costs = array("d", row_costs)
+        index.day_ordinals = array("i", ordinals)
+        index.day_dates = dates
+        index.day_current = array("i", currents)
+        index.day_row_start = array("i", row_start)
+        index.totals = array("d", totals)
+        index.row_counts = array("i", row_counts)
+        if keep:
+            index.entries = entries  # type: ignore[assignment]
+            index.day_tokens = None
+            index.day_cost = None
+        else:
+            index._set_token_rows(token_rows)
+        return index
+
+    def _set_token_rows(self, token_rows: Iterable[Tuple[Any, ...]]) -> None:
+        columns = [array("q") for _ in TOKEN_COLUMNS]
+        day_cost = array("d")
+        row_start = self.day_row_start
+        row_costs = self.row_costs
+        for position, values in enumerate(token_rows):
+            for column, value in zip(columns, values):
+                column.append(value)
+            cost = values[-1]
+            if cost is None:
+                cost = sum(cost for cost in row_costs[row_start[position] : row_start[position + 1]] if cost == cost)
+            day_cost.append(cost)
+        self.day_tokens = dict(zip(TOKEN_COLUMNS, columns))
+        self.day_cost = day_cost
+
+    def _token_columns(self) -> Tuple[Dict[str, array], array]:
+        """Day-level token and cost columns, read from the kept day dicts on first use."""
+        if self.day_tokens is None:
+            self._set_token_rows(_token_row(entry.get) for entry in self.entries or ())
+            self.entries = None
+        return self.day_tokens, self.day_cost
+
+    def _latest_rows(self) -> Dict[int, int]:
+        """Model id -> row of its first item on the latest day it appears, found scanning back."""
+        if self.latest is None:
+            latest: Dict[int, int] = {}
+            remaining = len(set(self.row_models))
+            row_start = self.day_row_start
+            row_models = self.row_models
+            position = len(self.day_ordinals)
+            while len(latest) < remaining and position > 0:
+                position -= 1
+                for row in range(row_start[position], row_start[position + 1]):
+                    model_id = row_models[row]
+                    if model_id not in latest:
+                        latest[model_id] = row
+            self.latest = latest
+        return self.latest
+
+    def __len__(self) -> int:
+        return len(self.day_ordinals)
+
+    def _bounds(self, since: Optional[date], until: Optional[date]) -> Tuple[int, int]:
+        start = 0 if since is None else bisect_left(self.day_ordinals, since.toordinal())
+        end = len(self.day_ordinals)
+        if until is not None:
+            end = bisect_right(self.day_ordinals, until.toordinal())
+        return start, max(start, end)
+
+    def _prefix(self) -> Tuple[List[array], List[array], List[array], List[array]]:
+        """Per-model (ordinals, first rows, cumulative cost, cumulative row count), built once."""
+        if self.prefix is None:
+            ordinals = [array("i") for _ in self.models]
+            first_rows = [array("i") for _ in self.models]
+            cumulative = [array("d", [0.0]) for _ in self.models]
+            counts = [array("i", [0]) for _ in self.models]
+            row_start = self.day_row_start
+            row_models = self.row_models
+            row_costs = self.row_costs
+            for position, ordinal in enumerate(self.day_ordinals):
+                for row in range(row_start[position], row_start[position + 1]):
+                    model_id = row_models[row]
+                    cost = row_costs[row]
+                    model_ordinals = ordinals[model_id]
+                    model_cumulative = cumulative[model_id]
+                    model_counts = counts[model_id]
+                    if first_rows[model_id] and first_rows[model_id][-1] >= row_start[position]:
+                        if cost == cost:
+                            model_cumulative[-1] += cost
+                            model_counts[-1] += 1
+                        continue
+                    model_ordinals.append(ordinal)
+                    first_rows[model_id].append(row)
+                    valid = cost == cost
+                    model_cumulative.append(model_cumulative[-1] + (cost if valid else 0.0))
+                    model_counts.append(model_counts[-1] + valid)
+            self.prefix = (ordinals, first_rows, cumulative, counts)
+        return self.prefix
+
+    def count(self, since: Optional[date] = None, until: Optional[date] = None) -> int:
+        start, end = self._bounds(since, until)
+        return end - start
+
+    def current_model(
+        self, since: Optional[date] = None, until: Optional[date] = None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        start, end = self._bounds(since, until)
+        for position in range(end - 1, start - 1, -1):
+            current = self.day_current[position]
+            if current >= 0:
+                return self.models[current], self.day_dates[position]
+        return None, None
+
+    def model_totals(
+        self, since: Optional[date] = None, until: Optional[date] = None
+    ) -> Dict[str, float]:
+        if since is None and until is None:
+            return {
+                self.models[model_id]: self.totals[model_id]
+                for model_id in range(len(self.models))
+                if self.row_counts[model_id]
+            }
+        start, end = self._bounds(since, until)
+        first, last = self.day_row_start[start], self.day_row_start[end]
+        if self.prefix is None and (last - first) * 4 < len(self.row_models):
+            # A short window is cheaper to sum directly than to build prefix sums for.
+            row_models = self.row_models
+            row_costs = self.row_costs
+            sums = [0.0] * len(self.models)
+            seen = [False] * len(self.models)
+            for row in range(first, last):
+                cost = row_costs[row]
+                if cost == cost:
+                    model_id = row_models[row]
+                    sums[model_id] += cost
+                    seen[model_id] = True
+            return {model: sums[model_id] for model_id, model in enumerate(self.models) if seen[model_id]}
+        ordinals, _, cumulative, counts = self._prefix()
+        low = since.toordinal() if since is not None else -1
+        high = until.toordinal() if until is not None else sys.maxsize
+        totals: Dict[str, float] = {}
+        for model_id, model in enumerate(self.models):
+            start = bisect_left(ordinals[model_id], low)
+            end = bisect_right(ordinals[model_id], high)
+            if end > start and counts[model_id][end] > counts[model_id][start]:
+                totals[model] = cumulative[model_id][end] - cumulative[model_id][start]
+        return totals
+
+    def latest_day_cost(
+        self, model: str, since: Optional[date] = None, until: Optional[date] = None
+    ) -> Tuple[Optional[str], Optional[float]]:
+        model_id = self.model_ids.get(model)
+        latest = self._latest_rows()
+        if model_id is None or model_id not in latest:
+            return None, None
+        row = latest[model_id]
+        start = self._bounds(since, None)[0]
+        if until is not None:
+            if self.prefix is not None:
+                ordinals, first_rows, _, _ = self.prefix
+                found = bisect_right(ordinals[model_id], until.toordinal()) - 1
+                if found < 0:
+                    return None, None
+                row = first_rows[model_id][found]
+            else:
+                row = self._last_row_before(model_id, start, self._bounds(None, until)[1])
+                if row < 0:
+                    return None, None
+        position = bisect_right(self.day_row_start, row) - 1
+        if position < start:
+            return None, None
+        cost = self.row_costs[row]
+        return self.day_dates[position], cost if cost == cost else None
+
+    def _last_row_before(self, model_id: int, start: int, end: int) -> int:
+        """First row of `model_id` on the latest day in positions [start, end), or -1."""
+        row_start = self.day_row_start
+        row_models = self.row_models
+        for position in range(end - 1, start - 1, -1):
+            for row in range(row_start[position], row_start[position + 1]):
+                if row_models[row] == model_id:
+                    return row
+        return -1
+
+    def token_totals(
+        self, since: Optional[date] = None, until: Optional[date] = None
+    ) -> Dict[str, float]:
+        """Sum the day-level token and cost columns over the window."""
+        start, end = self._bounds(since, until)
+        np = _numpy() if end - start >= NUMPY_MIN_ROWS else None
+        totals: Dict[str, float] = {"days": end - start}
+        day_tokens, day_cost = self._token_columns()
+        for field, column in day_tokens.items():
+            if np is not None:
+                totals[field] = int(np.frombuffer(column, dtype=np.int64)[start:end].sum())
+            else:
+                totals[field] = sum(column[start:end])
+        if np is not None:
+            totals["totalCost"] = float(np.frombuffer(day_cost, dtype=np.float64)[start:end].sum())
+        else:
+            totals["totalCost"] = sum(day_cost[start:end])
+        return totals
+
+    def daily_costs(
+        self, since: Optional[date] = None, until: Optional[date] = None
+    ) -> Iterator[Tuple[int, str, float]]:
+        """Yield (date ordinal, model, cost) rows in date order within the window."""
+        start, end = self._bounds(since, until)
+        row_start = self.day_row_start
+        for position in range(start, end):
+            ordinal = self.day_ordinals[position]
+            for row in range(row_start[position], row_start[position + 1]):
+                cost = self.row_costs[row]
+                if cost == cost:
+                    yield ordinal, self.models[self.row_models[row]], cost
+
+    def rows(self, since: Optional[date] = None, until: Optional[date] = None) -> Iterator[Tuple[Any, ...]]:
+        """Yield ROW_FIELDS tuples per (date, model) in date order, skipping invalid dates.
+
+        Days without breakdowns yield one row with model and cost None so
+        their token columns are not lost; non-numeric costs are None.
+        """
+        start, end = self._bounds(since, until)
+        start = max(start, bisect_right(self.day_ordinals, 0))
+        row_start = self.day_row_start
+        day_tokens, day_cost = self._token_columns()
+        columns = [day_tokens[field] for field in TOKEN_COLUMNS]
+        for position in range(start, end):
+            day = (self.day_dates[position],)
+            tokens = tuple(column[position] for column in columns) + (day_cost[position],)
+            first, last = row_start[position], row_start[position + 1]
+            if first == last:
+                yield day + (None, None) + tokens
+            for row in range(first, last):
+                cost = self.row_costs[row]
+                yield day + (self.models[self.row_models[row]], cost if cost == cost else None) + tokens
+
+
+class EntryView:
+    """Unwindowed current/all answers read straight from the day dicts.
+
+    A one-shot report asks each question once, so a scan per question is
+    cheaper than building a DailyIndex first. Same rules as
+    pick_current_model, aggregate_costs and latest_day_cost; the entries
+    are sorted by date at most once and totals are summed once.
+    """
+
+    __slots__ = ("entries", "newest", "totals")
+
+    def __init__(self, entries: List[Dict[str, Any]]) -> None:
+        self.entries = entries
+        self.newest: Optional[List[Dict[str, Any]]] = None
+        self.totals: Optional[Dict[str, float]] = None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def _unwindowed(since: Optional[date], until: Optional[date]) -> None:
+        if since is not None or until is not None:
+            raise ValueError("EntryView only answers unwindowed queries.")
+
+    def _newest_first(self, since: Optional[date], until: Optional[date]) -> List[Dict[str, Any]]:
+        self._unwindowed(since, until)
+        if self.newest is None:
+            self.newest = sorted(self.entries, key=lambda entry: entry.get("date") or "")[::-1]
+        return self.newest
+
+    def count(self, since: Optional[date] = None, until: Optional[date] = None) -> int:
+        self._unwindowed(since, until)
+        return len(self.entries)
+
+    def current_model(
+        self, since: Optional[date] = None, until: Optional[date] = None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        number = (int, float)
+        for entry in self._newest_first(since, until):
+            day = entry.get("date")
+            day = day if isinstance(day, str) else None
+            breakdowns = entry.get("modelBreakdowns")
+            if isinstance(breakdowns, list) and breakdowns:
+                best: Optional[str] = None
+                best_cost = float("-inf")
+                for item in breakdowns:
+                    if not isinstance(item, dict):
+                        continue
+                    model = item.get("modelName")
+                    cost = item.get("cost")
+                    if isinstance(model, str) and isinstance(cost, number) and cost > best_cost:
+                        best, best_cost = model, cost
+                if best is not None:
+                    return best, day
+            models_used = entry.get("modelsUsed")
+            if isinstance(models_used, list) and models_used and isinstance(models_used[-1], str):
+                return models_used[-1], day
+        return None, None
+
+    def model_totals(
+        self, since: Optional[date] = None, until: Optional[date] = None
+    ) -> Dict[str, float]:
+        self._unwindowed(since, until)
+        if self.totals is None:
+            totals: Dict[str, float] = {}
+            get = totals.get
+            number = (int, float)
+            for entry in self.entries:
+                breakdowns = entry.get("modelBreakdowns")
+                if type(breakdowns) is not list and not isinstance(breakdowns, list):
+                    continue
+                for item in breakdowns:
+                    if type(item) is not dict and not isinstance(item, dict):
+                        continue
+                    model = item.get("modelName")
+                    cost = item.get("cost")
+                    if (type(cost) is float or isinstance(cost, number)) and isinstance(model, str):
+                        totals[model] = get(model, 0.0) + float(cost)
+            self.totals = totals
+        return dict(self.totals)
+
+    def latest_day_cost(
+        self, model: str, since: Optional[date] = None, until: Optional[date] = None
+    ) -> Tuple[Optional[str], Optional[float]]:
+        for entry in self._newest_first(since, until):
+            breakdowns = entry.get("modelBreakdowns")
+            if not isinstance(breakdowns, list):
+                continue
+            for item in breakdowns:
+                if isinstance(item, dict) and item.get("modelName") == model:
+                    cost = item.get("cost")
+                    day = entry.get("date")
+                    return (
+                        day if isinstance(day, str) else None,
+                        float(cost) if isinstance(cost, (int, float)) else None,
+                    )
+        return None, None
+
+    def malformed(self) -> Tuple[int, int]:
+        """(days with a missing or invalid date, breakdown items with a non-numeric cost)."""
+        bad_dates = bad_costs = 0
+        for entry in self.entries:
+            bad_dates += not date_ordinal(entry.get("date"))
+            breakdowns = entry.get("modelBreakdowns")
+            if not isinstance(breakdowns, list):
+                continue
+            for item in breakdowns:
+                if (
+                    isinstance(item, dict)
+                    and isinstance(item.get("modelName"), str)
+                    and not isinstance(item.get("cost"), (int, float))
+                ):
+                    bad_costs += 1
+        return bad_dates, bad_costs
+
+
+def one_shot_report(args: argparse.Namespace) -> bool:
+    """True when `args` ask for an unwindowed current/all report an EntryView can answer."""
+    return (
+        args.mode in ("current", "all")
+        and not args.group_by
+        and args.format != "openmetrics"
+        and report_window(args) == (None, None)
+    )
+
+
+def entry_rows(
+    entries: Iterable[Dict[str, Any]], since: Optional[date] = None, until: Optional[date] = None
+) -> Iterator[Tuple[Any, ...]]:
+    """Yield ROW_FIELDS tuples straight from raw daily entries (same rules as DailyIndex.rows)."""
+    low = since.toordinal() if since else 1
+    high = until.toordinal() if until else None
+    for entry in entries:
+        day = entry.get("date")
+        ordinal = date_ordinal(day)
+        if ordinal < low or (high is not None and ordinal > high):
+            continue
+        items: List[Tuple[str, Optional[float]]] = []
+        breakdowns = entry.get("modelBreakdowns")
+        if isinstance(breakdowns, list):
+            for item in breakdowns:
+                if isinstance(item, dict) and isinstance(item.get("modelName"), str):
+                    cost = item.get("cost")
+                    items.append((item["modelName"], float(cost) if isinstance(cost, (int, float)) else None))
+        tokens = []
+        for field in TOKEN_COLUMNS[:-1]:
+            value = entry.get(field)
+            tokens.append(int(value) if isinstance(value, (int, float)) else 0)
+        total_tokens = entry.get("totalTokens")
+        tokens.append(int(total_tokens) if isinstance(total_tokens, (int, float)) else sum(tokens))
+        day_cost = entry.get("totalCost")
+        if not isinstance(day_cost, (int, float)):
+            day_cost = sum(cost for _, cost in items if cost is not None)
+        tail = tuple(tokens) + (float(day_cost),)
+        if not items:
+            yield (day, None, None) + tail
+        for model, cost in items:
+            yield (day, model, cost) + tail
+
+
+def write_rows(out: Any, provider: str, rows: Iterable[Tuple[Any, ...]]) -> int:
+    """Write one NDJSON record per row as it is produced; returns the record count."""
+    prefix = '{"provider": ' + json.dumps(provider) + ", "
+    write = out.write
+    dumps = json.dumps
+    count = 0
+    for row in rows:
+        write(prefix + dumps(dict(zip(ROW_FIELDS, row)))[1:] + "\n")
+        count += 1
+    return count
+
+
+def report_rows(
+    views: Dict[str, Any], since: Optional[date], until: Optional[date], out: Any
+) -> Tuple[int, str, str]:
+    written = 0
+    for provider, view in views.items():
+        written += write_rows(out, provider, view.rows(since, until))
+    if not written:
+        return 2, "", "No daily rows found in codexbar cost payload."
+    return 0, "", ""
+
+
+def stream_rows(args: argparse.Namespace, providers: List[str], out: Any) -> Tuple[int, str, str]:
+    """--stream --mode rows: decode the input and write records without building an index.
+
+    Payloads whose `provider` key comes after `daily` are spooled (to disk
+    past 1 MB) until the provider is known.
+    """
+    inputs = [args.input] if isinstance(args.input, str) else args.input or []
+    if len(inputs) != 1 or is_pattern(inputs[0]) or os.path.isdir(inputs[0]):
+        return 1, "", "--stream needs a single --input file or '-' for stdin."
+    since, until = report_window(args)
+    wanted = set(providers)
+    written = 0
+
+    def consume(meta: Dict[str, Any], entries: Iterator[Dict[str, Any]]) -> Any:
+        nonlocal written
+        provider = meta.get("provider")
+        if isinstance(provider, str):
+            if provider in wanted:
+                written += write_rows(out, provider, entry_rows(entries, since, until))
+            return None
+        import tempfile
+
+        spool = tempfile.SpooledTemporaryFile(max_size=1 << 20, mode="w+", encoding="utf-8")
+        write_rows(spool, "", entry_rows(entries, since, until))
+        return spool
+
+    from usage_stream import stream_payloads
+
+    try:
+        streamed, is_array = stream_payloads(inputs[0], consume)
+    except (OSError, ValueError, RuntimeError) as exc:
+        return 1, "", str(exc)
+    if not is_array and len(providers) > 1:
+        return 1, "", "--provider all needs a codexbar JSON array input."
+    for meta, spool in streamed:
+        if spool is None:
+            continue
+        provider = meta.get("provider") if is_array else providers[0]
+        with spool:
+            if provider not in wanted:
+                continue
+            spool.seek(0)
+            prefix = '{"provider": ' + json.dumps(provider)
+            for line in spool:
+                out.write(prefix + line[len('{"provider": ""') :])
+                written += 1
+    if not written:
+        return 2, "", "No daily rows found in codexbar cost payload."
+    return 0, "", ""
+
+
+def stream_top(args: argparse.Namespace, providers: List[str]) -> Tuple[int, str, str]:
+    """--stream --top: feed one Space-Saving sketch per payload straight from the decoded rows.
+
+    No index is built, so memory stays bounded by K * TOP_CAPACITY_FACTOR
+    counters per payload however many models the input names.
+    """
+    inputs = [args.input] if isinstance(args.input, str) else args.input or []
+    if len(inputs) != 1 or is_pattern(inputs[0]) or os.path.isdir(inputs[0]):
+        return 1, "", "--stream needs a single --input file or '-' for stdin."
+    since, until = report_window(args)
+    wanted = set(providers)
+
+    def consume(meta: Dict[str, Any], entries: Iterator[Dict[str, Any]]) -> Optional[SpaceSaving]:
+        provider = meta.get("provider")
+        if isinstance(provider, str) and provider not in wanted:
+            return None
+        sketch = SpaceSaving(args.top * TOP_CAPACITY_FACTOR)
+        add = sketch.add
+        for _, model, cost, *_ in entry_rows(entries, since, until):
+            if cost is not None:
+                add(model, cost)
+        return sketch
+
+    from usage_stream import stream_payloads
+
+    try:
+        streamed, is_array = stream_payloads(inputs[0], consume)
+    except (OSError, ValueError, RuntimeError) as exc:
+        return 1, "", str(exc)
+    if not is_array and len(providers) > 1:
+        return 1, "", "--provider all needs a codexbar JSON array input."
+    sketches: Dict[str, SpaceSaving] = {}
+    for meta, sketch in streamed:
+        provider = meta.get("provider") if is_array else providers[0]
+        if sketch is not None and provider in wanted and provider not in sketches:
+            sketches[provider] = sketch
+    sections = [sketch_top_summary(provider, [(None, sketch)], args.top) for provider, sketch in sketches.items()]
+    combined = None
+    if args.provider == "all":
+        # Keys are disjoint across providers, so the union of the sketches is a valid summary.
+        combined = sketch_top_summary("all", list(sketches.items()), args.top)
+    return render_top(args, sections, combined)
+
+
+def period_start(ordinal: int, group_by: str) -> int:
+    if group_by == "week":
+        return ordinal - date.fromordinal(ordinal).weekday()
+    if group_by == "month":
+        return ordinal - date.fromordinal(ordinal).day + 1
+    return ordinal
+
+
+def period_label(start: int, group_by: str) -> str:
+    day = date.fromordinal(start)
+    if group_by == "week":
+        year, week, _ = day.isocalendar()
+        return f"{year}-W{week:02d}"
+    if group_by == "month":
+        return day.strftime("%Y-%m")
+    return day.isoformat()
+
+
+def build_series(
+    rows: Iterable[Tuple[int, str, float]], group_by: str, model: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Bucket date-ordered (ordinal, model, cost) rows into day/week/month periods."""
+    buckets: Dict[int, Dict[str, float]] = {}
+    starts: Dict[int, int] = {}
+    for ordinal, row_model, cost in rows:
+        if ordinal < 1 or (model is not None and row_model != model):
+            continue
+        start = starts.get(ordinal)
+        if start is None:
+            start = starts[ordinal] = period_start(ordinal, group_by)
+        bucket = buckets.setdefault(start, {})
+        bucket[row_model] = bucket.get(row_model, 0.0) + cost
+    series: List[Dict[str, Any]] = []
+    for start in sorted(buckets):
+        totals = buckets[start]
+        series.append(
+            {
+                "period": period_label(start, group_by),
+                "start": date.fromordinal(start).isoformat(),
+                "totalCostUSD": sum(totals.values()),
+                "models": [
+                    {"model": name, "costUSD": cost}
+                    for name, cost in sorted(totals.items(), key=lambda item: item[1], reverse=True)
+                ],
+            }
+        )
+    return series
+
+
+def view_series(
+    views: Dict[str, Any], since: Optional[date], until: Optional[date], model: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """One bucket per project/agent/session view, costliest first; `period` holds its name."""
+    series: List[Dict[str, Any]] = []
+    for name, view in views.items():
+        totals = view.model_totals(since, until)
+        if model is not None:
+            totals = {name: cost for name, cost in totals.items() if name == model}
+        if not totals:
+            continue
+        series.append(
+            {
+                "period": name,
+                "totalCostUSD": sum(totals.values()),
+                "models": [
+                    {"model": name, "costUSD": cost}
+                    for name, cost in sorted(totals.items(), key=lambda item: item[1], reverse=True)
+                ],
+            }
+        )
+    series.sort(key=lambda bucket: bucket["totalCostUSD"], reverse=True)
+    return series
+
+
 def usd(value: Optional[float]) -> str:
     if value is None:
         return "—"
@@ -243,77 +1260,924 @@ def build_json_all(provider: str, totals: Dict[str, float]) -> Dict[str, Any]:
     }
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(description="Summarize CodexBar model usage from local cost logs.")
-    parser.add_argument("--provider", choices=["codex", "claude"], default="codex")
-    parser.add_argument("--mode", choices=["current", "all"], default="current")
+def render_text_series(
+    provider: str, group_by: str, model: Optional[str], series: List[Dict[str, Any]]
+) -> str:
+    lines = [f"Provider: {provider}", f"Cost by {group_by} ({model or 'all models'}):"]
+    for bucket in series:
+        parts = ", ".join(f"{item['model']} {usd(item['costUSD'])}" for item in bucket["models"])
+        lines.append(f"- {bucket['period']}: {usd(bucket['totalCostUSD'])} ({parts})")
+    return "\n".join(lines)
+
+
+def build_json_series(
+    provider: str, group_by: str, model: Optional[str], series: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    return {
+        "provider": provider,
+        "mode": "series",
+        "groupBy": group_by,
+        "model": model,
+        "series": series,
+    }
+
+
+def token_summary(provider: str, totals: Dict[str, float]) -> Dict[str, Any]:
+    days = int(totals.get("days", 0))
+    cost = totals.get("totalCost", 0.0)
+    total_tokens = int(totals.get("totalTokens", 0))
+    cache_read = int(totals.get("cacheReadTokens", 0))
+    prompt_tokens = (
+        int(totals.get("inputTokens", 0)) + cache_read + int(totals.get("cacheCreationTokens", 0))
+    )
+    return {
+        "provider": provider,
+        "mode": "tokens",
+        "dailyRowCount": days,
+        "inputTokens": int(totals.get("inputTokens", 0)),
+        "outputTokens": int(totals.get("outputTokens", 0)),
+        "cacheReadTokens": cache_read,
+        "cacheCreationTokens": int(totals.get("cacheCreationTokens", 0)),
+        "totalTokens": total_tokens,
+        "totalCostUSD": cost,
+        "cacheHitRatio": cache_read / prompt_tokens if prompt_tokens else None,
+        "costPer1MTokensUSD": cost / total_tokens * 1_000_000 if total_tokens else None,
+        "tokensPerDay": total_tokens / days if days else None,
+    }
+
+
+def render_text_tokens(summary: Dict[str, Any]) -> str:
+    ratio = summary["cacheHitRatio"]
+    per_day = summary["tokensPerDay"]
+    lines = [
+        f"Provider: {summary['provider']}",
+        f"Input tokens: {summary['inputTokens']:,}",
+        f"Output tokens: {summary['outputTokens']:,}",
+        f"Cache read tokens: {summary['cacheReadTokens']:,}",
+        f"Cache write tokens: {summary['cacheCreationTokens']:,}",
+        f"Total tokens: {summary['totalTokens']:,}",
+        f"Total cost: {usd(summary['totalCostUSD'])}",
+        f"Cache hit ratio: {'—' if ratio is None else f'{ratio:.1%}'}",
+        f"Cost per 1M tokens: {usd(summary['costPer1MTokensUSD'])}",
+        f"Tokens per day: {'—' if per_day is None else f'{per_day:,.0f}'}",
+        f"Daily rows: {summary['dailyRowCount']}",
+    ]
+    return "\n".join(lines)
+
+
+def current_summary(
+    provider: str,
+    view: Any,
+    model: Optional[str],
+    since: Optional[date],
+    until: Optional[date] = None,
+) -> Optional[Dict[str, Any]]:
+    """Collect the keyword arguments for render_text_current/build_json_current."""
+    latest_date = None
+    if not model:
+        model, latest_date = view.current_model(since, until)
+    if not model:
+        return None
+    totals = view.model_totals(since, until)
+    latest_cost_date, latest_cost = view.latest_day_cost(model, since, until)
+    return {
+        "provider": provider,
+        "model": model,
+        "latest_date": latest_date,
+        "total_cost": totals.get(model),
+        "latest_cost": latest_cost,
+        "latest_cost_date": latest_cost_date,
+        "entry_count": view.count(since, until),
+    }
+
+
+def top_summary(
+    provider: str,
+    ranked: List[Tuple[Any, float, float]],
+    total: float,
+    k: int,
+    exact: bool = True,
+    error_bound: float = 0.0,
+) -> Dict[str, Any]:
+    """The --top payload from up to k (key, cost, max overcount) items, largest first.
+
+    Keys are model names, or (provider, model) pairs for the cross-provider list.
+    """
+    models: List[Dict[str, Any]] = []
+    for key, estimate, error in ranked[:k]:
+        item = {"provider": key[0], "model": key[1]} if isinstance(key, tuple) else {"model": key}
+        item.update(totalCostUSD=estimate, maxErrorUSD=error)
+        models.append(item)
+    shown = sum(item["totalCostUSD"] for item in models)
+    return {
+        "provider": provider,
+        "mode": "all",
+        "top": k,
+        "exact": exact,
+        "errorBoundUSD": error_bound,
+        "models": models,
+        "otherCostUSD": max(0.0, total - shown),
+        "totalCostUSD": total,
+    }
+
+
+def exact_top_summary(provider: str, totals: Dict[Any, float], k: int) -> Dict[str, Any]:
+    """--top from exact per-model totals (what an index already holds)."""
+    spent = {key: cost for key, cost in totals.items() if cost > 0}
+    ranked = [(key, cost, 0.0) for key, cost in heapq.nlargest(k, spent.items(), key=itemgetter(1))]
+    return top_summary(provider, ranked, sum(spent.values()), k)
+
+
+def sketch_top_summary(
+    provider: str, sketches: List[Tuple[Optional[str], SpaceSaving]], k: int
+) -> Dict[str, Any]:
+    """--top from Space-Saving sketches over disjoint key sets (one per streamed payload).
+
+    A non-None prefix turns that sketch's model keys into (prefix, model) pairs.
+    """
+    ranked = sorted(
+        (
+            (key if prefix is None else (prefix, key), estimate, error)
+            for prefix, sketch in sketches
+            for key, estimate, error in sketch.top(k)
+        ),
+        key=itemgetter(1),
+        reverse=True,
+    )
+    exact = all(sketch.exact for _, sketch in sketches)
+    error_bound = max((sketch.error_bound for _, sketch in sketches), default=0.0)
+    total = sum(sketch.total for _, sketch in sketches)
+    return top_summary(provider, ranked, total, k, exact, error_bound)
+
+
+def render_text_top(summary: Dict[str, Any]) -> str:
+    accuracy = "exact" if summary["exact"] else f"error <= {usd(summary['errorBoundUSD'])}"
+    lines = [f"Provider: {summary['provider']}", f"Models (top {summary['top']}, {accuracy}):"]
+    for item in summary["models"]:
+        name = f"{item['provider']}/{item['model']}" if "provider" in item else item["model"]
+        error = f" (may overstate by {usd(item['maxErrorUSD'])})" if item["maxErrorUSD"] else ""
+        lines.append(f"- {name}: {usd(item['totalCostUSD'])}{error}")
+    if summary["otherCostUSD"]:
+        lines.append(f"- other: {usd(summary['otherCostUSD'])}")
+    return "\n".join(lines)
+
+
+def metric_labels(**labels: Any) -> str:
+    escaped = (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        for value in labels.values()
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+
+def render_openmetrics(
+    views: Dict[str, Any], since: Optional[date] = None, until: Optional[date] = None
+) -> str:
+    """OpenMetrics exposition of per-provider/per-model cost and token totals.
+
+    Unwindowed totals are counters; with --days/--since/--until they are
+    emitted as `model_usage_window_*` gauges since they can go down.
+    """
+    windowed = since is not None or until is not None
+    prefix, total_kind, suffix = (
+        ("model_usage_window_", "gauge", "") if windowed else ("model_usage_", "counter", "_total")
+    )
+    families: Dict[str, Tuple[str, str, List[str]]] = {
+        "cost": (f"{prefix}cost_usd", total_kind, []),
+        "tokens": (f"{prefix}tokens", total_kind, []),
+        "latest": ("model_usage_latest_day_cost_usd", "gauge", []),
+        "current": ("model_usage_current_model", "info", []),
+        "rows": ("model_usage_daily_rows", "gauge", []),
+        "cache": ("model_usage_cache_hit_ratio", "gauge", []),
+    }
+    help_text = {
+        "cost": "Cost per model from CodexBar daily breakdowns.",
+        "tokens": "Day-level token totals by type.",
+        "latest": "Cost per model on the latest day it was used.",
+        "current": "Most recently used (highest cost) model.",
+        "rows": "Daily rows in the window.",
+        "cache": "Cache reads over all prompt tokens.",
+    }
+
+    def sample(family: str, labels: str, value: Any, sample_suffix: str = "") -> None:
+        name, _, samples = families[family]
+        samples.append(f"{name}{sample_suffix}{labels} {value}")
+
+    for provider, view in views.items():
+        totals = view.model_totals(since, until)
+        for model, cost in sorted(totals.items()):
+            sample("cost", metric_labels(provider=provider, model=model), repr(cost), suffix)
+            _, latest_cost = view.latest_day_cost(model, since, until)
+            if latest_cost is not None:
+                sample("latest", metric_labels(provider=provider, model=model), repr(latest_cost))
+        tokens = token_summary(provider, view.token_totals(since, until))
+        for field, kind in zip(TOKEN_COLUMNS[:-1], ("input", "output", "cache_read", "cache_creation")):
+            sample("tokens", metric_labels(provider=provider, type=kind), tokens[field], suffix)
+        current, _ = view.current_model(since, until)
+        if current:
+            sample("current", metric_labels(provider=provider, model=current), 1, "_info")
+        sample("rows", metric_labels(provider=provider), tokens["dailyRowCount"])
+        if tokens["cacheHitRatio"] is not None:
+            sample("cache", metric_labels(provider=provider), repr(tokens["cacheHitRatio"]))
+
+    lines: List[str] = []
+    for family, (name, kind, samples) in families.items():
+        if samples:
+            lines += [f"# TYPE {name} {kind}", f"# HELP {name} {help_text[family]}", *samples]
+    lines.append("# EOF")
+    return "\n".join(lines)
+
+
+def render_text_providers(sections: List[str], total_cost: float) -> str:
+    return "\n\n".join(sections + [f"All providers: {usd(total_cost)}"])
+
+
+def build_json_providers(
+    mode: str,
+    sections: List[Dict[str, Any]],
+    totals: Optional[Dict[str, Dict[str, float]]] = None,
+    total_cost: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Combine per-provider sections; `totals` lists models (mode all), `total_cost` overrides the sum."""
+    models = [
+        {"provider": provider, "model": model, "totalCostUSD": cost}
+        for provider, provider_totals in (totals or {}).items()
+        for model, cost in provider_totals.items()
+    ]
+    models.sort(key=lambda item: item["totalCostUSD"], reverse=True)
+    if total_cost is None and mode == "tokens":
+        total_cost = sum(section["totalCostUSD"] or 0.0 for section in sections)
+    elif total_cost is None and mode == "series":
+        total_cost = sum(
+            bucket["totalCostUSD"] for section in sections for bucket in section["series"]
+        )
+    elif total_cost is None:
+        total_cost = sum(item["totalCostUSD"] for item in models)
+    payload: Dict[str, Any] = {
+        "provider": "all",
+        "mode": mode,
+        "providers": sections,
+        "totalCostUSD": total_cost,
+    }
+    if mode == "all":
+        payload["models"] = models
+    if mode == "tokens":
+        payload["totalTokens"] = sum(section["totalTokens"] for section in sections)
+    return payload
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Summarize CodexBar model usage from local cost logs.",
+        epilog="Run `model_usage.py serve --help` for the long-running server mode and "
+        "`model_usage.py watch --help` for spike/budget alerts.",
+    )
+    parser.add_argument("--provider", choices=["codex", "claude", "all"], default="codex")
+    parser.add_argument(
+        "--mode",
+        choices=MODE_CHOICES,
+        default="current",
+        help="Current model, all models, token accounting (cache hit ratio, cost per 1M tokens), "
+        "or flat per (provider, date, model) rows (with --format ndjson).",
+    )
     parser.add_argument("--model", help="Explicit model name to report instead of auto-current.")
-    parser.add_argument("--input", help="Path to codexbar cost JSON (or '-' for stdin).")
+    parser.add_argument(
+        "--input",
+        nargs="+",
+        action="extend",
+        metavar="PATH",
+        help="Codexbar cost JSON file(s), globs or directories (or '-' for stdin). "
+        "Several snapshots are merged, newest updatedAt winning per (host, provider, date). "
+        "A single --export-columnar file is memory-mapped instead of parsed.",
+    )
+    parser.add_argument(
+        "--export-columnar",
+        metavar="PATH",
+        help="Also write the loaded daily rows as a compact binary columnar snapshot for fast "
+        "reloading via --input.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Decode a single --input file or stdin incrementally, aggregating daily rows as they "
+        "arrive (constant memory for very large payloads; uses ijson when installed).",
+    )
+    parser.add_argument(
+        "--host-from",
+        choices=HOST_FROM_CHOICES,
+        default="file",
+        help="Host name for merged snapshots without a `host` field: file stem or parent directory.",
+    )
+    parser.add_argument(
+        "--source",
+        choices=["codexbar", "logs", OPENCLAW_PROVIDER],
+        default="codexbar",
+        help="Read costs via codexbar (default), parse the raw Codex/Claude session JSONL logs, "
+        "or read OpenClaw agent transcripts ($OPENCLAW_STATE_DIR or ~/.openclaw; --provider is ignored).",
+    )
+    parser.add_argument(
+        "--log-index",
+        help="Incremental index file for --source logs/openclaw "
+        "(default: ~/.cache/openclaw/model-usage/log-index.json).",
+    )
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="With --source logs/openclaw: parse changed session files in a process pool, "
+        "reporting progress and files/s on stderr (use for the first run on a big host).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=positive_int,
+        help="Worker processes for --backfill (default: usable CPU count).",
+    )
+    parser.add_argument(
+        "--agent",
+        action="append",
+        metavar="ID",
+        help="With --source openclaw: only this agent's sessions (repeatable).",
+    )
+    parser.add_argument(
+        "--session",
+        action="append",
+        metavar="KEY",
+        help="With --source openclaw: only this session key or session id (repeatable).",
+    )
+    parser.add_argument(
+        "--store",
+        help="SQLite history store (e.g. ~/.openclaw/usage.db); ingests daily rows and answers from SQL.",
+    )
+    parser.add_argument(
+        "--store-only",
+        action="store_true",
+        help="Answer from --store without fetching a new payload.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_FETCH_TIMEOUT,
+        help=f"Seconds to wait for each codexbar fetch (default: {DEFAULT_FETCH_TIMEOUT:g}).",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=os.environ.get("MODEL_USAGE_CACHE_TTL", "0"),
+        help="Share codexbar output between callers for this many seconds; stale entries are "
+        "served while one background refresh runs. 0 disables. Env: MODEL_USAGE_CACHE_TTL.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help=f"Directory for the codexbar output cache (default: {DEFAULT_CACHE_DIR}).",
+    )
     parser.add_argument("--days", type=positive_int, help="Limit to last N days (based on daily rows).")
-    parser.add_argument("--format", choices=["text", "json"], default="text")
+    parser.add_argument("--since", type=iso_date, help="Only include days on or after YYYY-MM-DD.")
+    parser.add_argument("--until", type=iso_date, help="Only include days on or before YYYY-MM-DD.")
+    parser.add_argument(
+        "--group-by",
+        choices=GROUP_BY_CHOICES + VIEW_GROUPS,
+        help="Report a cost series per day/week/month (current model in --mode current), cost "
+        "per Claude project with --source logs, or per agent/session with --source openclaw "
+        "(all models unless --model).",
+    )
+    parser.add_argument(
+        "--project",
+        action="append",
+        metavar="NAME",
+        help="With --source logs --provider claude: only this project directory, by full name or "
+        "last path segment (repeatable). Other projects' logs are not rescanned.",
+    )
+    parser.add_argument(
+        "--top",
+        type=positive_int,
+        metavar="K",
+        help="With --mode all: report only the K biggest spenders plus an `other` bucket "
+        "(exact; with --stream a fixed-memory heavy-hitter summary, exact unless there are "
+        "over 10*K models).",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMAT_CHOICES,
+        default="text",
+        help="Output format; openmetrics emits cost/token counters and gauges for every model "
+        "(--mode is ignored).",
+    )
     parser.add_argument("--pretty", action="store_true", help="Pretty-print JSON output.")
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Report wall/CPU time per phase, payload bytes and row counts "
+        "(stderr, or a `timings` object in --format json).",
+    )
+    parser.add_argument("--profile", metavar="PATH", help="Write a cProfile/pstats dump of the run.")
+    parser.add_argument(
+        "--server",
+        default=os.environ.get("MODEL_USAGE_SERVER"),
+        help="Ask a running `model_usage.py serve` (unix:/path or host:port) first; "
+        "falls back to local computation when unreachable. Env: MODEL_USAGE_SERVER.",
+    )
+    return parser
 
-    args = parser.parse_args()
 
-    try:
-        payload = load_payload(args.input, args.provider)
-    except Exception as exc:
-        eprint(str(exc))
-        return 1
+def load_merged_payloads(
+    args: argparse.Namespace, inputs: List[str], providers: List[str]
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """Merge several snapshot files into one payload per requested provider."""
+    if args.source != "codexbar":
+        raise RuntimeError(f"--input cannot be combined with --source {args.source}.")
+    with usage_timings.phase("merge", files=len(inputs)):
+        merged, file_errors = load_snapshot_payloads(inputs, getattr(args, "host_from", "file"))
+    for message in file_errors:
+        eprint(f"Skipping {message}")
+    payloads = {provider: merged[provider] for provider in providers if provider in merged}
+    errors = {
+        provider: f"Provider '{provider}' not found in input snapshots."
+        for provider in providers
+        if provider not in merged
+    }
+    return payloads, errors
 
-    entries = parse_daily_entries(payload)
-    entries = filter_by_days(entries, args.days)
 
-    if args.mode == "current":
-        model = args.model
-        latest_date = None
-        if not model:
-            model, latest_date = pick_current_model(entries)
-        if not model:
-            eprint("No model data found in codexbar cost payload.")
-            return 2
-        totals = aggregate_costs(entries)
-        total_cost = totals.get(model)
-        latest_cost_date, latest_cost = latest_day_cost(entries, model)
+def load_streamed_views(
+    input_path: str, providers: List[str]
+) -> Tuple[Dict[str, "DailyIndex"], Dict[str, str]]:
+    """Build a DailyIndex per provider straight from a streamed --input."""
+    wanted = set(providers)
 
-        if args.format == "json":
-            payload_out = build_json_current(
-                provider=args.provider,
-                model=model,
-                latest_date=latest_date,
-                total_cost=total_cost,
-                latest_cost=latest_cost,
-                latest_cost_date=latest_cost_date,
-                entry_count=len(entries),
-            )
-            indent = 2 if args.pretty else None
-            print(json.dumps(payload_out, indent=indent, sort_keys=args.pretty))
+    def consume(meta: Dict[str, Any], entries: Iterator[Dict[str, Any]]) -> Optional[DailyIndex]:
+        provider = meta.get("provider")
+        if isinstance(provider, str) and provider not in wanted:
+            return None
+        return DailyIndex.from_entries(entries)
+
+    from usage_stream import stream_payloads
+
+    streamed, is_array = stream_payloads(input_path, consume)
+    if not is_array:
+        if len(providers) > 1:
+            raise RuntimeError("--provider all needs a codexbar JSON array input.")
+        index = streamed[0][1] if streamed else None
+        return {providers[0]: index or DailyIndex()}, {}
+    views: Dict[str, DailyIndex] = {}
+    for meta, index in streamed:
+        provider = meta.get("provider")
+        if index is not None and provider in wanted and provider not in views:
+            views[provider] = index
+    errors = {
+        provider: f"Provider '{provider}' not found in codexbar payload."
+        for provider in providers
+        if provider not in views
+    }
+    return views, errors
+
+
+def count_rows(index: Any, skipped: int = 0) -> None:
+    """Record row statistics for --timings: rows, malformed rows and non-numeric costs."""
+    if not usage_timings.active():
+        return
+    if isinstance(index, EntryView):
+        bad_dates, bad_costs = index.malformed()
+    else:
+        bad_dates = bisect_right(index.day_ordinals, 0)
+        bad_costs = sum(1 for cost in index.row_costs if cost != cost)
+    usage_timings.count("rows", len(index) + skipped)
+    usage_timings.count("malformedRows", skipped + bad_dates)
+    usage_timings.count("malformedCosts", bad_costs)
+
+
+def load_views(
+    args: argparse.Namespace,
+    providers: List[str],
+    store: Optional[UsageStore] = None,
+    since: Optional[Dict[str, date]] = None,
+    one_shot: bool = False,
+) -> Dict[str, Any]:
+    """Fetch payloads and return a DailyIndex (or store view) per provider.
+
+    Per-provider fetch errors are reported on stderr; RuntimeError is raised
+    when nothing could be loaded. `since` maps providers to the first day the
+    caller needs: log sources leave older days out of the payloads they build,
+    other payloads drop them before indexing or ingesting. Store views are
+    returned whole; their queries are already windowed. With `one_shot` (a
+    single report from `args`, nothing else queries the views) unwindowed
+    current/all reports get an EntryView over the payload instead of an index.
+    """
+    entry_view = one_shot and one_shot_report(args)
+    since = since or {}
+    floor = None
+    if all(provider in since for provider in providers):
+        floor = min((since[provider] for provider in providers), default=None)
+    floor_key = floor.isoformat() if floor else None
+    if args.store_only:
+        return {provider: store.view(provider) for provider in providers}
+
+    from usage_columnar import is_columnar, read_columnar
+
+    inputs = [args.input] if isinstance(args.input, str) else args.input or []
+    if len(inputs) == 1 and inputs[0] != "-" and is_columnar(inputs[0]):
+        if store is not None:
+            raise RuntimeError("--store cannot ingest a columnar snapshot.")
+        with usage_timings.phase("mmap") as record:
+            views = read_columnar(inputs[0], DailyIndex, providers)
+            record["bytes"] = os.path.getsize(inputs[0])
+        for view in views.values():
+            count_rows(view)
+        if not views:
+            raise RuntimeError(f"No {'/'.join(providers)} sections in {inputs[0]}.")
+        return views
+    if getattr(args, "stream", False):
+        if store is not None or args.source != "codexbar":
+            raise RuntimeError(f"--stream cannot be combined with --store or --source {args.source}.")
+        if len(inputs) != 1 or is_pattern(inputs[0]) or os.path.isdir(inputs[0]):
+            raise RuntimeError("--stream needs a single --input file or '-' for stdin.")
+        with usage_timings.phase("stream"):
+            views, errors = load_streamed_views(inputs[0], providers)
+        for view in views.values():
+            count_rows(view)
+        for provider, message in errors.items():
+            eprint(f"{provider}: {message}")
+        if not views:
+            raise RuntimeError("No provider payloads could be loaded.")
+        return views
+    backfill: Dict[str, Any] = {}
+    if getattr(args, "backfill", False):
+        from usage_logs import default_workers, progress_printer
+
+        backfill = {
+            "workers": args.workers or default_workers(),
+            "progress": progress_printer(sys.stderr, "backfill"),
+        }
+    if args.source == OPENCLAW_PROVIDER:
+        if inputs:
+            raise RuntimeError("--input cannot be combined with --source openclaw.")
+        from usage_openclaw import load_openclaw_groups, load_openclaw_payload
+
+        group_by = getattr(args, "group_by", None)
+        with usage_timings.phase("scan", provider=OPENCLAW_PROVIDER):
+            if group_by in OPENCLAW_GROUPS:
+                payloads = load_openclaw_groups(group_by, args.log_index, args.agent, args.session, **backfill)
+                providers = list(payloads)
+            else:
+                payload = load_openclaw_payload(
+                    args.log_index, args.agent, args.session, since=floor_key, **backfill
+                )
+                payloads = {OPENCLAW_PROVIDER: payload}
+        errors = {}
+        if not payloads:
+            raise RuntimeError("No matching OpenClaw sessions found.")
+    elif args.source == "logs" and (
+        getattr(args, "group_by", None) == PROJECT_GROUP or getattr(args, "project", None)
+    ):
+        if inputs:
+            raise RuntimeError("--input cannot be combined with --source logs.")
+        from usage_logs import build_payload, load_project_partials, merge_partials
+
+        with usage_timings.phase("scan", provider="claude"):
+            partials = load_project_partials(args.log_index, projects=args.project, **backfill)
+        if not partials:
+            raise RuntimeError("No matching Claude projects found in the session logs.")
+        if args.group_by == PROJECT_GROUP:
+            payloads = {name: build_payload("claude", daily) for name, daily in partials.items()}
         else:
-            print(
-                render_text_current(
-                    provider=args.provider,
-                    model=model,
-                    latest_date=latest_date,
-                    total_cost=total_cost,
-                    latest_cost=latest_cost,
-                    latest_cost_date=latest_cost_date,
-                    entry_count=len(entries),
+            daily = merge_partials({"daily": daily} for daily in partials.values())
+            payloads = {"claude": build_payload("claude", daily)}
+        providers, errors = list(payloads), {}
+    elif args.source == "logs" and (backfill or floor_key):
+        if inputs:
+            raise RuntimeError("--input cannot be combined with --source logs.")
+        from usage_logs import load_log_payloads
+
+        with usage_timings.phase("scan", provider=args.provider):
+            payloads, errors = (
+                load_log_payloads(providers, args.log_index, since=floor_key, **backfill),
+                {},
+            )
+    elif len(inputs) > 1 or any(is_pattern(value) or os.path.isdir(value) for value in inputs):
+        payloads, errors = load_merged_payloads(args, inputs, providers)
+    else:
+        input_path = inputs[0] if inputs else None
+        cache = None
+        cache_ttl = getattr(args, "cache_ttl", 0)
+        if cache_ttl and not input_path and args.source == "codexbar":
+            cache = CodexbarCache(args.cache_dir, cache_ttl, args.timeout)
+        payloads, errors = load_payloads(
+            input_path, providers, args.source, args.log_index, args.timeout, cache
+        )
+    for provider, message in errors.items():
+        eprint(f"{provider}: {message}")
+    if not payloads:
+        raise RuntimeError("No provider payloads could be loaded.")
+    views: Dict[str, Any] = {}
+    for provider in providers:
+        if provider not in payloads:
+            continue
+        payload = payloads[provider]
+        entries = parse_daily_entries(payload)
+        daily = payload.get("daily")
+        malformed = len(daily) - len(entries) if isinstance(daily, list) else 0
+        if provider in since:
+            cutoff = since[provider].isoformat()
+            entries = [entry for entry in entries if str(entry.get("date")) >= cutoff]
+        if store is not None:
+            updated_at = payload.get("updatedAt")
+            with usage_timings.phase("ingest", provider=provider) as record:
+                written = store.ingest(
+                    provider, entries, updated_at if isinstance(updated_at, str) else None
                 )
+                record["daysWritten"] = written
+            usage_timings.count("rows", len(entries))
+            views[provider] = store.view(provider)
+        else:
+            with usage_timings.phase("index", provider=provider):
+                views[provider] = EntryView(entries) if entry_view else DailyIndex.from_entries(entries)
+            count_rows(views[provider], malformed)
+    return views
+
+
+def render_top(
+    args: argparse.Namespace, sections: List[Dict[str, Any]], combined: Optional[Dict[str, Any]]
+) -> Tuple[int, str, str]:
+    """Output per-provider --top sections, plus the cross-provider list for --provider all."""
+    indent = 2 if args.pretty else None
+    sections = [section for section in sections if section["models"]]
+    if not sections:
+        return 2, "", "No model breakdowns found in codexbar cost payload."
+    if combined is None:
+        if args.format == "json":
+            return 0, json.dumps(sections[0], indent=indent, sort_keys=args.pretty), ""
+        return 0, render_text_top(sections[0]), ""
+    if args.format == "json":
+        combined["providers"] = sections
+        return 0, json.dumps(combined, indent=indent, sort_keys=args.pretty), ""
+    text_sections = [render_text_top(section) for section in sections + [combined]]
+    return 0, render_text_providers(text_sections, combined["totalCostUSD"]), ""
+
+
+def build_report(args: argparse.Namespace, views: Dict[str, Any]) -> Tuple[int, str, str]:
+    """Render the requested summary, returning (exit code, stdout, stderr)."""
+    since, until = report_window(args)
+    indent = 2 if args.pretty else None
+    multi = args.provider == "all"
+
+    if args.format == "openmetrics":
+        return 0, render_openmetrics(views, since, until), ""
+
+    if args.mode == "rows":
+        buffer = io.StringIO()
+        code, _, err = report_rows(views, since, until, buffer)
+        return code, buffer.getvalue().rstrip("\n"), err
+
+    if args.group_by in VIEW_GROUPS:
+        series = view_series(views, since, until, args.model)
+        if not series:
+            return 2, "", "No model breakdowns found in codexbar cost payload."
+        section = build_json_series(args.provider, args.group_by, args.model, series)
+        if args.format == "json":
+            return 0, json.dumps(section, indent=indent, sort_keys=args.pretty), ""
+        return 0, render_text_series(args.provider, args.group_by, args.model, series), ""
+
+    if args.group_by:
+        sections: List[Dict[str, Any]] = []
+        for provider, view in views.items():
+            model = args.model
+            if args.mode == "current" and not model:
+                model, _ = view.current_model(since, until)
+                if not model:
+                    continue
+            series = build_series(view.daily_costs(since, until), args.group_by, model)
+            if series:
+                sections.append(build_json_series(provider, args.group_by, model, series))
+        if not sections:
+            return 2, "", "No model breakdowns found in codexbar cost payload."
+        if args.format == "json":
+            payload_out = sections[0]
+            if multi:
+                payload_out = build_json_providers("series", sections)
+            return 0, json.dumps(payload_out, indent=indent, sort_keys=args.pretty), ""
+        text_sections = [
+            render_text_series(section["provider"], args.group_by, section["model"], section["series"])
+            for section in sections
+        ]
+        if multi:
+            total_cost = sum(
+                bucket["totalCostUSD"] for section in sections for bucket in section["series"]
             )
-        return 0
+            return 0, render_text_providers(text_sections, total_cost), ""
+        return 0, text_sections[0], ""
+
+    if args.mode == "tokens":
+        sections = [
+            token_summary(provider, view.token_totals(since, until))
+            for provider, view in views.items()
+        ]
+        sections = [section for section in sections if section["dailyRowCount"]]
+        if not sections:
+            return 2, "", "No daily rows found in codexbar cost payload."
+        if args.format == "json":
+            payload_out = build_json_providers("tokens", sections) if multi else sections[0]
+            return 0, json.dumps(payload_out, indent=indent, sort_keys=args.pretty), ""
+        text_sections = [render_text_tokens(section) for section in sections]
+        if multi:
+            total_cost = sum(section["totalCostUSD"] for section in sections)
+            return 0, render_text_providers(text_sections, total_cost), ""
+        return 0, text_sections[0], ""
+
+    if args.mode == "current":
+        summaries = [
+            summary
+            for provider, view in views.items()
+            if (summary := current_summary(provider, view, args.model, since, until)) is not None
+        ]
+        if not summaries:
+            return 2, "", "No model data found in codexbar cost payload."
+        # The cross-provider total is every model's spend, not just each current model's.
+        spend = (
+            sum(sum(view.model_totals(since, until).values()) for view in views.values()) if multi else 0.0
+        )
+
+        if args.format == "json":
+            sections = [build_json_current(**summary) for summary in summaries]
+            payload_out = sections[0]
+            if multi:
+                payload_out = build_json_providers("current", sections, total_cost=spend)
+            return 0, json.dumps(payload_out, indent=indent, sort_keys=args.pretty), ""
 
-    totals = aggregate_costs(entries)
-    if not totals:
-        eprint("No model breakdowns found in codexbar cost payload.")
-        return 2
+        text_sections = [render_text_current(**summary) for summary in summaries]
+        if multi:
+            return 0, render_text_providers(text_sections, spend), ""
+        return 0, text_sections[0], ""
+
+    if args.top:
+        sections = [
+            exact_top_summary(provider, view.model_totals(since, until), args.top)
+            for provider, view in views.items()
+        ]
+        combined = None
+        if multi:
+            combined = exact_top_summary(
+                "all",
+                {
+                    (provider, model): cost
+                    for provider, view in views.items()
+                    for model, cost in view.model_totals(since, until).items()
+                },
+                args.top,
+            )
+        return render_top(args, sections, combined)
+
+    all_totals = {provider: view.model_totals(since, until) for provider, view in views.items()}
+    all_totals = {provider: totals for provider, totals in all_totals.items() if totals}
+    if not all_totals:
+        return 2, "", "No model breakdowns found in codexbar cost payload."
 
     if args.format == "json":
-        payload_out = build_json_all(provider=args.provider, totals=totals)
-        indent = 2 if args.pretty else None
-        print(json.dumps(payload_out, indent=indent, sort_keys=args.pretty))
-    else:
-        print(render_text_all(provider=args.provider, totals=totals))
-    return 0
+        sections = [build_json_all(provider, totals) for provider, totals in all_totals.items()]
+        payload_out = build_json_providers("all", sections, all_totals) if multi else sections[0]
+        return 0, json.dumps(payload_out, indent=indent, sort_keys=args.pretty), ""
+
+    text_sections = [render_text_all(provider, totals) for provider, totals in all_totals.items()]
+    if multi:
+        total_cost = sum(sum(totals.values()) for totals in all_totals.values())
+        return 0, render_text_providers(text_sections, total_cost), ""
+    return 0, text_sections[0], ""
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["serve"]:
+        from usage_server import serve_main
+
+        return serve_main(argv[1:])
+    if argv[:1] == ["watch"]:
+        from usage_alerts import watch_main
+
+        return watch_main(argv[1:])
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.since and args.until and args.since > args.until:
+        parser.error("--since must not be after --until")
+    if args.group_by and args.mode == "tokens":
+        parser.error("--group-by is not supported with --mode tokens")
+    if args.format == "openmetrics" and (args.group_by or args.top):
+        parser.error("--format openmetrics cannot be combined with --group-by or --top")
+    if (args.mode == "rows") != (args.format == "ndjson"):
+        parser.error("--mode rows and --format ndjson go together")
+    if args.mode == "rows" and args.group_by:
+        parser.error("--group-by is not supported with --mode rows")
+    if args.top and (args.mode != "all" or args.group_by):
+        parser.error("--top requires --mode all without --group-by")
+    if (args.agent or args.session) and args.source != OPENCLAW_PROVIDER:
+        parser.error("--agent and --session require --source openclaw")
+    if args.group_by in OPENCLAW_GROUPS and (args.source != OPENCLAW_PROVIDER or args.store or args.stream):
+        parser.error("--group-by agent/session needs --source openclaw without --store")
+    if args.group_by == PROJECT_GROUP or args.project:
+        if args.source != "logs" or args.provider != "claude" or args.store or args.stream:
+            parser.error(
+                "--group-by project and --project need --source logs --provider claude without --store"
+            )
+    if args.export_columnar and (args.store or args.store_only or (args.mode == "rows" and args.stream)):
+        parser.error("--export-columnar cannot be combined with --store or --mode rows --stream")
+    if args.backfill and args.source == "codexbar":
+        parser.error("--backfill requires --source logs or --source openclaw")
+    if args.workers and not args.backfill:
+        parser.error("--workers requires --backfill")
+    if args.source == OPENCLAW_PROVIDER:
+        args.provider = OPENCLAW_PROVIDER
+    timings = usage_timings.start() if args.timings else None
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        code, out, err = run(args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        usage_timings.stop()
+    if profiler is not None:
+        try:
+            profiler.dump_stats(args.profile)
+        except OSError as exc:
+            err = "\n".join(filter(None, [err, f"Failed to write profile: {exc}"]))
+    if timings is not None:
+        if args.format == "json" and code == 0 and out.startswith("{"):
+            data = json.loads(out)
+            data["timings"] = timings.as_dict()
+            out = json.dumps(data, indent=2 if args.pretty else None, sort_keys=args.pretty)
+        else:
+            err = "\n".join(filter(None, [err, timings.render_text()]))
+    if out:
+        print(out)
+    if err:
+        eprint(err)
+    return code
+
+
+def uses_own_data(args: argparse.Namespace) -> bool:
+    """True when `args` pick data a `serve` instance cannot know about (see DATA_SOURCE_OPTIONS)."""
+    if args.group_by in VIEW_GROUPS:
+        return True
+    defaults = build_parser().parse_args([])
+    return any(getattr(args, key) != getattr(defaults, key) for key in DATA_SOURCE_OPTIONS)
+
+
+def run(args: argparse.Namespace) -> Tuple[int, str, str]:
+    """Answer one CLI invocation, returning (exit code, stdout, stderr)."""
+    if args.server and not uses_own_data(args):
+        import http.client
+
+        from usage_server import request_report
+
+        try:
+            options = {key: getattr(args, key) for key in REPORT_OPTIONS}
+            with usage_timings.phase("server"):
+                return request_report(args.server, options)
+        except (OSError, ValueError, KeyError, http.client.HTTPException):
+            pass
+
+    providers = list(PROVIDERS) if args.provider == "all" else [args.provider]
+    if args.mode == "rows" and args.stream and not args.store:
+        with usage_timings.phase("stream"):
+            return stream_rows(args, providers, sys.stdout)
+    if args.top and args.stream and not args.store and args.source == "codexbar":
+        with usage_timings.phase("stream"):
+            return stream_top(args, providers)
+
+    store: Optional[UsageStore] = None
+    if args.store:
+        import sqlite3
+
+        from usage_store import UsageStore
+
+        try:
+            store = UsageStore(args.store)
+        except (OSError, sqlite3.Error) as exc:
+            return 1, "", f"Failed to open usage store: {exc}"
+    elif args.store_only:
+        return 1, "", "--store-only requires --store."
+
+    try:
+        views = load_views(args, providers, store, one_shot=not args.export_columnar)
+    except Exception as exc:
+        return 1, "", str(exc)
+
+    if args.export_columnar:
+        from usage_columnar import write_columnar
+
+        try:
+            with usage_timings.phase("export") as record:
+                record["bytes"] = write_columnar(args.export_columnar, views)
+        except (OSError, ValueError) as exc:
+            return 1, "", f"Failed to write columnar snapshot: {exc}"
+
+    with usage_timings.phase("report"):
+        if args.mode == "rows":
+            since, until = report_window(args)
+            return report_rows(views, since, until, sys.stdout)
+        return build_report(args, views)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the model_usage benchmark harness.
+"""
+
+import json
+from datetime import date
+from unittest import TestCase, main
+
+from bench_model_usage import (
+    DEFAULT_BASELINE_PATH,
+    check_startup,
+    compare,
+    e2e_speedups,
+    generate_payloads,
+    index_report,
+    legacy_report,
+    measure_startup,
+)
+from model_usage import DailyIndex, build_parser, filter_by_days, parse_daily_entries
+
+
+class TestBenchModelUsage(TestCase):
+    def test_generator_is_deterministic_and_injects_malformed_rows(self):
+        first = generate_payloads(2000, models_per_day=2, providers=2, malformed_ratio=0.1, seed=7)
+        second = generate_payloads(2000, models_per_day=2, providers=2, malformed_ratio=0.1, seed=7)
+
+        self.assertEqual(first, second)
+        self.assertEqual([payload["provider"] for payload in first], ["codex", "claude"])
+        self.assertEqual(sum(len(payload["daily"]) for payload in first), 2000)
+        entries = parse_daily_entries(first[0])
+        malformed = 1000 - DailyIndex.from_entries(entries).count()
+        self.assertGreater(malformed, 0)
+        self.assertLess(malformed, 100)
+
+        recent = filter_by_days(parse_daily_entries(generate_payloads(100, malformed_ratio=0.0)[0]), 30)
+        self.assertEqual(len(recent), 30)
+        self.assertEqual(recent[-1]["date"], date.today().isoformat())
+
+    def test_compare_flags_only_meaningful_slowdowns(self):
+        baseline = {
+            "results": [
+                {"rows": 1000, "phase": "load", "seconds": 0.10},
+                {"rows": 1000, "phase": "render", "seconds": 0.0001},
+            ]
+        }
+        results = [
+            {"rows": 1000, "phase": "load", "seconds": 0.20},
+            {"rows": 1000, "phase": "render", "seconds": 0.001},
+            {"rows": 5000, "phase": "load", "seconds": 1.0},
+        ]
+
+        regressions = compare(results, baseline, threshold=1.25)
+
+        self.assertEqual(len(regressions), 1)
+        self.assertIn("load @ 1000 rows", regressions[0])
+        self.assertEqual(results[0]["baselineRatio"], 2.0)
+        self.assertNotIn("baselineRatio", results[2])
+
+        committed = json.loads(DEFAULT_BASELINE_PATH.read_text(encoding="utf-8"))
+        self.assertEqual({item["rows"] for item in committed["results"]}, {1000, 100000})
+
+    def test_e2e_reports_agree_and_pair_up(self):
+        payload = generate_payloads(500, malformed_ratio=0.0)[0]
+        for argv in (["--mode", "all", "--format", "json"], ["--mode", "current", "--format", "json"]):
+            args = build_parser().parse_args(argv)
+            legacy = legacy_report(payload, args)
+            code, out, _ = index_report(payload, args, "codex")
+            self.assertEqual(code, 0)
+            if args.mode == "all":
+                self.assertEqual(sorted(legacy), sorted(item["model"] for item in json.loads(out)["models"]))
+            else:
+                self.assertEqual(legacy[0], json.loads(out)["model"])
+
+        speedups = e2e_speedups(
+            [
+                {"rows": 10, "phase": "e2e_legacy_mode_all", "seconds": 0.3},
+                {"rows": 10, "phase": "e2e_index_mode_all", "seconds": 0.1},
+                {"rows": 10, "phase": "daily_index", "seconds": 0.1},
+            ]
+        )
+        self.assertEqual(speedups, [{"rows": 10, "report": "mode_all", "speedup": 3.0}])
+
+    def test_model_usage_import_skips_heavy_modules(self):
+        startup = measure_startup()
+
+        self.assertIn("model_usage", startup["modules"])
+        self.assertIn("usage_topk", startup["modules"])
+        self.assertEqual(check_startup(startup), [])
+        self.assertEqual(
+            check_startup({"modules": ["model_usage", "sqlite3"]}), ["model_usage imports sqlite3 at load time"]
+        )
+
+
+if __name__ == "__main__":
+    main()
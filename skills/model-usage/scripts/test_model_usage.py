@@ -4,10 +4,45 @@ Tests for model_usage helpers.
 """
 
 import argparse
+import io
+import json
+import random
+import tempfile
+from contextlib import redirect_stdout
 from datetime import date, timedelta
+from pathlib import Path
 from unittest import TestCase, main
+from unittest.mock import patch
 
-from model_usage import filter_by_days, positive_int
+import model_usage
+from model_usage import (
+    DailyIndex,
+    aggregate_costs,
+    build_series,
+    filter_by_days,
+    latest_day_cost,
+    load_payloads,
+    pick_current_model,
+    positive_int,
+    token_summary,
+)
+
+
+def synthetic_entries(seed, count):
+    rng = random.Random(seed)
+    today = date.today()
+    entries = []
+    for offset in rng.sample(range(count * 2), count):
+        entry = {"date": (today - timedelta(days=offset)).strftime("%Y-%m-%d")}
+        if rng.random() < 0.2:
+            entry["modelsUsed"] = [f"m{rng.randrange(5)}"]
+        else:
+            entry["modelBreakdowns"] = [
+                {"modelName": f"m{rng.randrange(5)}", "cost": rng.choice([1.0, 2.5, "x"])}
+                for _ in range(rng.randrange(1, 4))
+            ]
+        entries.append(entry)
+    return entries
 
 
 class TestModelUsage(TestCase):
@@ -35,6 +70,328 @@ class TestModelUsage(TestCase):
         self.assertEqual(filtered[0]["date"], (today - timedelta(days=1)).strftime("%Y-%m-%d"))
         self.assertEqual(filtered[1]["date"], today.strftime("%Y-%m-%d"))
 
+    def test_daily_index_matches_multi_pass_helpers(self):
+        entries = synthetic_entries(seed=7, count=200)
+        index = DailyIndex.from_entries(entries)
+
+        for days in (None, 1, 30, 90, 1000):
+            window = filter_by_days(entries, days)
+            since = date.today() - timedelta(days=days - 1) if days else None
+            self.assertEqual(index.count(since), len(window))
+            self.assertEqual(index.current_model(since), pick_current_model(window))
+            expected = aggregate_costs(window)
+            self.assertEqual(set(index.model_totals(since)), set(expected))
+            for model, total in expected.items():
+                self.assertAlmostEqual(index.model_totals(since)[model], total)
+                self.assertEqual(index.latest_day_cost(model, since), latest_day_cost(window, model))
+
+    def test_entry_view_matches_multi_pass_helpers(self):
+        entries = synthetic_entries(seed=9, count=200)
+        entries[10] = dict(entries[10], date=entries[11]["date"])
+        entries[20] = dict(entries[20], date=None)
+        view = model_usage.EntryView(entries)
+
+        self.assertEqual(view.count(), len(entries))
+        self.assertEqual(view.current_model(), pick_current_model(entries))
+        self.assertEqual(view.model_totals(), aggregate_costs(entries))
+        for model in aggregate_costs(entries):
+            self.assertEqual(view.latest_day_cost(model), latest_day_cost(entries, model))
+        with self.assertRaises(ValueError):
+            view.model_totals(date.today())
+
+    def test_only_windowed_reports_build_an_index(self):
+        data = {"provider": "codex", "daily": synthetic_entries(seed=3, count=50)}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "cost.json"
+            path.write_text(json.dumps(data), encoding="utf-8")
+            built = []
+            from_entries = DailyIndex.from_entries
+
+            def counted(entries):
+                built.append(len(entries))
+                return from_entries(entries)
+
+            outputs = []
+            with patch.object(DailyIndex, "from_entries", counted):
+                for extra in ([], ["--days", "10000"]):
+                    out = io.StringIO()
+                    with redirect_stdout(out):
+                        code = model_usage.main(["--mode", "all", "--input", str(path), "--format", "json"] + extra)
+                    self.assertEqual(code, 0)
+                    outputs.append(json.loads(out.getvalue()))
+
+        self.assertEqual(built, [50])
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_daily_index_ignores_invalid_dates_in_windows(self):
+        entries = [
+            {"date": "bogus", "modelBreakdowns": [{"modelName": "a", "cost": 1.0}]},
+            {"date": date.today().strftime("%Y-%m-%d"), "modelsUsed": ["b"]},
+        ]
+        index = DailyIndex.from_entries(entries)
+
+        self.assertEqual(index.model_totals(), {"a": 1.0})
+        self.assertEqual(index.count(), 2)
+        self.assertEqual(index.model_totals(date.today()), {})
+        self.assertEqual(index.current_model(date.today())[0], "b")
+
+    def test_daily_index_is_independent_of_input_order(self):
+        entries = synthetic_entries(seed=5, count=150)
+        entries[40] = dict(entries[40], date="bogus")
+        entries[90] = dict(entries[90], date=None)
+        shuffled = list(entries)
+        random.Random(2).shuffle(shuffled)
+        ordered = DailyIndex.from_entries(sorted(entries, key=lambda entry: entry["date"] or ""))
+        index = DailyIndex.from_entries(shuffled)
+        streamed = DailyIndex.from_entries(iter(shuffled))
+
+        for candidate in (index, streamed):
+            self.assertEqual(
+                sorted(candidate.rows(), key=str), sorted(ordered.rows(), key=str)
+            )
+            self.assertEqual(list(candidate.day_ordinals), list(ordered.day_ordinals))
+            self.assertEqual(candidate.token_totals(), ordered.token_totals())
+            self.assertEqual(candidate.model_totals().keys(), ordered.model_totals().keys())
+
+    def test_daily_index_range_queries_match_brute_force(self):
+        entries = synthetic_entries(seed=11, count=120)
+        index = DailyIndex.from_entries(entries)
+        rng = random.Random(3)
+        today = date.today()
+
+        for _ in range(25):
+            since = today - timedelta(days=rng.randrange(240))
+            until = since + timedelta(days=rng.randrange(60))
+            window = [
+                entry
+                for entry in entries
+                if since.isoformat() <= entry["date"] <= until.isoformat()
+            ]
+            expected = aggregate_costs(window)
+            totals = index.model_totals(since, until)
+            self.assertEqual(set(totals), set(expected))
+            for model, total in expected.items():
+                self.assertAlmostEqual(totals[model], total)
+                self.assertEqual(
+                    index.latest_day_cost(model, since, until), latest_day_cost(window, model)
+                )
+            self.assertEqual(index.current_model(since, until), pick_current_model(window))
+            self.assertEqual(index.count(since, until), len(window))
+
+    def test_build_series_buckets_by_week_and_month(self):
+        rows = [
+            (date(2025, 1, 5).toordinal(), "a", 1.0),
+            (date(2025, 1, 6).toordinal(), "a", 2.0),
+            (date(2025, 1, 7).toordinal(), "b", 4.0),
+            (date(2025, 2, 1).toordinal(), "a", 8.0),
+        ]
+
+        weeks = build_series(rows, "week")
+        months = build_series(rows, "month", model="a")
+
+        self.assertEqual([bucket["period"] for bucket in weeks], ["2025-W01", "2025-W02", "2025-W05"])
+        self.assertEqual(weeks[1]["start"], "2025-01-06")
+        self.assertEqual(weeks[1]["totalCostUSD"], 6.0)
+        self.assertEqual(weeks[1]["models"][0], {"model": "b", "costUSD": 4.0})
+        self.assertEqual([bucket["totalCostUSD"] for bucket in months], [3.0, 8.0])
+
+    def test_token_totals_and_summary(self):
+        entries = [
+            {
+                "date": "2025-01-01",
+                "inputTokens": 600,
+                "outputTokens": 100,
+                "cacheReadTokens": 300,
+                "cacheCreationTokens": 100,
+                "totalCost": 0.5,
+            },
+            {"date": "2025-01-02", "inputTokens": 1000, "totalTokens": 1000,
+             "modelBreakdowns": [{"modelName": "a", "cost": 1.5}]},
+        ]
+        index = DailyIndex.from_entries(entries)
+
+        totals = index.token_totals()
+        summary = token_summary("claude", totals)
+
+        self.assertEqual(totals["totalTokens"], 2100)
+        self.assertEqual(totals["totalCost"], 2.0)
+        self.assertEqual(index.token_totals(date(2025, 1, 2))["inputTokens"], 1000)
+        self.assertAlmostEqual(summary["cacheHitRatio"], 300 / 2000)
+        self.assertAlmostEqual(summary["costPer1MTokensUSD"], 2.0 / 2100 * 1_000_000)
+        self.assertEqual(summary["tokensPerDay"], 1050)
+
+    def test_load_payloads_reuses_combined_fetch_and_backfills_missing(self):
+        calls = []
+
+        def fake_run(provider, timeout=None):
+            calls.append(provider)
+            if provider is None:
+                return [{"provider": "codex", "daily": []}]
+            return [{"provider": provider, "daily": [{"date": "2025-01-01"}]}]
+
+        with patch.object(model_usage, "run_codexbar_cost", fake_run):
+            payloads, errors = load_payloads(None, ["codex", "claude"], timeout=5)
+
+        self.assertEqual(errors, {})
+        self.assertEqual(set(calls), {None, "claude"})
+        self.assertEqual(payloads["codex"]["daily"], [])
+        self.assertEqual(payloads["claude"]["daily"], [{"date": "2025-01-01"}])
+
+    def test_provider_all_merges_totals(self):
+        data = [
+            {"provider": "codex", "daily": [{"date": "2025-01-01", "modelBreakdowns": [{"modelName": "a", "cost": 1.0}]}]},
+            {"provider": "claude", "daily": [{"date": "2025-01-01", "modelBreakdowns": [{"modelName": "b", "cost": 2.0}]}]},
+        ]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "cost.json"
+            path.write_text(json.dumps(data), encoding="utf-8")
+            out = io.StringIO()
+            with redirect_stdout(out):
+                code = model_usage.main(
+                    ["--provider", "all", "--mode", "all", "--input", str(path), "--format", "json"]
+                )
+
+        self.assertEqual(code, 0)
+        result = json.loads(out.getvalue())
+        self.assertEqual(result["totalCostUSD"], 3.0)
+        self.assertEqual([item["provider"] for item in result["models"]], ["claude", "codex"])
+        self.assertEqual([section["provider"] for section in result["providers"]], ["codex", "claude"])
+
+    def test_provider_all_current_total_counts_every_model(self):
+        data = [
+            {
+                "provider": "codex",
+                "daily": [
+                    {"date": "2025-01-01", "modelBreakdowns": [{"modelName": "a", "cost": 5.0}]},
+                    {"date": "2025-01-02", "modelBreakdowns": [{"modelName": "b", "cost": 1.5}]},
+                ],
+            },
+            {
+                "provider": "claude",
+                "daily": [
+                    {"date": "2025-01-01", "modelBreakdowns": [{"modelName": "c", "cost": 8.0}]},
+                    {"date": "2025-01-02", "modelBreakdowns": [{"modelName": "d", "cost": 3.0}]},
+                ],
+            },
+        ]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "cost.json"
+            path.write_text(json.dumps(data), encoding="utf-8")
+            outputs = {}
+            for fmt in ("json", "text"):
+                out = io.StringIO()
+                with redirect_stdout(out):
+                    code = model_usage.main(
+                        ["--provider", "all", "--mode", "current", "--input", str(path), "--format", fmt]
+                    )
+                self.assertEqual(code, 0)
+                outputs[fmt] = out.getvalue()
+
+        result = json.loads(outputs["json"])
+        self.assertEqual([section["model"] for section in result["providers"]], ["b", "d"])
+        self.assertEqual(result["totalCostUSD"], 17.5)
+        self.assertIn("All providers: $17.50", outputs["text"])
+
+    def test_group_by_project_splits_claude_log_costs(self):
+        def message(message_id, model, input_tokens):
+            return {
+                "type": "assistant",
+                "timestamp": "2025-01-02T12:00:00Z",
+                "requestId": "r",
+                "message": {"id": message_id, "model": model, "usage": {"input_tokens": input_tokens}},
+            }
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            projects = Path(temp_dir) / "projects"
+            logs = {
+                "-src-alpha": [message("a", "claude-sonnet-4", 1_000_000)],
+                "-src-beta": [message("b", "claude-sonnet-4", 1_000_000), message("c", "claude-opus-4", 1_000_000)],
+            }
+            for project, records in logs.items():
+                (projects / project).mkdir(parents=True)
+                lines = "".join(json.dumps(record) + "\n" for record in records)
+                (projects / project / "s.jsonl").write_text(lines, encoding="utf-8")
+            common = ["--provider", "claude", "--source", "logs", "--mode", "all", "--format", "json"]
+            common += ["--log-index", str(Path(temp_dir) / "index.json")]
+            outputs = []
+            with patch.dict("os.environ", {"CLAUDE_CONFIG_DIR": temp_dir}):
+                for extra in (["--group-by", "project"], ["--project", "alpha"]):
+                    out = io.StringIO()
+                    with redirect_stdout(out):
+                        self.assertEqual(model_usage.main(common + extra), 0)
+                    outputs.append(json.loads(out.getvalue()))
+
+        grouped, filtered = outputs
+        self.assertEqual(grouped["groupBy"], "project")
+        self.assertEqual([bucket["period"] for bucket in grouped["series"]], ["-src-beta", "-src-alpha"])
+        self.assertAlmostEqual(grouped["series"][0]["totalCostUSD"], 18.0)
+        self.assertEqual(filtered["models"], [{"model": "claude-sonnet-4", "totalCostUSD": 3.0}])
+
+    def test_timings_json_reports_phases_and_malformed_rows(self):
+        data = {
+            "provider": "codex",
+            "daily": [
+                {"date": "2025-01-01", "modelBreakdowns": [{"modelName": "a", "cost": "n/a"}]},
+                {"date": "bad", "modelBreakdowns": [{"modelName": "a", "cost": 1.0}]},
+                "not-a-row",
+            ],
+        }
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "cost.json"
+            path.write_text(json.dumps(data), encoding="utf-8")
+            out = io.StringIO()
+            with redirect_stdout(out):
+                code = model_usage.main(
+                    ["--mode", "all", "--input", str(path), "--format", "json", "--timings"]
+                )
+
+        self.assertEqual(code, 0)
+        timings = json.loads(out.getvalue())["timings"]
+        self.assertEqual([item["phase"] for item in timings["phases"]], ["read", "decode", "index", "report"])
+        self.assertEqual(timings["payloadBytes"], len(json.dumps(data)))
+        self.assertEqual((timings["rows"], timings["malformedRows"], timings["malformedCosts"]), (3, 2, 1))
+
+    def test_openmetrics_escapes_labels_and_switches_to_gauges_for_windows(self):
+        entries = [
+            {"date": "2025-01-01", "inputTokens": 10, "modelBreakdowns": [{"modelName": 'ft"x\\y', "cost": 1.5}]},
+        ]
+        views = {"codex": DailyIndex.from_entries(entries)}
+
+        text = model_usage.render_openmetrics(views)
+        self.assertIn("# TYPE model_usage_cost_usd counter", text)
+        self.assertIn('model_usage_cost_usd_total{provider="codex",model="ft\\"x\\\\y"} 1.5', text)
+        self.assertIn('model_usage_tokens_total{provider="codex",type="input"} 10', text)
+        self.assertEqual(text.splitlines()[-1], "# EOF")
+
+        windowed = model_usage.render_openmetrics(views, since=date(2025, 1, 1))
+        self.assertIn("# TYPE model_usage_window_cost_usd gauge", windowed)
+        self.assertNotIn("_total", windowed)
+
+    def test_rows_match_between_index_and_raw_entries(self):
+        entries = [
+            {"date": "2025-01-02", "outputTokens": 7, "modelsUsed": ["z"]},
+            {
+                "date": "2025-01-01",
+                "inputTokens": 5,
+                "totalCost": 3,
+                "modelBreakdowns": [{"modelName": "a", "cost": 1}, {"modelName": "b", "cost": "x"}],
+            },
+            {"date": "bad", "modelBreakdowns": [{"modelName": "a", "cost": 9}]},
+        ]
+        rows = list(DailyIndex.from_entries(entries).rows())
+
+        self.assertEqual(sorted(model_usage.entry_rows(entries)), rows)
+        self.assertEqual(rows[0], ("2025-01-01", "a", 1.0, 5, 0, 0, 0, 5, 3.0))
+        self.assertEqual(rows[1][1:3], ("b", None))
+        self.assertEqual(rows[2][:3], ("2025-01-02", None, None))
+        self.assertEqual(list(model_usage.entry_rows(entries, since=date(2025, 1, 2))), rows[2:])
+
+        out = io.StringIO()
+        self.assertEqual(model_usage.write_rows(out, "codex", rows), 3)
+        first = json.loads(out.getvalue().splitlines()[0])
+        self.assertEqual(first["provider"], "codex")
+        self.assertEqual(first["dayCostUSD"], 3.0)
+
 
 if __name__ == "__main__":
     main()
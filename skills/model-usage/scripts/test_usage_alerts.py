@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental spike and budget alert engine.
+"""
+
+import io
+import json
+import tempfile
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import TestCase, main
+
+from model_usage import DailyIndex
+from usage_alerts import AlertEngine, new_state, watch_main
+from usage_store import UsageStore
+
+TODAY = date(2025, 3, 20)
+
+
+def day_entries(costs_by_day):
+    return [
+        {
+            "date": (TODAY - timedelta(days=back)).isoformat(),
+            "modelBreakdowns": [{"modelName": model, "cost": cost} for model, cost in costs.items()],
+        }
+        for back, costs in sorted(costs_by_day.items(), reverse=True)
+    ]
+
+
+class CountingView:
+    """Wraps a DailyIndex and records how many rows each run reads."""
+
+    def __init__(self, entries):
+        self.index = DailyIndex.from_entries(entries)
+        self.rows_read = 0
+
+    def daily_costs(self, since=None, until=None):
+        for row in self.index.daily_costs(since, until):
+            self.rows_read += 1
+            yield row
+
+
+class TestAlertEngine(TestCase):
+    def test_warm_up_is_silent_then_spikes_and_budgets_fire_once(self):
+        history = {back: {"gpt-5": 1.0 + (back % 3) * 0.1} for back in range(1, 15)}
+        state = new_state()
+        engine = AlertEngine(state, daily_budget=5.0, monthly_budget=30.0)
+        self.assertEqual(engine.process({"codex": CountingView(day_entries(history))}, TODAY), [])
+        self.assertEqual(state["cursors"]["codex"], (TODAY - timedelta(days=1)).isoformat())
+        self.assertEqual(state["models"]["codex/gpt-5"]["n"], 14)
+
+        history[0] = {"gpt-5": 9.0, "gpt-5-mini": 0.5}
+        view = CountingView(day_entries(history))
+        alerts = AlertEngine(state, daily_budget=5.0, monthly_budget=30.0).process({"codex": view}, TODAY)
+
+        self.assertEqual(view.rows_read, 2)
+        self.assertEqual(
+            [(alert["type"], alert.get("scope"), alert.get("model")) for alert in alerts],
+            [("spike", None, "gpt-5"), ("budget", "day", None)],
+        )
+        self.assertTrue(alerts[0]["partial"])
+        self.assertGreater(alerts[0]["zScore"], 3)
+        self.assertEqual(alerts[1]["costUSD"], 9.5)
+
+        history[0] = {"gpt-5": 25.0}
+        alerts = AlertEngine(state, daily_budget=5.0, monthly_budget=30.0).process(
+            {"codex": CountingView(day_entries(history))}, TODAY
+        )
+        self.assertEqual([alert.get("scope") for alert in alerts], ["month"])
+        self.assertAlmostEqual(alerts[0]["costUSD"], 25.0 + sum(history[back]["gpt-5"] for back in range(1, 15)))
+
+    def test_first_run_over_budget_records_the_periods_without_alerting(self):
+        history = {back: {"gpt-5": 10.0} for back in range(0, 10)}
+        state = new_state()
+        engine = AlertEngine(state, daily_budget=5.0, monthly_budget=30.0)
+
+        self.assertEqual(engine.process({"codex": CountingView(day_entries(history))}, TODAY), [])
+        self.assertEqual(sorted(state["alerted"]), [f"budget:day:{TODAY}", f"budget:month:{TODAY.isoformat()[:7]}"])
+        self.assertEqual(
+            AlertEngine(state, daily_budget=5.0, monthly_budget=30.0).process(
+                {"codex": CountingView(day_entries(history))}, TODAY
+            ),
+            [],
+        )
+
+    def test_finished_days_fold_into_state_on_the_next_run(self):
+        history = {back: {"m": 2.0} for back in range(2, 12)}
+        state = new_state()
+        AlertEngine(state).process({"claude": CountingView(day_entries(history))}, TODAY)
+        history[1] = {"m": 2.0}
+        history[0] = {"m": 2.0}
+        view = CountingView(day_entries(history))
+
+        AlertEngine(state, daily_budget=1.5).process({"claude": view}, TODAY)
+
+        self.assertEqual(view.rows_read, 2)
+        self.assertEqual(state["cursors"]["claude"], (TODAY - timedelta(days=1)).isoformat())
+        self.assertEqual(state["models"]["claude/m"]["n"], 11)
+        self.assertEqual(sorted(state["alerted"]), [f"budget:day:{TODAY - timedelta(days=1)}", f"budget:day:{TODAY}"])
+
+
+class TestWatchCli(TestCase):
+    def test_watch_emits_json_lines_and_persists_state(self):
+        history = {back: {"gpt-5": 1.0} for back in range(1, 10)}
+        history[0] = {"gpt-5": 4.0}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = Path(temp_dir) / "cost.json"
+            source.write_text(json.dumps({"provider": "codex", "daily": day_entries(history)}), encoding="utf-8")
+            state_path = Path(temp_dir) / "state.json"
+            argv = ["--provider", "codex", "--input", str(source), "--state", str(state_path), "--daily-budget", "3"]
+            outputs = []
+            for today in (TODAY - timedelta(days=1), TODAY, TODAY):
+                out = io.StringIO()
+                with redirect_stdout(out):
+                    self.assertEqual(watch_main(argv, today=today), 0)
+                outputs.append(out.getvalue())
+            state = json.loads(state_path.read_text(encoding="utf-8"))
+
+        self.assertEqual(outputs[0], "")
+        alert = json.loads(outputs[1])
+        self.assertEqual((alert["type"], alert["scope"], alert["costUSD"]), ("budget", "day", 4.0))
+        self.assertEqual(outputs[2], "")
+        self.assertEqual(state["cursors"], {"codex": (TODAY - timedelta(days=1)).isoformat()})
+
+    def test_watch_passes_the_cursor_down_to_the_store(self):
+        history = {back: {"gpt-5": 1.0} for back in range(2, 10)}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = Path(temp_dir) / "cost.json"
+            store_path = str(Path(temp_dir) / "usage.db")
+            argv = ["--provider", "codex", "--input", str(source), "--state", str(Path(temp_dir) / "state.json"),
+                    "--store", store_path]
+            source.write_text(json.dumps({"provider": "codex", "daily": day_entries(history)}), encoding="utf-8")
+            with redirect_stdout(io.StringIO()):
+                self.assertEqual(watch_main(argv, today=TODAY - timedelta(days=1)), 0)
+            # Days at or before the cursor are not read again; only the new day is ingested.
+            history[5] = {"gpt-5": 50.0}
+            history[1] = {"gpt-5": 2.0}
+            source.write_text(json.dumps({"provider": "codex", "daily": day_entries(history)}), encoding="utf-8")
+            with redirect_stdout(io.StringIO()):
+                self.assertEqual(watch_main(argv, today=TODAY), 0)
+            with UsageStore(store_path) as store:
+                totals = store.model_totals("codex")
+                days = store.day_count("codex")
+
+        self.assertEqual(days, 9)
+        self.assertEqual(totals, {"gpt-5": 10.0})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for the codexbar output TTL cache.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from usage_cache import CodexbarCache
+
+
+class TestCodexbarCache(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp(prefix="test_usage_cache_"))
+        self.cache = CodexbarCache(str(self.temp_dir), ttl=60)
+        self.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def fetch(self):
+        self.calls += 1
+        return [{"provider": "codex", "daily": [], "call": self.calls}]
+
+    def age_entry(self, key, seconds):
+        path = self.cache.path(key)
+        entry = json.loads(path.read_text(encoding="utf-8"))
+        entry["fetchedAt"] -= seconds
+        path.write_text(json.dumps(entry), encoding="utf-8")
+
+    def test_fresh_entries_are_served_without_fetching(self):
+        self.assertEqual(self.cache.get("codex", self.fetch)[0]["call"], 1)
+        self.assertEqual(self.cache.get("codex", self.fetch)[0]["call"], 1)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual([path.name for path in self.temp_dir.glob("*.json")], ["cost-codex.json"])
+
+    def test_stale_entry_is_returned_while_refresh_is_spawned(self):
+        self.cache.get("codex", self.fetch)
+        self.age_entry("codex", 120)
+
+        with patch.object(CodexbarCache, "spawn_refresh") as spawn:
+            payload = self.cache.get("codex", self.fetch)
+
+        self.assertEqual(payload[0]["call"], 1)
+        spawn.assert_called_once_with("codex")
+        self.assertTrue(self.cache.refresh("codex", self.fetch))
+        self.assertFalse(self.cache.refresh("codex", self.fetch))
+        self.assertEqual(self.cache.get("codex", self.fetch)[0]["call"], 2)
+
+    def test_stale_reads_spawn_one_refresher_until_it_finishes(self):
+        self.cache.get("codex", self.fetch)
+        self.age_entry("codex", 120)
+
+        with patch.object(CodexbarCache, "spawn_refresh") as spawn:
+            for _ in range(3):
+                self.assertEqual(self.cache.get("codex", self.fetch)[0]["call"], 1)
+            self.assertEqual(spawn.call_count, 1)
+            self.assertTrue(self.cache.marker("codex").exists())
+
+            # A marker left behind by a refresher that died stops blocking spawns.
+            dead = time.time() - 3600
+            os.utime(self.cache.marker("codex"), (dead, dead))
+            self.cache.get("codex", self.fetch)
+            self.assertEqual(spawn.call_count, 2)
+
+        self.assertTrue(self.cache.refresh("codex", self.fetch))
+        self.assertFalse(self.cache.marker("codex").exists())
+
+    def test_refresh_skips_while_another_refresh_holds_the_lock(self):
+        self.cache.get("all", self.fetch)
+        self.age_entry("all", 120)
+
+        self.assertTrue(self.cache.claim_refresh("all"))
+        with self.cache.lock("all"):
+            self.assertFalse(self.cache.refresh("all", self.fetch))
+        self.assertEqual(self.calls, 1)
+        # The marker this refresher was spawned for is cleared even though it did not run.
+        self.assertFalse(self.cache.marker("all").exists())
+
+    def test_very_stale_or_corrupt_entries_are_refetched_synchronously(self):
+        self.cache.get("codex", self.fetch)
+        self.age_entry("codex", 60 * 11)
+        self.assertEqual(self.cache.get("codex", self.fetch)[0]["call"], 2)
+
+        self.cache.path("codex").write_text("{", encoding="utf-8")
+        self.assertEqual(self.cache.get("codex", self.fetch)[0]["call"], 3)
+        self.assertLess(time.time() - os.stat(self.cache.path("codex")).st_mtime, 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory-mapped columnar snapshot format.
+"""
+
+import io
+import json
+import tempfile
+from contextlib import redirect_stdout
+from datetime import date
+from pathlib import Path
+from unittest import TestCase, main
+
+import model_usage
+from model_usage import DailyIndex
+from test_model_usage import synthetic_entries
+from usage_columnar import is_columnar, read_columnar, write_columnar
+
+
+class TestUsageColumnar(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.temp_dir.name) / "usage.mucol")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_mapped_index_answers_like_the_original(self):
+        entries = synthetic_entries(11, 300) + [{"date": "bad", "modelBreakdowns": [{"modelName": "m1", "cost": 4.0}]}]
+        original = DailyIndex.from_entries(entries)
+        views = {"codex": original, "claude": DailyIndex.from_entries(synthetic_entries(12, 50))}
+        write_columnar(self.path, views)
+
+        self.assertTrue(is_columnar(self.path))
+        mapped = read_columnar(self.path, DailyIndex, ["codex"])
+        self.assertEqual(list(mapped), ["codex"])
+        loaded = mapped["codex"]
+        self.assertIsInstance(loaded.row_costs, memoryview)
+        since = date.fromordinal(original.day_ordinals[len(original) // 2])
+        for window in ((None, None), (since, None), (None, since)):
+            self.assertEqual(loaded.model_totals(*window), original.model_totals(*window))
+            self.assertEqual(loaded.token_totals(*window), original.token_totals(*window))
+            self.assertEqual(loaded.current_model(*window), original.current_model(*window))
+            self.assertEqual(list(loaded.daily_costs(*window)), list(original.daily_costs(*window)))
+            self.assertEqual(list(loaded.rows(*window)), list(original.rows(*window)))
+        for model in original.models:
+            self.assertEqual(loaded.latest_day_cost(model), original.latest_day_cost(model))
+
+    def test_cli_exports_and_reloads_snapshot(self):
+        data = [
+            {"provider": "codex", "daily": [{"date": "2025-01-01", "modelBreakdowns": [{"modelName": "a", "cost": 1.0}]}]},
+            {"provider": "claude", "daily": [{"date": "2025-01-02", "modelBreakdowns": [{"modelName": "b", "cost": 2.0}]}]},
+        ]
+        source = Path(self.temp_dir.name) / "cost.json"
+        source.write_text(json.dumps(data), encoding="utf-8")
+        outputs = []
+        for args in (["--input", str(source), "--export-columnar", self.path], ["--input", self.path]):
+            out = io.StringIO()
+            with redirect_stdout(out):
+                code = model_usage.main(["--provider", "all", "--mode", "all", "--format", "json"] + args)
+            self.assertEqual(code, 0)
+            outputs.append(json.loads(out.getvalue()))
+
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[1]["totalCostUSD"], 3.0)
+
+    def test_windowed_queries_on_a_mapped_index_use_the_stored_prefix_sums(self):
+        original = DailyIndex.from_entries(synthetic_entries(13, 400))
+        write_columnar(self.path, {"codex": original})
+
+        loaded = read_columnar(self.path, DailyIndex)["codex"]
+        self.assertIsInstance(loaded.prefix[2][0], memoryview)
+        self.assertIs(loaded._prefix(), loaded.prefix)
+        ordinals = original.day_ordinals
+        for low, high in ((0, len(original) - 1), (10, 20), (len(original) // 2, len(original) - 1)):
+            since, until = date.fromordinal(ordinals[low]), date.fromordinal(ordinals[high])
+            self.assertEqual(loaded.model_totals(since, until), original.model_totals(since, until))
+            for model in original.models:
+                self.assertEqual(
+                    loaded.latest_day_cost(model, since, until), original.latest_day_cost(model, since, until)
+                )
+
+    def test_older_snapshot_version_is_rejected(self):
+        write_columnar(self.path, {"codex": DailyIndex.from_entries(synthetic_entries(1, 20))})
+        data = bytearray(Path(self.path).read_bytes())
+        data[7] = 1
+        Path(self.path).write_bytes(bytes(data))
+
+        self.assertTrue(is_columnar(self.path))
+        with self.assertRaisesRegex(ValueError, "older columnar snapshot"):
+            read_columnar(self.path, DailyIndex)
+
+    def test_truncated_snapshot_is_rejected(self):
+        write_columnar(self.path, {"codex": DailyIndex.from_entries(synthetic_entries(1, 20))})
+        data = Path(self.path).read_bytes()
+        Path(self.path).write_bytes(data[: len(data) // 2])
+
+        with self.assertRaises(ValueError):
+            read_columnar(self.path, DailyIndex)
+
+
+if __name__ == "__main__":
+    main()
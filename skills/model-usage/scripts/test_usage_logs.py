@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental session log reader.
+"""
+
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main
+
+from usage_logs import (
+    build_payload,
+    load_index,
+    load_log_payload,
+    load_log_payloads,
+    load_project_partials,
+    merge_partials,
+    shard_jobs,
+)
+
+
+def codex_token_count(timestamp, input_tokens, cached, output):
+    return {
+        "timestamp": timestamp,
+        "type": "event_msg",
+        "payload": {
+            "type": "token_count",
+            "info": {
+                "total_token_usage": {
+                    "input_tokens": input_tokens,
+                    "cached_input_tokens": cached,
+                    "output_tokens": output,
+                }
+            },
+        },
+    }
+
+
+def claude_message(timestamp, message_id, request_id, input_tokens, output):
+    return {
+        "type": "assistant",
+        "timestamp": timestamp,
+        "requestId": request_id,
+        "message": {
+            "id": message_id,
+            "model": "claude-sonnet-4-20250514",
+            "usage": {"input_tokens": input_tokens, "output_tokens": output},
+        },
+    }
+
+
+def write_lines(path, records, mode="w"):
+    with open(path, mode, encoding="utf-8") as handle:
+        for record in records:
+            handle.write(json.dumps(record) + "\n")
+
+
+class TestUsageLogs(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp(prefix="test_usage_logs_"))
+        self.root = self.temp_dir / "sessions"
+        self.root.mkdir()
+        self.index_path = str(self.temp_dir / "index.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_codex_parses_only_appended_bytes(self):
+        log = self.root / "rollout.jsonl"
+        write_lines(
+            log,
+            [
+                {"type": "turn_context", "payload": {"model": "gpt-5-codex"}},
+                codex_token_count("2025-01-02T12:00:00Z", 1_000_000, 0, 0),
+            ],
+        )
+
+        first = load_log_payload("codex", self.index_path, [self.root])
+        self.assertEqual(first["daily"][0]["modelBreakdowns"][0]["modelName"], "gpt-5-codex")
+        self.assertAlmostEqual(first["daily"][0]["totalCost"], 1.25)
+        offset = load_index(Path(self.index_path))["files"][str(log)]["offset"]
+        self.assertEqual(offset, log.stat().st_size)
+
+        write_lines(log, [codex_token_count("2025-01-02T13:00:00Z", 2_000_000, 0, 0)], mode="a")
+        second = load_log_payload("codex", self.index_path, [self.root])
+
+        self.assertEqual(second["daily"][0]["inputTokens"], 2_000_000)
+        self.assertAlmostEqual(second["daily"][0]["totalCost"], 2.5)
+
+    def test_claude_dedupes_streamed_messages_and_ignores_partial_lines(self):
+        log = self.root / "project" / "session.jsonl"
+        log.parent.mkdir()
+        record = claude_message("2025-01-02T12:00:00Z", "msg_1", "req_1", 10, 20)
+        write_lines(log, [record, record])
+        with open(log, "a", encoding="utf-8") as handle:
+            handle.write('{"type": "assistant"')
+
+        payload = load_log_payload("claude", self.index_path, [self.root])
+
+        self.assertEqual(payload["daily"][0]["inputTokens"], 10)
+        self.assertEqual(payload["daily"][0]["outputTokens"], 20)
+        entry = load_index(Path(self.index_path))["files"][str(log)]
+        self.assertLess(entry["offset"], log.stat().st_size)
+
+    def test_truncated_file_is_reparsed(self):
+        log = self.root / "project.jsonl"
+        write_lines(log, [claude_message("2025-01-02T12:00:00Z", "a", "r", 100, 0)])
+        write_lines(log, [claude_message("2025-01-02T12:00:00Z", "b", "r", 100, 0)], mode="a")
+        load_log_payload("claude", self.index_path, [self.root])
+
+        write_lines(log, [claude_message("2025-01-03T12:00:00Z", "c", "r", 5, 0)])
+        payload = load_log_payload("claude", self.index_path, [self.root])
+
+        self.assertEqual([row["inputTokens"] for row in payload["daily"]], [5])
+
+    def test_backfill_pool_matches_serial_scan(self):
+        claude_root = self.temp_dir / "projects"
+        for number in range(6):
+            write_lines(
+                self.root / f"rollout-{number}.jsonl",
+                [
+                    {"type": "turn_context", "payload": {"model": "gpt-5"}},
+                    codex_token_count(f"2025-01-0{number + 1}T12:00:00Z", 1000 * (number + 1), 0, 10),
+                ],
+            )
+            log = claude_root / f"project-{number % 2}" / f"session-{number}.jsonl"
+            log.parent.mkdir(parents=True, exist_ok=True)
+            write_lines(log, [claude_message("2025-01-02T12:00:00Z", f"m{number}", "r", 10, number)])
+        roots = {"codex": [self.root], "claude": [claude_root]}
+        serial = load_log_payloads(["codex", "claude"], str(self.temp_dir / "serial.json"), roots)
+        updates = []
+
+        pooled = load_log_payloads(["codex", "claude"], self.index_path, roots, 3, updates.append)
+
+        for provider in ("codex", "claude"):
+            self.assertEqual(pooled[provider]["daily"], serial[provider]["daily"])
+        self.assertGreater(len(updates), 1)
+        self.assertEqual((updates[-1]["done"], updates[-1]["total"]), (12, 12))
+        self.assertEqual(len(load_index(Path(self.index_path))["files"]), 12)
+
+        updates.clear()
+        load_log_payloads(["codex", "claude"], self.index_path, roots, 3, updates.append)
+        self.assertEqual(updates, [])
+
+    def test_shard_jobs_balances_bytes_largest_first(self):
+        pending = [((f"f{n}", "codex", None), size) for n, size in enumerate([100, 5, 5, 5, 5, 80])]
+
+        batches = shard_jobs(pending, 2)
+
+        self.assertEqual([[job[0] for job in batch] for batch in batches], [["f0"], ["f5"], ["f1", "f2", "f3", "f4"]])
+
+    def test_project_index_answers_without_rescanning_other_projects(self):
+        alpha = self.root / "-Users-me-src-alpha" / "a.jsonl"
+        beta = self.root / "-Users-me-src-beta" / "b.jsonl"
+        for log in (alpha, beta):
+            log.parent.mkdir()
+        write_lines(alpha, [claude_message("2025-01-02T12:00:00Z", "a1", "r", 1_000_000, 0)])
+        write_lines(beta, [claude_message("2025-01-02T12:00:00Z", "b1", "r", 2_000_000, 0)])
+
+        partials = load_project_partials(self.index_path, [self.root])
+        self.assertEqual(sorted(partials), ["-Users-me-src-alpha", "-Users-me-src-beta"])
+        index = load_index(Path(self.index_path))
+        self.assertEqual(index["projects"]["-Users-me-src-beta"]["files"], [str(beta)])
+        self.assertAlmostEqual(
+            index["projects"]["-Users-me-src-beta"]["daily"]["2025-01-02"]["claude-sonnet-4-20250514"]["cost"], 6.0
+        )
+
+        write_lines(alpha, [claude_message("2025-01-03T12:00:00Z", "a2", "r", 1_000_000, 0)], mode="a")
+        write_lines(beta, [claude_message("2025-01-03T12:00:00Z", "b2", "r", 1_000_000, 0)], mode="a")
+        partials = load_project_partials(self.index_path, [self.root], ["alpha"])
+
+        self.assertEqual(list(partials), ["-Users-me-src-alpha"])
+        self.assertEqual(sorted(partials["-Users-me-src-alpha"]), ["2025-01-02", "2025-01-03"])
+        index = load_index(Path(self.index_path))
+        self.assertLess(index["files"][str(beta)]["offset"], beta.stat().st_size)
+        self.assertEqual(len(index["projects"]), 2)
+
+        beta.unlink()
+        load_project_partials(self.index_path, [self.root])
+        self.assertEqual(list(load_index(Path(self.index_path))["projects"]), ["-Users-me-src-alpha"])
+
+    def test_build_payload_matches_codexbar_shape(self):
+        daily = merge_partials(
+            [
+                {"daily": {"2025-01-01": {"m1": {"cost": 1.0, "inputTokens": 3}}}},
+                {"daily": {"2025-01-01": {"m1": {"cost": 2.0}, "m2": {"cost": 5.0}}}},
+            ]
+        )
+
+        payload = build_payload("claude", daily)
+
+        row = payload["daily"][0]
+        self.assertEqual(row["modelBreakdowns"][0], {"modelName": "m2", "cost": 5.0})
+        self.assertEqual(row["modelBreakdowns"][1], {"modelName": "m1", "cost": 3.0})
+        self.assertEqual(row["inputTokens"], 3)
+        self.assertEqual(payload["totals"]["totalCost"], 8.0)
+
+        later = merge_partials([{"daily": {"2025-01-01": {"m1": {"cost": 1.0}}, "2025-01-03": {"m1": {"cost": 4.0}}}}],
+                               since="2025-01-02")
+        self.assertEqual(later, {"2025-01-03": {"m1": {"cost": 4.0}}})
+
+
+if __name__ == "__main__":
+    main()
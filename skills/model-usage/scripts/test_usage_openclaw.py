@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Tests for the OpenClaw session transcript cost source.
+"""
+
+import io
+import json
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import TestCase, main
+from unittest.mock import patch
+
+import usage_logs
+from model_usage import OPENCLAW_PROVIDER as CLI_PROVIDER
+from model_usage import main as model_usage_main
+from usage_openclaw import OPENCLAW_PROVIDER, discover_sessions, load_openclaw_payload
+
+
+def assistant_message(timestamp, model, cost, input_tokens=100, output=20):
+    return {
+        "type": "message",
+        "timestamp": timestamp,
+        "message": {
+            "role": "assistant",
+            "provider": "anthropic",
+            "model": model,
+            "usage": {
+                "input": input_tokens,
+                "output": output,
+                "cacheRead": 0,
+                "cacheWrite": 0,
+                "totalTokens": input_tokens + output,
+                "cost": {"total": cost},
+            },
+        },
+    }
+
+
+def write_lines(path, records, mode="w"):
+    with open(path, mode, encoding="utf-8") as handle:
+        for record in records:
+            handle.write(json.dumps(record) + "\n")
+
+
+class TestUsageOpenclaw(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp(prefix="test_usage_openclaw_"))
+        self.state_dir = self.temp_dir / "state"
+        self.index_path = str(self.temp_dir / "index.json")
+        self.main_dir = self.add_agent("main", {"agent:main:main": {"sessionId": "s1", "updatedAt": 1}})
+        self.ops_dir = self.add_agent(
+            "ops", {"agent:ops:cron": {"sessionId": "s3", "sessionFile": "custom/s3.jsonl"}}
+        )
+        write_lines(
+            self.main_dir / "s1.jsonl",
+            [
+                {"type": "session", "id": "s1", "timestamp": "2025-01-01T10:00:00Z"},
+                {"type": "message", "timestamp": "2025-01-01T10:00:01Z", "message": {"role": "user"}},
+                assistant_message("2025-01-01T12:00:00Z", "claude-sonnet-4", 0.5),
+                assistant_message("2025-01-02T12:00:00Z", "gpt-5", 0.25),
+            ],
+        )
+        write_lines(
+            self.main_dir / "s0.jsonl.reset.2024-12-31T00-00-00.000Z",
+            [assistant_message("2025-01-01T08:00:00Z", "claude-sonnet-4", 1.0)],
+        )
+        (self.ops_dir / "custom").mkdir()
+        write_lines(
+            self.ops_dir / "custom" / "s3.jsonl",
+            [assistant_message("2025-01-02T12:00:00Z", "claude-sonnet-4", 2.0)],
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def add_agent(self, agent, store):
+        sessions_dir = self.state_dir / "agents" / agent / "sessions"
+        sessions_dir.mkdir(parents=True)
+        (sessions_dir / "sessions.json").write_text(json.dumps(store), encoding="utf-8")
+        return sessions_dir
+
+    def load(self, **kwargs):
+        return load_openclaw_payload(self.index_path, state_dir=self.state_dir, **kwargs)
+
+    def test_discovers_indexed_and_archived_transcripts(self):
+        sessions = [(agent, session, path.name) for agent, session, path in discover_sessions(self.state_dir)]
+        self.assertEqual(
+            sessions,
+            [
+                ("main", "agent:main:main", "s1.jsonl"),
+                ("main", "s0", "s0.jsonl.reset.2024-12-31T00-00-00.000Z"),
+                ("ops", "agent:ops:cron", "s3.jsonl"),
+            ],
+        )
+
+    def test_aggregates_per_agent_session_model_and_day(self):
+        payload = self.load()
+
+        self.assertEqual(payload["provider"], "openclaw")
+        self.assertAlmostEqual(payload["totals"]["totalCost"], 3.75)
+        day_one, day_two = payload["daily"]
+        self.assertEqual(day_one["modelBreakdowns"], [{"modelName": "claude-sonnet-4", "cost": 1.5}])
+        self.assertEqual(
+            day_two["modelBreakdowns"],
+            [{"modelName": "claude-sonnet-4", "cost": 2.0}, {"modelName": "gpt-5", "cost": 0.25}],
+        )
+        self.assertEqual(day_two["inputTokens"], 200)
+        self.assertEqual(
+            [(record["agent"], record["totalCost"], record["sessions"]) for record in payload["agents"]],
+            [("ops", 2.0, 1), ("main", 1.75, 2)],
+        )
+        self.assertEqual(payload["sessions"][0]["session"], "agent:ops:cron")
+        self.assertEqual(payload["sessions"][-1]["models"], ["claude-sonnet-4", "gpt-5"])
+
+        self.assertAlmostEqual(self.load(agents=["main"])["totals"]["totalCost"], 1.75)
+        self.assertAlmostEqual(self.load(sessions=["s1"])["totals"]["totalCost"], 0.75)
+        self.assertEqual(len(json.loads(Path(self.index_path).read_text())["files"]), 3)
+
+    def test_repeated_reports_only_parse_changed_sessions(self):
+        self.load()
+        scan = usage_logs.scan_file
+        parsed = []
+
+        def tracking_scan(path, provider, entry):
+            result = scan(path, provider, entry)
+            if result[1]:
+                parsed.append(path.name)
+            return result
+
+        with patch("usage_logs.scan_file", side_effect=tracking_scan):
+            self.assertAlmostEqual(self.load()["totals"]["totalCost"], 3.75)
+            self.assertEqual(parsed, [])
+            write_lines(
+                self.main_dir / "s1.jsonl",
+                [assistant_message("2025-01-03T12:00:00Z", "gpt-5", 0.1)],
+                mode="a",
+            )
+            self.assertAlmostEqual(self.load()["totals"]["totalCost"], 3.85)
+        self.assertEqual(parsed, ["s1.jsonl"])
+
+    def test_cli_reports_openclaw_source(self):
+        out = io.StringIO()
+        with patch.dict("os.environ", {"OPENCLAW_STATE_DIR": str(self.state_dir)}), redirect_stdout(out):
+            code = model_usage_main(
+                ["--source", "openclaw", "--agent", "ops", "--mode", "all", "--format", "json",
+                 "--log-index", self.index_path]
+            )
+        self.assertEqual(code, 0)
+        data = json.loads(out.getvalue())
+        self.assertEqual(data["provider"], OPENCLAW_PROVIDER)
+        self.assertEqual(data["models"], [{"model": "claude-sonnet-4", "totalCostUSD": 2.0}])
+        self.assertEqual(CLI_PROVIDER, OPENCLAW_PROVIDER)
+
+    def test_cli_groups_by_agent_and_session(self):
+        reports = {}
+        for group in ("agent", "session"):
+            out = io.StringIO()
+            with patch.dict("os.environ", {"OPENCLAW_STATE_DIR": str(self.state_dir)}), redirect_stdout(out):
+                code = model_usage_main(
+                    ["--source", "openclaw", "--group-by", group, "--since", "2025-01-02", "--format", "json",
+                     "--log-index", self.index_path]
+                )
+            self.assertEqual(code, 0)
+            reports[group] = json.loads(out.getvalue())
+
+        self.assertEqual(reports["agent"]["groupBy"], "agent")
+        self.assertEqual(
+            [(bucket["period"], bucket["totalCostUSD"]) for bucket in reports["agent"]["series"]],
+            [("ops", 2.0), ("main", 0.25)],
+        )
+        self.assertEqual(
+            [(bucket["period"], bucket["totalCostUSD"]) for bucket in reports["session"]["series"]],
+            [("ops/agent:ops:cron", 2.0), ("main/agent:main:main", 0.25)],
+        )
+
+
+if __name__ == "__main__":
+    main()
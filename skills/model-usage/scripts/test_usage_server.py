@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Tests for the long-running model_usage server.
+"""
+
+import argparse
+import json
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import TestCase, main
+from unittest.mock import patch
+
+import model_usage
+from usage_server import (
+    PollingWatcher,
+    UsageState,
+    connect,
+    make_server,
+    make_watcher,
+    request_report,
+)
+
+PAYLOAD = [
+    {
+        "provider": "codex",
+        "daily": [{"date": "2025-01-01", "modelBreakdowns": [{"modelName": "a", "cost": 1.0}]}],
+    },
+    {
+        "provider": "claude",
+        "daily": [{"date": "2025-01-01", "modelBreakdowns": [{"modelName": "b", "cost": 2.0}]}],
+    },
+]
+
+
+class TestUsageServer(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp(prefix="test_usage_server_"))
+        self.input_path = self.temp_dir / "cost.json"
+        self.input_path.write_text(json.dumps(PAYLOAD), encoding="utf-8")
+        args = argparse.Namespace(
+            input=str(self.input_path),
+            source="codexbar",
+            log_index=None,
+            timeout=5.0,
+            store_only=False,
+        )
+        self.state = UsageState(args, list(model_usage.PROVIDERS))
+        self.assertTrue(self.state.refresh())
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_report_matches_cli_output(self):
+        code, out, _ = self.state.report({"provider": "claude", "mode": "all", "format": "json"})
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(out), model_usage.build_json_all("claude", {"b": 2.0}))
+
+        code, _, err = self.state.report({"mode": "bogus"})
+        self.assertEqual(code, 2)
+        self.assertIn("Unsupported mode", err)
+
+    def test_client_round_trip_over_unix_socket(self):
+        socket_path = self.temp_dir / "usage.sock"
+        server = make_server(self.state, str(socket_path), "127.0.0.1", None)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            code, out, _ = request_report(
+                f"unix:{socket_path}", {"provider": "all", "mode": "all", "format": "text"}
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(code, 0)
+        self.assertIn("All providers: $3.00", out)
+
+    def test_cli_answers_other_data_sources_locally(self):
+        socket_path = self.temp_dir / "cli.sock"
+        other_path = self.temp_dir / "other.json"
+        other = [
+            {"provider": "codex", "daily": [{"date": "2025-01-02", "modelBreakdowns": [{"modelName": "z", "cost": 9.0}]}]}
+        ]
+        other_path.write_text(json.dumps(other), encoding="utf-8")
+        server = make_server(self.state, str(socket_path), "127.0.0.1", None)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        parser = model_usage.build_parser()
+        try:
+            served = model_usage.run(
+                parser.parse_args(["--mode", "all", "--format", "json", "--server", f"unix:{socket_path}"])
+            )
+            local = model_usage.run(
+                parser.parse_args(
+                    ["--mode", "all", "--format", "json", "--server", f"unix:{socket_path}", "--input", str(other_path)]
+                )
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(json.loads(served[1]), model_usage.build_json_all("codex", {"a": 1.0}))
+        self.assertEqual(json.loads(local[1]), model_usage.build_json_all("codex", {"z": 9.0}))
+        self.assertTrue(model_usage.uses_own_data(parser.parse_args(["--source", "logs"])))
+        self.assertTrue(model_usage.uses_own_data(parser.parse_args(["--cache-ttl", "30"])))
+        self.assertFalse(model_usage.uses_own_data(parser.parse_args(["--days", "7", "--top", "3"])))
+
+    def test_cli_falls_back_for_unloaded_providers_and_bad_responses(self):
+        codex_only = UsageState(self.state.args, ["codex"])
+        self.assertTrue(codex_only.refresh())
+        socket_path = self.temp_dir / "codex.sock"
+        server = make_server(codex_only, str(socket_path), "127.0.0.1", None)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        garbage_path = self.temp_dir / "garbage.sock"
+        garbage = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        garbage.bind(str(garbage_path))
+        garbage.listen(1)
+
+        def answer_garbage():
+            conn, _ = garbage.accept()
+            conn.recv(65536)
+            conn.sendall(b"not http\r\n\r\n")
+            conn.close()
+
+        threading.Thread(target=answer_garbage, daemon=True).start()
+        parser = model_usage.build_parser()
+        argv = ["--provider", "claude", "--mode", "all", "--format", "json", "--server"]
+        try:
+            with patch.object(model_usage, "run_codexbar_cost", return_value=PAYLOAD):
+                unloaded = model_usage.run(parser.parse_args(argv + [f"unix:{socket_path}"]))
+                bad_status = model_usage.run(parser.parse_args(argv + [f"unix:{garbage_path}"]))
+        finally:
+            server.shutdown()
+            server.server_close()
+            garbage.close()
+
+        for result in (unloaded, bad_status):
+            self.assertEqual(result[0], 0)
+            self.assertEqual(json.loads(result[1]), model_usage.build_json_all("claude", {"b": 2.0}))
+
+    def test_make_server_only_replaces_dead_sockets(self):
+        regular = self.temp_dir / "regular.sock"
+        regular.write_text("keep", encoding="utf-8")
+        with self.assertRaises(FileExistsError):
+            make_server(self.state, str(regular), "127.0.0.1", None)
+        self.assertEqual(regular.read_text(encoding="utf-8"), "keep")
+
+        socket_path = self.temp_dir / "live.sock"
+        live = make_server(self.state, str(socket_path), "127.0.0.1", None)
+        try:
+            with self.assertRaises(FileExistsError):
+                make_server(self.state, str(socket_path), "127.0.0.1", None)
+        finally:
+            live.server_close()
+        # The closed server left its socket file behind; nothing listens on it now.
+        replacement = make_server(self.state, str(socket_path), "127.0.0.1", None)
+        replacement.server_close()
+
+    def test_metrics_endpoint_serves_openmetrics(self):
+        socket_path = self.temp_dir / "metrics.sock"
+        server = make_server(self.state, str(socket_path), "127.0.0.1", None)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            conn = connect(f"unix:{socket_path}", 5.0)
+            conn.request("GET", "/metrics")
+            response = conn.getresponse()
+            body = response.read().decode("utf-8")
+            conn.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.getheader("Content-Type"), model_usage.OPENMETRICS_CONTENT_TYPE)
+        self.assertIn('model_usage_cost_usd_total{provider="claude",model="b"} 2.0', body)
+        self.assertIn('model_usage_current_model_info{provider="codex",model="a"} 1', body)
+        self.assertTrue(body.endswith("# EOF\n"))
+
+    def test_watchers_detect_input_changes(self):
+        factories = (
+            lambda: make_watcher([self.input_path]),
+            lambda: PollingWatcher([self.input_path], 0.01),
+        )
+        for index, factory in enumerate(factories):
+            watcher = factory()
+            self.assertFalse(watcher.wait(0.05))
+            time.sleep(0.01)
+            self.input_path.write_text(json.dumps(PAYLOAD[:index]), encoding="utf-8")
+            self.assertTrue(watcher.wait(1.0))
+            watcher.close()
+
+
+if __name__ == "__main__":
+    main()
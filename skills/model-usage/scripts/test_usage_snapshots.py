@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for merging multiple codexbar cost snapshots.
+"""
+
+import io
+import json
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import TestCase, main
+
+import model_usage
+from usage_snapshots import expand_inputs, load_snapshot_payloads
+
+
+def snapshot(provider, updated_at, daily, host=None):
+    payload = {"provider": provider, "updatedAt": updated_at, "daily": daily}
+    if host:
+        payload["host"] = host
+    return payload
+
+
+def day(date, model, cost, tokens=0):
+    return {
+        "date": date,
+        "totalTokens": tokens,
+        "modelBreakdowns": [{"modelName": model, "cost": cost}],
+        "modelsUsed": [model],
+    }
+
+
+class TestUsageSnapshots(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp(prefix="test_usage_snapshots_"))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name, data):
+        path = self.temp_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data), encoding="utf-8")
+        return path
+
+    def test_newest_snapshot_wins_per_host_and_days_sum_across_hosts(self):
+        self.write("a/old.json", [snapshot("codex", "2025-01-02T00:00:00Z", [day("2025-01-01", "m", 1.0, 10)], "a")])
+        self.write("a/new.json", [snapshot("codex", "2025-01-03T00:00:00Z", [day("2025-01-01", "m", 2.0, 20)], "a")])
+        self.write("b.json", [snapshot("codex", "2025-01-01T00:00:00Z", [day("2025-01-01", "n", 4.0, 40)])])
+        self.write("notes.txt", "ignored")
+
+        payloads, errors = load_snapshot_payloads([str(self.temp_dir)])
+
+        self.assertEqual(errors, [])
+        payload = payloads["codex"]
+        self.assertEqual(payload["hosts"], ["a", "b"])
+        self.assertEqual(payload["updatedAt"], "2025-01-03T00:00:00Z")
+        (merged,) = payload["daily"]
+        self.assertEqual(merged["totalTokens"], 60)
+        self.assertEqual(
+            merged["modelBreakdowns"],
+            [{"modelName": "m", "cost": 2.0}, {"modelName": "n", "cost": 4.0}],
+        )
+
+    def test_parallel_parse_matches_serial_and_reports_bad_files(self):
+        for index in range(6):
+            self.write(f"host{index}.json", [snapshot("claude", "2025-01-01", [day("2025-01-01", "m", 1.0)])])
+        (self.temp_dir / "broken.json").write_text("{", encoding="utf-8")
+
+        pattern = str(self.temp_dir / "*.json")
+        serial, serial_errors = load_snapshot_payloads([pattern], workers=1)
+        parallel, parallel_errors = load_snapshot_payloads([pattern], workers=2)
+
+        self.assertEqual(serial, parallel)
+        self.assertEqual(len(parallel_errors), 1)
+        self.assertEqual(parallel["claude"]["daily"][0]["modelBreakdowns"][0]["cost"], 6.0)
+        self.assertEqual(len(expand_inputs([pattern, str(self.temp_dir)])), 7)
+
+    def test_cli_merges_multiple_inputs(self):
+        first = self.write("h1.json", [snapshot("codex", "2025-01-01", [day("2025-01-01", "m", 1.5)])])
+        second = self.write("h2.json", [snapshot("codex", "2025-01-01", [day("2025-01-02", "m", 2.5)])])
+        out = io.StringIO()
+        with redirect_stdout(out):
+            code = model_usage.main(
+                ["--mode", "all", "--input", str(first), str(second), "--format", "json"]
+            )
+
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(out.getvalue())["models"], [{"model": "m", "totalCostUSD": 4.0}])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite cost history store.
+"""
+
+import shutil
+import sqlite3
+import tempfile
+from datetime import date
+from pathlib import Path
+from unittest import TestCase, main
+
+from model_usage import DailyIndex, aggregate_costs, latest_day_cost, pick_current_model
+from usage_store import UsageStore
+
+ENTRIES = [
+    {
+        "date": "2025-01-01",
+        "modelBreakdowns": [{"modelName": "a", "cost": 1.0}, {"modelName": "b", "cost": 3.0}],
+    },
+    {"date": "2025-01-02", "modelBreakdowns": [{"modelName": "a", "cost": 2.0}]},
+    {"date": "2025-01-03", "modelsUsed": ["c"]},
+    {"date": "not-a-date", "modelBreakdowns": [{"modelName": "a", "cost": 100.0}]},
+]
+
+
+class TestUsageStore(TestCase):
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp(prefix="test_usage_store_"))
+        self.store = UsageStore(str(self.temp_dir / "usage.db"))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_queries_match_in_memory_aggregation(self):
+        valid = ENTRIES[:3]
+        self.store.ingest("codex", ENTRIES, "2025-01-03T00:00:00Z")
+
+        self.assertEqual(self.store.model_totals("codex"), aggregate_costs(valid))
+        self.assertEqual(self.store.current_model("codex"), pick_current_model(valid))
+        self.assertEqual(self.store.latest_day_cost("codex", "a"), latest_day_cost(valid, "a"))
+        self.assertEqual(self.store.day_count("codex"), 3)
+        self.assertEqual(self.store.model_totals("codex", "2025-01-02"), {"a": 2.0})
+
+    def test_range_view_matches_daily_index(self):
+        self.store.ingest("codex", ENTRIES, "2025-01-03T00:00:00Z")
+        view = self.store.view("codex")
+        index = DailyIndex.from_entries(ENTRIES[:3])
+        since, until = date(2025, 1, 1), date(2025, 1, 1)
+
+        self.assertEqual(view.model_totals(since, until), index.model_totals(since, until))
+        self.assertEqual(view.current_model(since, until), index.current_model(since, until))
+        self.assertEqual(view.latest_day_cost("a", None, until), index.latest_day_cost("a", None, until))
+        self.assertEqual(list(view.daily_costs(since)), list(index.daily_costs(since)))
+
+    def test_token_totals_and_v1_migration(self):
+        self.store.close()
+        path = self.temp_dir / "v1.db"
+        conn = sqlite3.connect(str(path))
+        conn.execute(
+            "CREATE TABLE days (provider TEXT NOT NULL, date TEXT NOT NULL, updated_at TEXT, "
+            "fingerprint TEXT NOT NULL, models_used TEXT NOT NULL, has_costs INTEGER NOT NULL, "
+            "PRIMARY KEY (provider, date)) WITHOUT ROWID"
+        )
+        conn.close()
+        self.store = UsageStore(str(path))
+        entry = {"date": "2025-01-01", "inputTokens": 10, "outputTokens": 5, "totalCost": 0.25}
+
+        self.store.ingest("codex", [entry])
+        totals = self.store.view("codex").token_totals()
+
+        self.assertEqual(totals["days"], 1)
+        self.assertEqual(totals["totalTokens"], 15)
+        self.assertEqual(totals["totalCost"], 0.25)
+        self.assertEqual(totals, DailyIndex.from_entries([entry]).token_totals())
+
+    def test_ingest_is_idempotent_and_keeps_history(self):
+        self.assertEqual(self.store.ingest("codex", ENTRIES, "2025-01-03T00:00:00Z"), 3)
+        self.assertEqual(self.store.ingest("codex", ENTRIES, "2025-01-03T00:00:00Z"), 0)
+
+        newer = [{"date": "2025-01-02", "modelBreakdowns": [{"modelName": "a", "cost": 5.0}]}]
+        self.assertEqual(self.store.ingest("codex", newer, "2025-01-04T00:00:00Z"), 1)
+
+        self.assertEqual(self.store.model_totals("codex"), {"a": 6.0, "b": 3.0})
+
+    def test_older_snapshot_does_not_overwrite_newer_day(self):
+        self.store.ingest("codex", ENTRIES[1:2], "2025-01-04T00:00:00Z")
+        stale = [{"date": "2025-01-02", "modelBreakdowns": [{"modelName": "a", "cost": 0.5}]}]
+
+        self.assertEqual(self.store.ingest("codex", stale, "2025-01-02T00:00:00Z"), 0)
+        self.assertEqual(self.store.model_totals("codex"), {"a": 2.0})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming codexbar JSON decoder.
+"""
+
+import io
+import json
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import TestCase, main, skipUnless
+from unittest.mock import patch
+
+import model_usage
+import usage_stream
+from model_usage import DailyIndex, load_streamed_views, parse_daily_entries
+from usage_stream import chunked_events
+
+PAYLOADS = [
+    {
+        "daily": [
+            {"date": "2025-01-01", "modelBreakdowns": [{"modelName": "a", "cost": 1.25}]},
+            "not-an-entry",
+            {"date": "2025-01-02", "totalTokens": 123456789, "modelsUsed": ["b"]},
+        ],
+        "provider": "codex",
+        "totals": {"nested": [1, 2, {"x": "y"}]},
+        "updatedAt": "2025-01-02T00:00:00Z",
+    },
+    {"provider": "claude", "daily": []},
+    {"provider": "other", "daily": [{"date": "2025-01-03"}]},
+]
+
+
+def collect(meta, entries):
+    return list(entries)
+
+
+class TestUsageStream(TestCase):
+    def test_chunked_events_survive_any_chunk_boundary(self):
+        text = json.dumps(PAYLOADS, indent=1)
+        expected = list(chunked_events(io.StringIO(text), chunk_size=len(text)))
+        for chunk_size in (1, 3, 7, 64):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(list(chunked_events(io.StringIO(text), chunk_size)), expected)
+        entries = [event[2] for event in expected if event[0] == "entry"]
+        self.assertEqual(entries, parse_daily_entries(PAYLOADS[0]) + [{"date": "2025-01-03"}])
+        self.assertIn(("key", "updatedAt", "2025-01-02T00:00:00Z"), expected)
+
+    def test_stream_payloads_reports_meta_after_daily(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "cost.json"
+            path.write_text(json.dumps(PAYLOADS), encoding="utf-8")
+            with patch.object(usage_stream, "ijson", None):
+                streamed, is_array = usage_stream.stream_payloads(str(path), collect, chunk_size=5)
+                views, errors = load_streamed_views(str(path), ["codex", "claude"])
+
+        self.assertTrue(is_array)
+        self.assertEqual([meta.get("provider") for meta, _ in streamed], ["codex", "claude", "other"])
+        self.assertEqual(len(streamed[0][1]), 2)
+        self.assertEqual(errors, {})
+        expected = DailyIndex.from_entries(parse_daily_entries(PAYLOADS[0]))
+        self.assertEqual(views["codex"].model_totals(), expected.model_totals())
+        self.assertEqual(views["codex"].token_totals(), expected.token_totals())
+        self.assertEqual(views["claude"].count(), 0)
+
+    def test_streamed_rows_spool_payloads_until_provider_is_known(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "cost.json"
+            path.write_text(json.dumps(PAYLOADS), encoding="utf-8")
+            argv = ["--provider", "all", "--mode", "rows", "--format", "ndjson", "--input", str(path)]
+            outputs = []
+            for extra in ([], ["--stream"]):
+                out = io.StringIO()
+                with redirect_stdout(out):
+                    self.assertEqual(model_usage.main(argv + extra), 0)
+                outputs.append([json.loads(line) for line in out.getvalue().splitlines()])
+
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual([record["model"] for record in outputs[1]], ["a", None])
+        self.assertEqual({record["provider"] for record in outputs[1]}, {"codex"})
+
+    @skipUnless(usage_stream.ijson, "ijson not installed")
+    def test_ijson_events_match_chunked_events(self):
+        text = json.dumps(PAYLOADS)
+        self.assertEqual(
+            list(usage_stream.ijson_events(io.BytesIO(text.encode("utf-8")))),
+            list(chunked_events(io.StringIO(text))),
+        )
+
+    def test_single_object_and_malformed_input(self):
+        with patch.object(usage_stream, "ijson", None):
+            events = list(chunked_events(io.StringIO('{"daily": [{"date": "2025-01-01"}]}'), 4))
+            self.assertEqual(events[0], ("start", None, False))
+            self.assertEqual(events[-1], ("end", None, None))
+            with self.assertRaises(ValueError):
+                list(chunked_events(io.StringIO('[{"daily": [{"date": "2025-01-01"}'), 4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the Space-Saving heavy-hitter summary behind --top.
+"""
+
+import json
+import random
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main
+
+from model_usage import DailyIndex, aggregate_costs, build_parser, exact_top_summary, run
+from usage_topk import SpaceSaving
+
+
+class TestSpaceSaving(TestCase):
+    def test_index_top_is_exact(self):
+        entries = [
+            {"date": "2025-01-01", "modelBreakdowns": [{"modelName": "a", "cost": 1.0}, {"modelName": "b", "cost": 3.0}]},
+            {"date": "2025-01-02", "modelBreakdowns": [{"modelName": "a", "cost": 2.5}, {"modelName": "c", "cost": "n/a"}]},
+        ]
+        summary = exact_top_summary("codex", DailyIndex.from_entries(entries).model_totals(), 1)
+
+        self.assertTrue(summary["exact"])
+        self.assertEqual(summary["models"], [{"model": "a", "totalCostUSD": 3.5, "maxErrorUSD": 0.0}])
+        self.assertEqual(summary["otherCostUSD"], 3.0)
+        self.assertEqual(summary["totalCostUSD"], sum(aggregate_costs(entries).values()))
+
+    def test_bounded_memory_and_error_guarantees(self):
+        rng = random.Random(3)
+        truth = {}
+        sketch = SpaceSaving(20)
+        for _ in range(20000):
+            key = "heavy" if rng.random() < 0.2 else f"tail-{rng.randrange(5000)}"
+            cost = rng.uniform(0.0, 2.0)
+            truth[key] = truth.get(key, 0.0) + cost
+            sketch.add(key, cost)
+
+        self.assertEqual(len(sketch.counts), 20)
+        self.assertEqual(len(sketch.heap), 20)
+        self.assertFalse(sketch.exact)
+        self.assertAlmostEqual(sketch.total, sum(truth.values()), places=6)
+        (key, estimate, error), *_ = sketch.top(3)
+        self.assertEqual(key, "heavy")
+        for key, estimate, error in sketch.top(20):
+            self.assertLessEqual(estimate - error, truth[key] + 1e-9)
+            self.assertGreaterEqual(estimate, truth[key] - 1e-9)
+            self.assertLessEqual(error, sketch.error_bound + 1e-9)
+
+    def test_stream_top_uses_a_sketch_per_payload(self):
+        rng = random.Random(5)
+        daily = [
+            {
+                "date": f"2025-01-{day:02d}",
+                "modelBreakdowns": [{"modelName": "heavy", "cost": 50.0}]
+                + [{"modelName": f"tail-{rng.randrange(400)}", "cost": 0.5} for _ in range(40)],
+            }
+            for day in range(1, 29)
+        ]
+        payload = [
+            {"provider": "codex", "daily": daily},
+            {"provider": "claude", "daily": [{"date": "2025-01-01", "modelBreakdowns": [{"modelName": "b", "cost": 500.0}]}]},
+        ]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "cost.json"
+            path.write_text(json.dumps(payload), encoding="utf-8")
+            base = ["--input", str(path), "--mode", "all", "--top", "2", "--format", "json"]
+            code, out, _ = run(build_parser().parse_args(base + ["--stream"]))
+            _, exact_out, _ = run(build_parser().parse_args(base))
+            code_all, out_all, _ = run(build_parser().parse_args(base + ["--stream", "--provider", "all"]))
+
+        self.assertEqual(code, 0)
+        streamed, exact = json.loads(out), json.loads(exact_out)
+        self.assertFalse(streamed["exact"])
+        self.assertTrue(exact["exact"])
+        self.assertEqual(streamed["models"][0]["model"], "heavy")
+        self.assertEqual(streamed["models"][0], exact["models"][0])
+        self.assertAlmostEqual(streamed["totalCostUSD"], exact["totalCostUSD"])
+        self.assertEqual(code_all, 0)
+        combined = json.loads(out_all)
+        self.assertEqual(
+            [(item["provider"], item["model"]) for item in combined["models"]][:2],
+            [("codex", "heavy"), ("claude", "b")],
+        )
+        self.assertEqual([section["provider"] for section in combined["providers"]], ["codex", "claude"])
+
+
+if __name__ == "__main__":
+    main()
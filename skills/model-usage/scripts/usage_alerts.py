@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Incremental spend anomaly and budget alerts (`model_usage.py watch`).
+
+A small JSON state file keeps per-model EWMA mean/variance of daily cost, a
+monthly budget accumulator and a cursor per provider (the last finished day
+already folded in). Each run reads only rows after the cursor: finished days
+update the running state, today's partial row is checked but not folded in.
+The cursors are passed down to the source: --store-only queries and the log
+index payloads (--source logs/openclaw) only cover days after the cursor, so
+work per run is O(new rows) plus the incremental log rescan. A codexbar fetch
+still returns the whole history; older days are dropped before indexing or
+ingesting. The first run only warms up the state and prints nothing. Alerts go
+to stdout as JSON lines, each one at most once.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import model_usage
+from usage_store import UsageStore
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; overlapping runs are then unserialized
+    fcntl = None
+
+DEFAULT_STATE_PATH = "~/.cache/openclaw/model-usage/alert-state.json"
+STATE_VERSION = 1
+DEFAULT_ALPHA = 0.2
+DEFAULT_Z_THRESHOLD = 3.0
+DEFAULT_MIN_DAYS = 7
+
+Alert = Dict[str, Any]
+
+
+def new_state() -> Dict[str, Any]:
+    return {"version": STATE_VERSION, "cursors": {}, "models": {}, "month": None, "alerted": {}}
+
+
+def load_state(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            state = json.load(handle)
+    except (OSError, ValueError):
+        return new_state()
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+        return new_state()
+    return state
+
+
+def save_state(path: Path, state: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(state, handle, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+@contextmanager
+def state_lock(path: Path) -> Iterator[bool]:
+    """Hold the state file lock; yields False when another run already holds it."""
+    if fcntl is None:
+        yield True
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+class AlertEngine:
+    def __init__(
+        self,
+        state: Dict[str, Any],
+        alpha: float = DEFAULT_ALPHA,
+        z_threshold: float = DEFAULT_Z_THRESHOLD,
+        min_days: int = DEFAULT_MIN_DAYS,
+        daily_budget: Optional[float] = None,
+        monthly_budget: Optional[float] = None,
+    ) -> None:
+        self.state = state
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.min_days = min_days
+        self.daily_budget = daily_budget
+        self.monthly_budget = monthly_budget
+        self.alerts: List[Alert] = []
+
+    def emit(self, key: str, day: str, alert: Alert, quiet: bool = False) -> None:
+        """Record `key` as alerted; `quiet` keeps the alert itself from being reported."""
+        alerted = self.state["alerted"]
+        if key in alerted:
+            return
+        alerted[key] = day
+        if not quiet:
+            self.alerts.append(alert)
+
+    def check_spike(self, provider: str, model: str, day: str, cost: float, partial: bool) -> None:
+        stats = self.state["models"].get(f"{provider}/{model}")
+        if stats is None or stats["n"] < self.min_days or stats["var"] <= 0:
+            return
+        stddev = math.sqrt(stats["var"])
+        z_score = (cost - stats["mean"]) / stddev
+        if z_score < self.z_threshold:
+            return
+        self.emit(
+            f"spike:{provider}/{model}:{day}",
+            day,
+            {
+                "type": "spike",
+                "provider": provider,
+                "model": model,
+                "date": day,
+                "costUSD": cost,
+                "meanUSD": stats["mean"],
+                "stddevUSD": stddev,
+                "zScore": round(z_score, 3),
+                "partial": partial,
+            },
+        )
+
+    def update_model(self, provider: str, model: str, cost: float) -> None:
+        stats = self.state["models"].get(f"{provider}/{model}")
+        if stats is None:
+            self.state["models"][f"{provider}/{model}"] = {"mean": cost, "var": 0.0, "n": 1}
+            return
+        diff = cost - stats["mean"]
+        increment = self.alpha * diff
+        stats["mean"] += increment
+        stats["var"] = (1 - self.alpha) * (stats["var"] + diff * increment)
+        stats["n"] += 1
+
+    def add_to_month(self, day: str, cost: float) -> None:
+        month = self.state["month"]
+        if month is None or day[:7] > month["key"]:
+            month = self.state["month"] = {"key": day[:7], "costUSD": 0.0}
+        if day[:7] == month["key"]:
+            month["costUSD"] += cost
+
+    def check_budget(
+        self, scope: str, period: str, day: str, cost: float, partial: bool, quiet: bool = False
+    ) -> None:
+        budget = self.daily_budget if scope == "day" else self.monthly_budget
+        if budget is None or cost <= budget:
+            return
+        key = "date" if scope == "day" else "month"
+        self.emit(
+            f"budget:{scope}:{period}",
+            day,
+            {"type": "budget", "scope": scope, key: period, "costUSD": cost, "budgetUSD": budget, "partial": partial},
+            quiet,
+        )
+
+    def process(self, views: Dict[str, Any], today: date) -> List[Alert]:
+        """Fold new finished days into the state and check them plus today's partial row.
+
+        A provider without a cursor is seen for the first time: its history
+        only warms up the state and raises no alerts. On the very first run
+        (no cursors at all) today's and this month's budgets are checked
+        quietly too: periods already over budget are recorded as alerted.
+        """
+        today_ordinal = today.toordinal()
+        cursors = self.state["cursors"]
+        first_run = not cursors
+        finished: Dict[int, float] = {}
+        partial: Dict[int, float] = {}
+        for provider, view in views.items():
+            cursor = cursors.get(provider)
+            since = date.fromisoformat(cursor) + timedelta(days=1) if cursor else None
+            warm_up = cursor is None
+            for ordinal, models in group_days(view.daily_costs(since, None)):
+                day = date.fromordinal(ordinal).isoformat()
+                total = sum(models.values())
+                is_partial = ordinal >= today_ordinal
+                for model, cost in models.items():
+                    if not warm_up:
+                        self.check_spike(provider, model, day, cost, is_partial)
+                    if not is_partial:
+                        self.update_model(provider, model, cost)
+                if is_partial:
+                    partial[ordinal] = partial.get(ordinal, 0.0) + total
+                    continue
+                self.add_to_month(day, total)
+                cursors[provider] = day
+                if not warm_up:
+                    finished[ordinal] = finished.get(ordinal, 0.0) + total
+
+        for ordinal in sorted(finished):
+            day = date.fromordinal(ordinal).isoformat()
+            self.check_budget("day", day, day, finished[ordinal], False)
+        today_key = today.isoformat()
+        today_cost = partial.get(today_ordinal, 0.0)
+        self.check_budget("day", today_key, today_key, today_cost, True, first_run)
+        month = self.state["month"]
+        month_cost = today_cost + (month["costUSD"] if month and month["key"] == today_key[:7] else 0.0)
+        self.check_budget("month", today_key[:7], today_key, month_cost, True, first_run)
+        self.prune(today)
+        return self.alerts
+
+    def prune(self, today: date) -> None:
+        """Forget alert keys older than the previous month; they can no longer fire."""
+        horizon = (today.replace(day=1) - timedelta(days=1)).replace(day=1).isoformat()
+        alerted = self.state["alerted"]
+        for key in [key for key, day in alerted.items() if day < horizon]:
+            del alerted[key]
+
+
+def group_days(rows: Iterator[Tuple[int, str, float]]) -> Iterator[Tuple[int, Dict[str, float]]]:
+    """Group date-ordered (ordinal, model, cost) rows into (ordinal, {model: cost})."""
+    current: Optional[int] = None
+    models: Dict[str, float] = {}
+    for ordinal, model, cost in rows:
+        if ordinal < 1:
+            continue
+        if ordinal != current:
+            if current is not None:
+                yield current, models
+            current, models = ordinal, {}
+        models[model] = models.get(model, 0.0) + cost
+    if current is not None:
+        yield current, models
+
+
+def build_watch_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="model_usage.py watch",
+        description="Emit JSON-line alerts for cost spikes (EWMA z-score) and budget overruns, "
+        "processing only rows added since the previous run.",
+    )
+    parser.add_argument("--provider", choices=["codex", "claude", "all"], default="all")
+    parser.add_argument("--input", nargs="+", action="extend", metavar="PATH")
+    parser.add_argument("--source", choices=["codexbar", "logs", model_usage.OPENCLAW_PROVIDER], default="codexbar")
+    parser.add_argument("--log-index", help="Incremental index file for --source logs/openclaw.")
+    parser.add_argument("--store", help="SQLite history store to ingest into and read from.")
+    parser.add_argument("--timeout", type=float, default=model_usage.DEFAULT_FETCH_TIMEOUT)
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=os.environ.get("MODEL_USAGE_CACHE_TTL", "0"),
+        help="Share codexbar output between callers for this many seconds. Env: MODEL_USAGE_CACHE_TTL.",
+    )
+    parser.add_argument("--cache-dir")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help=f"Alert state file (default: {DEFAULT_STATE_PATH}).")
+    parser.add_argument("--daily-budget", type=float, metavar="USD", help="Alert when a day's total cost exceeds this.")
+    parser.add_argument("--monthly-budget", type=float, metavar="USD", help="Alert when the month's total cost exceeds this.")
+    parser.add_argument(
+        "--z-threshold",
+        type=float,
+        default=DEFAULT_Z_THRESHOLD,
+        help=f"Alert when a model's daily cost is this many EWMA standard deviations above its mean "
+        f"(default: {DEFAULT_Z_THRESHOLD:g}).",
+    )
+    parser.add_argument(
+        "--alpha",
+        type=float,
+        default=DEFAULT_ALPHA,
+        help=f"EWMA smoothing factor in (0, 1] (default: {DEFAULT_ALPHA:g}).",
+    )
+    parser.add_argument(
+        "--min-days",
+        type=model_usage.positive_int,
+        default=DEFAULT_MIN_DAYS,
+        help=f"Days of history a model needs before spike alerts (default: {DEFAULT_MIN_DAYS}).",
+    )
+    return parser
+
+
+def watch_main(argv: Optional[List[str]] = None, today: Optional[date] = None) -> int:
+    parser = build_watch_parser()
+    args = parser.parse_args(argv)
+    if not 0 < args.alpha <= 1:
+        parser.error("--alpha must be in (0, 1]")
+    for key, value in vars(model_usage.build_parser().parse_args([])).items():
+        if not hasattr(args, key):
+            setattr(args, key, value)
+    if args.source == model_usage.OPENCLAW_PROVIDER:
+        args.provider = model_usage.OPENCLAW_PROVIDER
+    providers = list(model_usage.PROVIDERS) if args.provider == "all" else [args.provider]
+
+    state_path = Path(args.state).expanduser()
+    with state_lock(state_path) as acquired:
+        if not acquired:
+            return 0
+        state = load_state(state_path)
+        since = {
+            provider: date.fromisoformat(cursor) + timedelta(days=1)
+            for provider, cursor in state["cursors"].items()
+            if provider in providers
+        }
+        store = None
+        try:
+            if args.store:
+                store = UsageStore(args.store)
+            views = model_usage.load_views(args, providers, store, since)
+        except Exception as exc:
+            model_usage.eprint(str(exc))
+            return 1
+        engine = AlertEngine(
+            state,
+            args.alpha,
+            args.z_threshold,
+            args.min_days,
+            args.daily_budget,
+            args.monthly_budget,
+        )
+        alerts = engine.process(views, today or date.today())
+        try:
+            save_state(state_path, engine.state)
+        except OSError as exc:
+            model_usage.eprint(f"Failed to write alert state: {exc}")
+            return 1
+    for alert in alerts:
+        sys.stdout.write(json.dumps(alert, sort_keys=True) + "\n")
+    sys.stdout.flush()
+    return 0
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Shared on-disk TTL cache for `codexbar cost` output with stale-while-revalidate.
+
+Fresh entries are returned as-is. Stale entries are returned immediately while
+a detached process refreshes them; a per-key file lock guarantees only one
+refresh runs at a time, even across unrelated callers on the same host. The
+caller that spawns a refresher first creates a "refreshing" marker file, so
+other stale reads skip the spawn until the refresh finishes.
+
+Usage (background refresher, spawned automatically):
+    usage_cache.py <codex|claude|all> --cache-dir DIR --ttl SECONDS [--timeout SECONDS]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; refreshes are then unserialized
+    fcntl = None
+
+DEFAULT_CACHE_DIR = "~/.cache/openclaw/model-usage/codexbar"
+# Entries older than ttl * MAX_STALE_FACTOR are refetched synchronously instead of served.
+MAX_STALE_FACTOR = 10
+ALL_KEY = "all"
+# A refreshing marker older than the fetch timeout plus this is left over from a
+# refresher that died, and no longer stops a new spawn.
+REFRESH_MARKER_GRACE = 60.0
+
+Fetch = Callable[[], List[Any]]
+
+
+class CodexbarCache:
+    def __init__(
+        self, directory: Optional[str], ttl: float, timeout: Optional[float] = None
+    ) -> None:
+        self.directory = Path(directory or DEFAULT_CACHE_DIR).expanduser()
+        self.ttl = ttl
+        self.timeout = timeout
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"cost-{key}.json"
+
+    def marker(self, key: str) -> Path:
+        return self.directory / f"cost-{key}.refreshing"
+
+    def read(self, key: str) -> Optional[Tuple[List[Any], float]]:
+        """Return (payload, age in seconds) or None when missing or unreadable."""
+        try:
+            with open(self.path(key), "r", encoding="utf-8") as handle:
+                entry = json.load(handle)
+            fetched_at = float(entry["fetchedAt"])
+            payload = entry["payload"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if not isinstance(payload, list):
+            return None
+        return payload, max(0.0, time.time() - fetched_at)
+
+    def write(self, key: str, payload: List[Any]) -> None:
+        import tempfile
+
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump({"fetchedAt": time.time(), "payload": payload}, handle, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @contextmanager
+    def lock(self, key: str, blocking: bool = True) -> Iterator[bool]:
+        """Hold the per-key refresh lock; yields False if non-blocking and already held."""
+        if fcntl is None:
+            yield True
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / f"cost-{key}.lock", "a") as handle:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def get(self, key: str, fetch: Fetch) -> List[Any]:
+        """Return the cached payload for `key`, fetching or revalidating as needed."""
+        cached = self.read(key)
+        if cached is not None:
+            payload, age = cached
+            if age < self.ttl:
+                return payload
+            if age < self.ttl * MAX_STALE_FACTOR:
+                if self.claim_refresh(key):
+                    self.spawn_refresh(key)
+                return payload
+        with self.lock(key):
+            # Another caller may have refreshed while we waited for the lock.
+            cached = self.read(key)
+            if cached is not None and cached[1] < self.ttl:
+                return cached[0]
+            payload = fetch()
+            self.write(key, payload)
+            return payload
+
+    def refresh(self, key: str, fetch: Fetch) -> bool:
+        """Refetch `key` unless another refresh holds the lock or it is already fresh."""
+        try:
+            with self.lock(key, blocking=False) as acquired:
+                if not acquired:
+                    return False
+                cached = self.read(key)
+                if cached is not None and cached[1] < self.ttl:
+                    return False
+                self.write(key, fetch())
+                return True
+        finally:
+            self.release_refresh(key)
+
+    def claim_refresh(self, key: str) -> bool:
+        """Create the refreshing marker; False while another caller's marker is still live."""
+        path = self.marker(key)
+        for _ in range(2):
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    age = time.time() - path.stat().st_mtime
+                except OSError:
+                    return False
+                if age < (self.timeout or 0.0) + REFRESH_MARKER_GRACE:
+                    return False
+                self.release_refresh(key)
+            except OSError:
+                return False
+        return False
+
+    def release_refresh(self, key: str) -> None:
+        try:
+            os.unlink(self.marker(key))
+        except OSError:
+            pass
+
+    def spawn_refresh(self, key: str) -> None:
+        """Start a detached refresher so this caller can return the stale value at once."""
+        cmd = [sys.executable, str(Path(__file__).resolve()), key]
+        cmd += ["--cache-dir", str(self.directory), "--ttl", repr(self.ttl)]
+        if self.timeout is not None:
+            cmd += ["--timeout", repr(self.timeout)]
+        try:
+            subprocess.Popen(
+                cmd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+        except OSError:
+            self.release_refresh(key)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Refresh one cached codexbar cost payload.")
+    parser.add_argument("key", choices=["codex", "claude", ALL_KEY])
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--ttl", type=float, required=True)
+    parser.add_argument("--timeout", type=float)
+    args = parser.parse_args(argv)
+
+    from model_usage import run_codexbar_cost
+
+    provider = None if args.key == ALL_KEY else args.key
+    cache = CodexbarCache(args.cache_dir, args.ttl, args.timeout)
+    try:
+        cache.refresh(args.key, lambda: run_codexbar_cost(provider, args.timeout))
+    except (OSError, RuntimeError) as exc:
+        print(f"Cache refresh failed: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Compact columnar snapshots of DailyIndex views (`--export-columnar`).
+
+A snapshot is a small header followed by one section per provider: a model
+name dictionary and fixed-width little-endian columns (int32 date ordinals,
+model ids and row offsets, int64 token counts, float64 costs), each 8-byte
+aligned. Readers mmap the file and hand `memoryview` casts of the columns to
+DailyIndex, so loading creates no per-row Python objects.
+
+Each section also stores DailyIndex's per-model prefix sums, flattened
+model after model: one entry per (day, model) pair for the date ordinals and
+first rows, plus a leading zero per model for the cumulative cost and row
+count. `prefix_offsets` gives each model's start in the pair columns, so
+windowed queries on a mapped index bisect the buffers instead of rebuilding
+the sums in Python.
+
+Layout:
+    file:     MAGIC, <I section count, 4 pad bytes, then sections
+    section:  <IIIIII days, rows, models, pairs, name bytes, dictionary bytes;
+              provider name; NUL-separated model names; padding to 8;
+              columns in COLUMNS order
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from collections.abc import Sequence
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# The last byte is the format version; version 1 had no prefix sum columns.
+MAGIC_PREFIX = b"MUCOL\x00\x00"
+MAGIC = MAGIC_PREFIX + b"\x02"
+FILE_HEADER = struct.Struct("<8sI4x")
+SECTION_HEADER = struct.Struct("<IIIIII")
+
+# (attribute, typecode, length): length is in "days", "days+1", "rows", "models",
+# "models+1", "pairs" or "pairs+models" units.
+COLUMNS: Tuple[Tuple[str, str, str], ...] = (
+    ("day_ordinals", "i", "days"),
+    ("day_current", "i", "days"),
+    ("day_row_start", "i", "days+1"),
+    ("day_cost", "d", "days"),
+    ("inputTokens", "q", "days"),
+    ("outputTokens", "q", "days"),
+    ("cacheReadTokens", "q", "days"),
+    ("cacheCreationTokens", "q", "days"),
+    ("totalTokens", "q", "days"),
+    ("row_models", "i", "rows"),
+    ("row_costs", "d", "rows"),
+    ("totals", "d", "models"),
+    ("row_counts", "i", "models"),
+    ("latest", "i", "models"),
+    ("prefix_offsets", "i", "models+1"),
+    ("prefix_ordinals", "i", "pairs"),
+    ("prefix_rows", "i", "pairs"),
+    ("prefix_cost", "d", "pairs+models"),
+    ("prefix_counts", "i", "pairs+models"),
+)
+_NATIVE = sys.byteorder == "little"
+
+
+class OrdinalDates(Sequence):
+    """`day_dates` for a mapped index: ISO dates derived from the ordinal column on access."""
+
+    __slots__ = ("ordinals",)
+
+    def __init__(self, ordinals: Sequence[int]) -> None:
+        self.ordinals = ordinals
+
+    def __len__(self) -> int:
+        return len(self.ordinals)
+
+    def __getitem__(self, position: Any) -> Any:
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        ordinal = self.ordinals[position]
+        return date.fromordinal(ordinal).isoformat() if ordinal > 0 else None
+
+
+def is_columnar(path: str) -> bool:
+    """True for any snapshot version; read_columnar rejects the ones it cannot read."""
+    try:
+        with open(path, "rb") as handle:
+            return handle.read(len(MAGIC)).startswith(MAGIC_PREFIX)
+    except OSError:
+        return False
+
+
+def _pad(length: int) -> int:
+    return -length % 8
+
+
+def _column_length(unit: str, days: int, rows: int, models: int, pairs: int) -> int:
+    return {
+        "days": days,
+        "days+1": days + 1,
+        "rows": rows,
+        "models": models,
+        "models+1": models + 1,
+        "pairs": pairs,
+        "pairs+models": pairs + models,
+    }[unit]
+
+
+def _prefix_columns(index: Any) -> Dict[str, array]:
+    """Flatten index._prefix() into the prefix_* columns."""
+    ordinals, first_rows, cumulative, counts = index._prefix()
+    columns = {
+        "prefix_offsets": array("i", [0]),
+        "prefix_ordinals": array("i"),
+        "prefix_rows": array("i"),
+        "prefix_cost": array("d"),
+        "prefix_counts": array("i"),
+    }
+    for model_id in range(len(index.models)):
+        columns["prefix_ordinals"].extend(ordinals[model_id])
+        columns["prefix_rows"].extend(first_rows[model_id])
+        columns["prefix_cost"].extend(cumulative[model_id])
+        columns["prefix_counts"].extend(counts[model_id])
+        columns["prefix_offsets"].append(len(columns["prefix_ordinals"]))
+    return columns
+
+
+def _column(index: Any, name: str) -> Any:
+    day_tokens, day_cost = index._token_columns()
+    if name in day_tokens:
+        return day_tokens[name]
+    if name == "day_cost":
+        return day_cost
+    if name == "latest":
+        latest = array("i", [-1]) * len(index.models)
+        for model_id, row in index._latest_rows().items():
+            latest[model_id] = row
+        return latest
+    return getattr(index, name)
+
+
+def encode_section(provider: str, index: Any) -> bytes:
+    name = provider.encode("utf-8")
+    dictionary = b"\0".join(model.encode("utf-8") for model in index.models)
+    days, rows, models = len(index.day_ordinals), len(index.row_models), len(index.models)
+    prefix = _prefix_columns(index)
+    pairs = len(prefix["prefix_ordinals"])
+    parts = [SECTION_HEADER.pack(days, rows, models, pairs, len(name), len(dictionary)), name, dictionary]
+    parts.append(b"\0" * _pad(SECTION_HEADER.size + len(name) + len(dictionary)))
+    for attribute, typecode, unit in COLUMNS:
+        values = prefix[attribute] if attribute in prefix else _column(index, attribute)
+        column = values if isinstance(values, array) and values.typecode == typecode else array(typecode, values)
+        if len(column) != _column_length(unit, days, rows, models, pairs):
+            raise ValueError(f"{provider}: column {attribute} has {len(column)} values")
+        if not _NATIVE:
+            column = array(typecode, column)
+            column.byteswap()
+        data = column.tobytes()
+        parts.append(data)
+        parts.append(b"\0" * _pad(len(data)))
+    return b"".join(parts)
+
+
+def write_columnar(path: str, views: Dict[str, Any]) -> int:
+    """Atomically write one section per provider view; returns the file size."""
+    target = Path(path).expanduser()
+    body = [FILE_HEADER.pack(MAGIC, len(views))]
+    body.extend(encode_section(provider, index) for provider, index in views.items())
+    data = b"".join(body)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{target.name}.", dir=str(target.parent))
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return len(data)
+
+
+def _view(buffer: memoryview, offset: int, typecode: str, length: int) -> Tuple[Any, int]:
+    size = length * array(typecode).itemsize
+    if offset + size > len(buffer):
+        raise ValueError("truncated columnar snapshot")
+    raw = buffer[offset : offset + size]
+    if _NATIVE:
+        column: Any = raw.cast(typecode)
+    else:
+        column = array(typecode, raw.tobytes())
+        column.byteswap()
+    return column, offset + size + _pad(size)
+
+
+def _mapped_prefix(columns: Dict[str, Any], models: int) -> Tuple[List[Any], List[Any], List[Any], List[Any]]:
+    """Pop the prefix_* columns and slice them per model into DailyIndex.prefix."""
+    offsets = columns.pop("prefix_offsets")
+    ordinals, first_rows = columns.pop("prefix_ordinals"), columns.pop("prefix_rows")
+    cumulative, counts = columns.pop("prefix_cost"), columns.pop("prefix_counts")
+    if offsets[0] != 0 or offsets[models] != len(ordinals):
+        raise ValueError("columnar snapshot prefix offsets do not match its header")
+    bounds = [(offsets[model_id], offsets[model_id + 1]) for model_id in range(models)]
+    return (
+        [ordinals[start:end] for start, end in bounds],
+        [first_rows[start:end] for start, end in bounds],
+        [cumulative[start + model_id : end + model_id + 1] for model_id, (start, end) in enumerate(bounds)],
+        [counts[start + model_id : end + model_id + 1] for model_id, (start, end) in enumerate(bounds)],
+    )
+
+
+def read_columnar(path: str, index_factory: Any, providers: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Map `path` and return {provider: index} for the requested providers.
+
+    `index_factory` builds an empty DailyIndex whose columns are then pointed
+    at the mapped buffers; the mapping stays alive as long as any view does.
+    """
+    with open(path, "rb") as handle:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    buffer = memoryview(mapped)
+    if len(buffer) < FILE_HEADER.size:
+        raise ValueError("truncated columnar snapshot")
+    magic, sections = FILE_HEADER.unpack_from(buffer, 0)
+    if not magic.startswith(MAGIC_PREFIX):
+        raise ValueError(f"{path} is not a columnar usage snapshot")
+    if magic != MAGIC:
+        raise ValueError(f"{path} is an older columnar snapshot; export it again")
+    offset = FILE_HEADER.size
+    views: Dict[str, Any] = {}
+    for _ in range(sections):
+        if offset + SECTION_HEADER.size > len(buffer):
+            raise ValueError("truncated columnar snapshot")
+        days, rows, models, pairs, name_len, dict_len = SECTION_HEADER.unpack_from(buffer, offset)
+        offset += SECTION_HEADER.size
+        provider = bytes(buffer[offset : offset + name_len]).decode("utf-8")
+        offset += name_len
+        names = bytes(buffer[offset : offset + dict_len]).decode("utf-8").split("\0") if models else []
+        offset += dict_len
+        offset += _pad(SECTION_HEADER.size + name_len + dict_len)
+        columns: Dict[str, Any] = {}
+        for attribute, typecode, unit in COLUMNS:
+            columns[attribute], offset = _view(
+                buffer, offset, typecode, _column_length(unit, days, rows, models, pairs)
+            )
+        if providers is not None and provider not in providers:
+            continue
+        if len(names) != models:
+            raise ValueError(f"{provider}: model dictionary does not match its header")
+        index = index_factory()
+        index.models = [sys.intern(name) for name in names]
+        index.model_ids = {name: model_id for model_id, name in enumerate(index.models)}
+        index.latest = {model_id: row for model_id, row in enumerate(columns.pop("latest")) if row >= 0}
+        index.day_tokens = {field: columns.pop(field) for field in index.day_tokens}
+        index.prefix = _mapped_prefix(columns, models)
+        for attribute, column in columns.items():
+            setattr(index, attribute, column)
+        index.day_dates = OrdinalDates(index.day_ordinals)
+        views[provider] = index
+    return views
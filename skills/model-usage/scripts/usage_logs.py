@@ -0,0 +1,720 @@
+#!/usr/bin/env python3
+"""
+Incremental reader for raw Codex/Claude/OpenClaw session JSONL logs.
+
+Keeps a per-file (inode, size, mtime, offset) index so later runs only parse
+bytes appended since the previous run, and emits the same daily /
+modelBreakdowns payload shape as `codexbar cost --format json`.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+INDEX_VERSION = 2
+DEFAULT_INDEX_PATH = "~/.cache/openclaw/model-usage/log-index.json"
+CLAUDE_DEDUPE_WINDOW = 256
+# Providers whose log roots hold one directory per project (`projects/<project>/*.jsonl`).
+PROJECT_PROVIDERS = ("claude",)
+# A backfill batch (the unit shipped to a worker) holds at most this many files,
+# and about total bytes / (workers * BATCHES_PER_WORKER) of unparsed input.
+BATCH_MAX_FILES = 256
+BATCHES_PER_WORKER = 4
+
+TOKEN_FIELDS = ("inputTokens", "outputTokens", "cacheReadTokens", "cacheCreationTokens")
+
+# USD per 1M tokens: (input, output, cache read, cache write). Longest prefix wins.
+PRICING: Dict[str, Tuple[float, float, float, float]] = {
+    "gpt-5": (1.25, 10.0, 0.125, 0.0),
+    "gpt-5-mini": (0.25, 2.0, 0.025, 0.0),
+    "gpt-5-nano": (0.05, 0.4, 0.005, 0.0),
+    "gpt-5.1-codex-mini": (0.25, 2.0, 0.025, 0.0),
+    "codex-mini": (1.5, 6.0, 0.375, 0.0),
+    "claude-opus-4": (15.0, 75.0, 1.5, 18.75),
+    "claude-opus-4-5": (5.0, 25.0, 0.5, 6.25),
+    "claude-opus-4-6": (5.0, 25.0, 0.5, 6.25),
+    "claude-sonnet-4": (3.0, 15.0, 0.3, 3.75),
+    "claude-3-7-sonnet": (3.0, 15.0, 0.3, 3.75),
+    "claude-3-5-sonnet": (3.0, 15.0, 0.3, 3.75),
+    "claude-haiku-4-5": (1.0, 5.0, 0.1, 1.25),
+    "claude-3-5-haiku": (0.8, 4.0, 0.08, 1.0),
+}
+_PRICING_PREFIXES = sorted(PRICING, key=len, reverse=True)
+
+Usage = Dict[str, float]
+DailyPartials = Dict[str, Dict[str, Usage]]
+# (path, provider, previous index entry or None)
+ScanJob = Tuple[str, str, Optional[Dict[str, Any]]]
+Progress = Callable[[Dict[str, Any]], None]
+
+
+def default_log_roots(provider: str) -> List[Path]:
+    home = Path.home()
+    if provider == "codex":
+        codex_home = os.environ.get("CODEX_HOME")
+        return [Path(codex_home) / "sessions" if codex_home else home / ".codex" / "sessions"]
+    if provider == "claude":
+        configured = os.environ.get("CLAUDE_CONFIG_DIR")
+        if configured:
+            return [Path(part) / "projects" for part in configured.split(",") if part.strip()]
+        return [home / ".config" / "claude" / "projects", home / ".claude" / "projects"]
+    raise ValueError(f"Unsupported log provider: {provider}")
+
+
+def discover_log_files(roots: Iterable[Path]) -> Iterator[Path]:
+    for root in roots:
+        root = Path(root).expanduser()
+        if not root.is_dir():
+            continue
+        yield from sorted(root.rglob("*.jsonl"))
+
+
+def model_pricing(model: str) -> Optional[Tuple[float, float, float, float]]:
+    for prefix in _PRICING_PREFIXES:
+        if model.startswith(prefix):
+            return PRICING[prefix]
+    return None
+
+
+def estimate_cost(model: str, usage: Usage) -> float:
+    rates = model_pricing(model)
+    if rates is None:
+        return 0.0
+    input_rate, output_rate, cache_read_rate, cache_write_rate = rates
+    return (
+        usage.get("inputTokens", 0) * input_rate
+        + usage.get("outputTokens", 0) * output_rate
+        + usage.get("cacheReadTokens", 0) * cache_read_rate
+        + usage.get("cacheCreationTokens", 0) * cache_write_rate
+    ) / 1_000_000
+
+
+def local_day(timestamp: Any) -> Optional[str]:
+    if not isinstance(timestamp, str) or not timestamp:
+        return None
+    value = timestamp[:-1] + "+00:00" if timestamp.endswith("Z") else timestamp
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone().strftime("%Y-%m-%d")
+
+
+def _int(value: Any) -> int:
+    return int(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+
+def parse_codex_record(
+    record: Dict[str, Any], state: Dict[str, Any]
+) -> Optional[Tuple[str, str, Usage]]:
+    payload = record.get("payload")
+    if not isinstance(payload, dict):
+        return None
+    kind = record.get("type")
+    if kind in ("turn_context", "session_meta"):
+        model = payload.get("model")
+        if isinstance(model, str) and model:
+            state["model"] = model
+        return None
+    if kind != "event_msg" or payload.get("type") != "token_count":
+        return None
+    info = payload.get("info")
+    if not isinstance(info, dict):
+        return None
+
+    total = info.get("total_token_usage")
+    last = info.get("last_token_usage")
+    delta: Optional[List[int]] = None
+    if isinstance(total, dict):
+        current = [
+            _int(total.get("input_tokens")),
+            _int(total.get("cached_input_tokens")),
+            _int(total.get("output_tokens")),
+        ]
+        previous = state.get("totals")
+        state["totals"] = current
+        if isinstance(previous, list) and len(previous) == 3:
+            delta = [now - before for now, before in zip(current, previous)]
+            if min(delta) < 0:
+                delta = None
+        else:
+            delta = current
+    if delta is None and isinstance(last, dict):
+        delta = [
+            _int(last.get("input_tokens")),
+            _int(last.get("cached_input_tokens")),
+            _int(last.get("output_tokens")),
+        ]
+    if not delta or not any(delta):
+        return None
+
+    day = local_day(record.get("timestamp"))
+    if day is None:
+        return None
+    input_tokens, cached_tokens, output_tokens = delta
+    usage: Usage = {
+        "inputTokens": max(input_tokens - cached_tokens, 0),
+        "outputTokens": output_tokens,
+        "cacheReadTokens": cached_tokens,
+        "cacheCreationTokens": 0,
+    }
+    model = state.get("model") or "gpt-5"
+    usage["cost"] = estimate_cost(model, usage)
+    return day, model, usage
+
+
+def parse_claude_record(
+    record: Dict[str, Any], state: Dict[str, Any]
+) -> Optional[Tuple[str, str, Usage]]:
+    if record.get("type") != "assistant":
+        return None
+    message = record.get("message")
+    if not isinstance(message, dict):
+        return None
+    model = message.get("model")
+    usage_raw = message.get("usage")
+    if not isinstance(model, str) or not model or model == "<synthetic>":
+        return None
+    if not isinstance(usage_raw, dict):
+        return None
+
+    message_id = message.get("id")
+    request_id = record.get("requestId")
+    if isinstance(message_id, str) and isinstance(request_id, str):
+        key = f"{message_id}:{request_id}"
+        seen = state.setdefault("seen", [])
+        if key in seen:
+            return None
+        seen.append(key)
+        if len(seen) > CLAUDE_DEDUPE_WINDOW:
+            del seen[: len(seen) - CLAUDE_DEDUPE_WINDOW]
+
+    day = local_day(record.get("timestamp"))
+    if day is None:
+        return None
+    usage: Usage = {
+        "inputTokens": _int(usage_raw.get("input_tokens")),
+        "outputTokens": _int(usage_raw.get("output_tokens")),
+        "cacheReadTokens": _int(usage_raw.get("cache_read_input_tokens")),
+        "cacheCreationTokens": _int(usage_raw.get("cache_creation_input_tokens")),
+    }
+    cost = record.get("costUSD")
+    if isinstance(cost, (int, float)) and not isinstance(cost, bool):
+        usage["cost"] = float(cost)
+    else:
+        usage["cost"] = estimate_cost(model, usage)
+    return day, model, usage
+
+
+OPENCLAW_USAGE_ALIASES = {
+    "inputTokens": ("input", "inputTokens", "input_tokens", "promptTokens", "prompt_tokens"),
+    "outputTokens": ("output", "outputTokens", "output_tokens", "completionTokens", "completion_tokens"),
+    "cacheReadTokens": ("cacheRead", "cache_read", "cache_read_input_tokens", "cached_tokens"),
+    "cacheCreationTokens": ("cacheWrite", "cache_write", "cache_creation_input_tokens"),
+}
+
+
+def _first_number(raw: Dict[str, Any], keys: Iterable[str]) -> int:
+    for key in keys:
+        value = raw.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return max(int(value), 0)
+    return 0
+
+
+def parse_openclaw_record(
+    record: Dict[str, Any], state: Dict[str, Any]
+) -> Optional[Tuple[str, str, Usage]]:
+    if record.get("type") != "message":
+        return None
+    message = record.get("message")
+    if not isinstance(message, dict) or message.get("role") != "assistant":
+        return None
+    model = message.get("model")
+    usage_raw = message.get("usage")
+    if not isinstance(model, str) or not model or not isinstance(usage_raw, dict):
+        return None
+
+    timestamp = message.get("timestamp")
+    if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+        try:
+            day: Optional[str] = datetime.fromtimestamp(timestamp / 1000).strftime("%Y-%m-%d")
+        except (OverflowError, OSError, ValueError):
+            return None
+    else:
+        day = local_day(record.get("timestamp"))
+    if day is None:
+        return None
+    usage: Usage = {
+        field: _first_number(usage_raw, keys) for field, keys in OPENCLAW_USAGE_ALIASES.items()
+    }
+    cost = usage_raw.get("cost")
+    total = cost.get("total") if isinstance(cost, dict) else None
+    if isinstance(total, (int, float)) and not isinstance(total, bool):
+        usage["cost"] = float(total)
+    else:
+        usage["cost"] = estimate_cost(model, usage)
+    if not any(usage.values()):
+        return None
+    return day, model, usage
+
+
+RECORD_PARSERS = {
+    "codex": parse_codex_record,
+    "claude": parse_claude_record,
+    "openclaw": parse_openclaw_record,
+}
+
+
+def add_usage(daily: DailyPartials, day: str, model: str, usage: Usage) -> None:
+    bucket = daily.setdefault(day, {}).setdefault(model, {})
+    for key, value in usage.items():
+        bucket[key] = bucket.get(key, 0) + value
+
+
+def _new_entry(provider: str, stat: os.stat_result) -> Dict[str, Any]:
+    return {
+        "provider": provider,
+        "inode": stat.st_ino,
+        "size": 0,
+        "mtime": 0,
+        "offset": 0,
+        "state": {},
+        "daily": {},
+    }
+
+
+def scan_file(
+    path: Path, provider: str, entry: Optional[Dict[str, Any]]
+) -> Tuple[Dict[str, Any], int]:
+    """Parse bytes appended to `path` since `entry` was recorded.
+
+    Returns the updated index entry and the number of bytes parsed. Files that
+    were replaced or truncated are re-parsed from the start.
+    """
+    stat = path.stat()
+    if (
+        entry is None
+        or entry.get("provider") != provider
+        or entry.get("inode") != stat.st_ino
+        or stat.st_size < entry.get("offset", 0)
+    ):
+        entry = _new_entry(provider, stat)
+    elif entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime_ns:
+        return entry, 0
+
+    parse_record = RECORD_PARSERS[provider]
+    state = entry["state"]
+    daily = entry["daily"]
+    offset = start = entry["offset"]
+    with open(path, "rb") as handle:
+        handle.seek(offset)
+        for raw in handle:
+            if not raw.endswith(b"\n"):
+                break
+            offset += len(raw)
+            try:
+                record = json.loads(raw)
+            except ValueError:
+                continue
+            if not isinstance(record, dict):
+                continue
+            parsed = parse_record(record, state)
+            if parsed is not None:
+                add_usage(daily, *parsed)
+
+    entry["offset"] = offset
+    entry["size"] = stat.st_size
+    entry["mtime"] = stat.st_mtime_ns
+    return entry, offset - start
+
+
+def load_index(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            index = json.load(handle)
+    except (OSError, ValueError):
+        return {"version": INDEX_VERSION, "files": {}, "projects": {}}
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        return {"version": INDEX_VERSION, "files": {}, "projects": {}}
+    for key in ("files", "projects"):
+        if not isinstance(index.get(key), dict):
+            index[key] = {}
+    return index
+
+
+def save_index(path: Path, index: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(index, handle, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _scan_batch(jobs: List[ScanJob]) -> List[Tuple[str, Optional[Dict[str, Any]], int]]:
+    """Worker body: parse a batch of files and return only their index entries."""
+    results: List[Tuple[str, Optional[Dict[str, Any]], int]] = []
+    for key, provider, entry in jobs:
+        try:
+            entry, parsed = scan_file(Path(key), provider, entry)
+        except OSError:
+            entry, parsed = None, 0
+        results.append((key, entry, parsed))
+    return results
+
+
+def shard_jobs(pending: List[Tuple[ScanJob, int]], workers: int) -> List[List[ScanJob]]:
+    """Group (job, unparsed bytes) pairs into batches of similar size, largest first."""
+    target = max(sum(size for _, size in pending) // (workers * BATCHES_PER_WORKER), 1)
+    batches: List[List[ScanJob]] = []
+    batch: List[ScanJob] = []
+    batch_bytes = 0
+    for job, size in sorted(pending, key=lambda item: item[1], reverse=True):
+        batch.append(job)
+        batch_bytes += size
+        if batch_bytes >= target or len(batch) >= BATCH_MAX_FILES:
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def scan_files(
+    files: Dict[str, Any],
+    jobs: Iterable[Tuple[str, str]],
+    workers: int = 1,
+    progress: Optional[Progress] = None,
+) -> Dict[str, Any]:
+    """Bring the index entries for (path, provider) `jobs` up to date.
+
+    Unchanged files cost one stat. With workers > 1 the changed files are
+    sharded across a process pool; each worker pre-aggregates its files into
+    (date, model) partials and only those index entries travel back.
+    """
+    stats: Dict[str, Any] = {"files": 0, "parsedFiles": 0, "parsedBytes": 0, "changed": []}
+    pending: List[Tuple[ScanJob, int]] = []
+    for key, provider in jobs:
+        try:
+            stat = os.stat(key)
+        except OSError:
+            continue
+        stats["files"] += 1
+        entry = files.get(key)
+        same_file = (
+            entry is not None
+            and entry.get("provider") == provider
+            and entry.get("inode") == stat.st_ino
+        )
+        if same_file and entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime_ns:
+            continue
+        offset = entry.get("offset", 0) if same_file else 0
+        pending.append(((key, provider, entry), max(stat.st_size - offset, 0)))
+
+    started = time.perf_counter()
+    total_bytes = sum(size for _, size in pending)
+    done = 0
+
+    def merge(results: List[Tuple[str, Optional[Dict[str, Any]], int]]) -> None:
+        nonlocal done
+        for key, entry, parsed in results:
+            done += 1
+            if entry is None:
+                continue
+            files[key] = entry
+            stats["changed"].append(key)
+            if parsed:
+                stats["parsedFiles"] += 1
+                stats["parsedBytes"] += parsed
+        if progress is not None:
+            progress(
+                {
+                    "done": done,
+                    "total": len(pending),
+                    "bytes": stats["parsedBytes"],
+                    "totalBytes": total_bytes,
+                    "seconds": time.perf_counter() - started,
+                }
+            )
+
+    if workers > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_scan_batch, batch) for batch in shard_jobs(pending, workers)]
+            for future in as_completed(futures):
+                merge(future.result())
+    else:
+        for job, _ in pending:
+            merge(_scan_batch([job]))
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def default_workers() -> int:
+    """CPUs this process may run on (honours affinity masks and container cpusets)."""
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def progress_printer(stream: Any, label: str = "scan", interval: float = 1.0) -> Progress:
+    """Progress callback printing done/total files, MB and files/s at most once per interval."""
+    last = [0.0]
+
+    def report(update: Dict[str, Any]) -> None:
+        seconds = update["seconds"]
+        if update["done"] < update["total"] and seconds - last[0] < interval:
+            return
+        last[0] = seconds
+        rate = update["done"] / seconds if seconds > 0 else 0.0
+        print(
+            f"{label}: {update['done']}/{update['total']} files, "
+            f"{update['bytes'] / 1e6:.1f}/{update['totalBytes'] / 1e6:.1f} MB, {rate:.1f} files/s",
+            file=stream,
+            flush=True,
+        )
+
+    return report
+
+
+def log_project(root: Path, path: Path) -> Optional[str]:
+    """Project directory a log belongs to: the first path component below its root."""
+    try:
+        parts = path.relative_to(root).parts
+    except ValueError:
+        return None
+    return parts[0] if len(parts) > 1 else None
+
+
+def project_matches(project: str, wanted: Iterable[str]) -> bool:
+    """Match a project directory by exact name or by its last path segment.
+
+    Claude names project directories after the working directory with `/`
+    replaced by `-`, so `openclaw` matches `-Users-me-src-openclaw`.
+    """
+    return any(project == name or project.endswith(f"-{name}") for name in wanted)
+
+
+def project_dirs(roots: Iterable[Path], wanted: Iterable[str]) -> List[Path]:
+    wanted = list(wanted)
+    dirs: List[Path] = []
+    for root in roots:
+        root = Path(root).expanduser()
+        if not root.is_dir():
+            continue
+        dirs.extend(
+            path for path in sorted(root.iterdir()) if path.is_dir() and project_matches(path.name, wanted)
+        )
+    return dirs
+
+
+def update_projects(index: Dict[str, Any], projects: Iterable[str]) -> None:
+    """Rebuild the project -> (date, model) partials entries for `projects`."""
+    files: Dict[str, Any] = index["files"]
+    inverted: Dict[str, Any] = index["projects"]
+    dirty = set(projects)
+    for project in dirty:
+        inverted.pop(project, None)
+    for key, entry in files.items():
+        project = entry.get("project")
+        if project not in dirty:
+            continue
+        record = inverted.setdefault(project, {"files": [], "daily": {}})
+        record["files"].append(key)
+        for day, models in entry.get("daily", {}).items():
+            for model, usage in models.items():
+                add_usage(record["daily"], day, model, usage)
+
+
+def refresh_index(
+    index: Dict[str, Any],
+    providers: Iterable[str],
+    roots: Optional[Dict[str, Iterable[Path]]] = None,
+    workers: int = 1,
+    progress: Optional[Progress] = None,
+    scoped: bool = False,
+) -> Dict[str, Any]:
+    """Rescan the providers' logs into `index` and keep the project index current.
+
+    Entries no longer found are dropped; with `scoped` only those below the
+    given roots, so refreshing one project leaves the others untouched.
+    """
+    files: Dict[str, Any] = index["files"]
+    providers = list(providers)
+    jobs: List[Tuple[str, str]] = []
+    projects: Dict[str, Optional[str]] = {}
+    scanned_roots: List[str] = []
+    for provider in providers:
+        provider_roots = (roots or {}).get(provider)
+        if provider_roots is None:
+            provider_roots = default_log_roots(provider)
+        for root in provider_roots:
+            root = Path(root).expanduser()
+            scanned_roots.append(os.path.join(str(root), ""))
+            if provider in PROJECT_PROVIDERS and scoped:
+                base, project = root.parent, root.name
+            else:
+                base, project = root, None
+            for path in discover_log_files([root]):
+                key = str(path)
+                jobs.append((key, provider))
+                if provider in PROJECT_PROVIDERS:
+                    projects[key] = project or log_project(base, path)
+    stats = scan_files(files, jobs, workers, progress)
+
+    changed = set(stats["changed"])
+    dirty = set()
+    for key, project in projects.items():
+        entry = files.get(key)
+        if entry is None:
+            continue
+        if entry.get("project") != project:
+            dirty.add(entry.get("project"))
+            entry["project"] = project
+        if key in changed:
+            dirty.add(project)
+    seen = {key for key, _ in jobs}
+    for key in [key for key, entry in files.items() if entry.get("provider") in providers]:
+        if key in seen or (scoped and not key.startswith(tuple(scanned_roots))):
+            continue
+        dirty.add(files[key].get("project"))
+        del files[key]
+    dirty.discard(None)
+    update_projects(index, dirty)
+    return stats
+
+
+def merge_partials(entries: Iterable[Dict[str, Any]], since: Optional[str] = None) -> DailyPartials:
+    """Sum per-file (date, model) partials, leaving out days before `since` (YYYY-MM-DD)."""
+    merged: DailyPartials = {}
+    for entry in entries:
+        for day, models in entry.get("daily", {}).items():
+            if since and day < since:
+                continue
+            for model, usage in models.items():
+                add_usage(merged, day, model, usage)
+    return merged
+
+
+def build_payload(provider: str, daily: DailyPartials) -> Dict[str, Any]:
+    rows: List[Dict[str, Any]] = []
+    totals = {field: 0 for field in TOKEN_FIELDS}
+    total_cost = 0.0
+    for day in sorted(daily):
+        models = daily[day]
+        row: Dict[str, Any] = {"date": day}
+        for field in TOKEN_FIELDS:
+            row[field] = int(sum(usage.get(field, 0) for usage in models.values()))
+            totals[field] += row[field]
+        row["totalTokens"] = sum(row[field] for field in TOKEN_FIELDS)
+        row["totalCost"] = sum(usage.get("cost", 0.0) for usage in models.values())
+        row["modelsUsed"] = sorted(models)
+        row["modelBreakdowns"] = [
+            {"modelName": model, "cost": usage.get("cost", 0.0)}
+            for model, usage in sorted(
+                models.items(), key=lambda item: item[1].get("cost", 0.0), reverse=True
+            )
+        ]
+        total_cost += row["totalCost"]
+        rows.append(row)
+    return {
+        "provider": provider,
+        "source": "logs",
+        "updatedAt": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "daily": rows,
+        "totals": {
+            "totalInputTokens": totals["inputTokens"],
+            "totalOutputTokens": totals["outputTokens"],
+            "cacheReadTokens": totals["cacheReadTokens"],
+            "cacheCreationTokens": totals["cacheCreationTokens"],
+            "totalTokens": sum(totals.values()),
+            "totalCost": total_cost,
+        },
+    }
+
+
+def load_log_payloads(
+    providers: Iterable[str],
+    index_path: Optional[str] = None,
+    roots: Optional[Dict[str, Iterable[Path]]] = None,
+    workers: int = 1,
+    progress: Optional[Progress] = None,
+    since: Optional[str] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Refresh the shared index for each provider and build their payloads.
+
+    Providers are refreshed together against a single load/save of the index
+    so concurrent writers never drop each other's entries. With `since`, the
+    payloads only hold days from that date on.
+    """
+    path = Path(index_path or DEFAULT_INDEX_PATH).expanduser()
+    index = load_index(path)
+    providers = list(providers)
+    refresh_index(index, providers, roots, workers, progress)
+    try:
+        save_index(path, index)
+    except OSError:
+        pass
+    payloads: Dict[str, Dict[str, Any]] = {}
+    for provider in providers:
+        entries = (entry for entry in index["files"].values() if entry.get("provider") == provider)
+        payloads[provider] = build_payload(provider, merge_partials(entries, since))
+    return payloads
+
+
+def load_log_payload(
+    provider: str,
+    index_path: Optional[str] = None,
+    roots: Optional[Iterable[Path]] = None,
+) -> Dict[str, Any]:
+    provider_roots = {provider: roots} if roots is not None else None
+    return load_log_payloads([provider], index_path, provider_roots)[provider]
+
+
+def load_project_partials(
+    index_path: Optional[str] = None,
+    roots: Optional[Iterable[Path]] = None,
+    projects: Optional[Iterable[str]] = None,
+    workers: int = 1,
+    progress: Optional[Progress] = None,
+    provider: str = "claude",
+) -> Dict[str, DailyPartials]:
+    """Return (date, model) partials per project from the inverted project index.
+
+    With `projects`, only the matching project directories are rescanned and
+    only their partials are returned; other projects' files are not touched.
+    """
+    path = Path(index_path or DEFAULT_INDEX_PATH).expanduser()
+    index = load_index(path)
+    provider_roots = list(roots) if roots is not None else default_log_roots(provider)
+    wanted = list(projects) if projects else None
+    if wanted:
+        scoped_roots = {provider: project_dirs(provider_roots, wanted)}
+        refresh_index(index, [provider], scoped_roots, workers, progress, scoped=True)
+    else:
+        refresh_index(index, [provider], {provider: provider_roots}, workers, progress)
+    try:
+        save_index(path, index)
+    except OSError:
+        pass
+    return {
+        name: record["daily"]
+        for name, record in sorted(index["projects"].items())
+        if wanted is None or project_matches(name, wanted)
+    }
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+OpenClaw session transcripts as a cost source (`--source openclaw`).
+
+Walks `<state>/agents/<agentId>/sessions/sessions.json`, parses each
+transcript's assistant `message.usage` records incrementally and keeps one
+summary per session in the shared log index. A session whose size and mtime
+are unchanged is never reopened, so repeated reports only read what changed.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from usage_logs import (
+    DEFAULT_INDEX_PATH,
+    Progress,
+    build_payload,
+    load_index,
+    merge_partials,
+    save_index,
+    scan_files,
+)
+
+OPENCLAW_PROVIDER = "openclaw"
+# Archived transcripts keep their spend: `<id>.jsonl.reset.<ts>` / `<id>.jsonl.deleted.<ts>`.
+TRANSCRIPT_PATTERNS = ("*.jsonl", "*.jsonl.reset.*", "*.jsonl.deleted.*")
+
+# (agent id, session label, transcript path); the label is the session key when
+# sessions.json lists the transcript, else the session id from the file name.
+SessionFile = Tuple[str, str, Path]
+
+
+def default_state_dir() -> Path:
+    configured = os.environ.get("OPENCLAW_STATE_DIR")
+    return Path(configured).expanduser() if configured else Path.home() / ".openclaw"
+
+
+def read_session_store(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            store = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    return store if isinstance(store, dict) else {}
+
+
+def session_id_from_name(name: str) -> str:
+    return name.split(".jsonl", 1)[0]
+
+
+def discover_sessions(
+    state_dir: Optional[Path] = None, agents: Optional[Iterable[str]] = None
+) -> Iterator[SessionFile]:
+    agents_dir = Path(state_dir or default_state_dir()).expanduser() / "agents"
+    wanted = set(agents) if agents else None
+    try:
+        agent_dirs = sorted(path for path in agents_dir.iterdir() if path.is_dir())
+    except OSError:
+        return
+    for agent_dir in agent_dirs:
+        agent = agent_dir.name
+        if wanted is not None and agent not in wanted:
+            continue
+        sessions_dir = agent_dir / "sessions"
+        if not sessions_dir.is_dir():
+            continue
+        listed = set()
+        for key, entry in sorted(read_session_store(sessions_dir / "sessions.json").items()):
+            if not isinstance(entry, dict):
+                continue
+            session_file = entry.get("sessionFile")
+            session_id = entry.get("sessionId")
+            if isinstance(session_file, str) and session_file:
+                path = sessions_dir / Path(session_file).expanduser()
+            elif isinstance(session_id, str) and session_id:
+                path = sessions_dir / f"{session_id}.jsonl"
+            else:
+                continue
+            if path in listed or not path.is_file():
+                continue
+            listed.add(path)
+            yield agent, key, path
+        for pattern in TRANSCRIPT_PATTERNS:
+            for path in sorted(sessions_dir.glob(pattern)):
+                if path not in listed:
+                    listed.add(path)
+                    yield agent, session_id_from_name(path.name), path
+
+
+def refresh_sessions(
+    index: Dict[str, Any],
+    state_dir: Optional[Path] = None,
+    agents: Optional[Iterable[str]] = None,
+    workers: int = 1,
+    progress: Optional[Progress] = None,
+) -> Dict[str, Any]:
+    """Rescan changed transcripts into `index`; returns file and byte counts.
+
+    Entries for vanished transcripts are dropped, but only for the agents
+    that were scanned so an --agent filter never evicts other agents.
+    """
+    files: Dict[str, Any] = index["files"]
+    agents = list(agents) if agents else None
+    sessions = {str(path): (agent, session) for agent, session, path in discover_sessions(state_dir, agents)}
+    stats = scan_files(files, ((key, OPENCLAW_PROVIDER) for key in sessions), workers, progress)
+    seen = set()
+    for key, (agent, session) in sessions.items():
+        entry = files.get(key)
+        if entry is not None and entry.get("provider") == OPENCLAW_PROVIDER:
+            entry["agent"] = agent
+            entry["session"] = session
+            seen.add(key)
+    for key, entry in list(files.items()):
+        if entry.get("provider") != OPENCLAW_PROVIDER or key in seen:
+            continue
+        if agents is None or entry.get("agent") in agents:
+            del files[key]
+    return stats
+
+
+def session_summaries(entries: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """One cost summary per (agent, session), costliest first."""
+    summaries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for entry in entries:
+        key = (entry.get("agent", ""), entry.get("session", ""))
+        summary = summaries.setdefault(
+            key,
+            {"agent": key[0], "session": key[1], "totalCost": 0.0, "totalTokens": 0, "models": set(), "days": set()},
+        )
+        for day, models in entry.get("daily", {}).items():
+            summary["days"].add(day)
+            for model, usage in models.items():
+                summary["models"].add(model)
+                summary["totalCost"] += usage.get("cost", 0.0)
+                summary["totalTokens"] += int(
+                    sum(value for field, value in usage.items() if field != "cost")
+                )
+    records = []
+    for summary in summaries.values():
+        days = sorted(summary.pop("days"))
+        summary["models"] = sorted(summary["models"])
+        summary["firstDate"] = days[0] if days else None
+        summary["lastDate"] = days[-1] if days else None
+        records.append(summary)
+    records.sort(key=lambda record: (-record["totalCost"], record["agent"], record["session"]))
+    return records
+
+
+def select_sessions(
+    index_path: Optional[str] = None,
+    agents: Optional[Iterable[str]] = None,
+    sessions: Optional[Iterable[str]] = None,
+    state_dir: Optional[Path] = None,
+    workers: int = 1,
+    progress: Optional[Progress] = None,
+) -> List[Dict[str, Any]]:
+    """Refresh the index and return the index entries of the selected sessions.
+
+    `sessions` matches either the session key or the transcript's session id.
+    """
+    path = Path(index_path or DEFAULT_INDEX_PATH).expanduser()
+    index = load_index(path)
+    agents = list(agents) if agents else None
+    refresh_sessions(index, state_dir, agents, workers, progress)
+    try:
+        save_index(path, index)
+    except OSError:
+        pass
+
+    wanted = set(sessions) if sessions else None
+    entries = []
+    for file_path, entry in index["files"].items():
+        if entry.get("provider") != OPENCLAW_PROVIDER:
+            continue
+        if agents is not None and entry.get("agent") not in agents:
+            continue
+        if wanted is not None and not (
+            entry.get("session") in wanted or session_id_from_name(Path(file_path).name) in wanted
+        ):
+            continue
+        entries.append(entry)
+    return entries
+
+
+def load_openclaw_payload(
+    index_path: Optional[str] = None,
+    agents: Optional[Iterable[str]] = None,
+    sessions: Optional[Iterable[str]] = None,
+    state_dir: Optional[Path] = None,
+    workers: int = 1,
+    progress: Optional[Progress] = None,
+    since: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Build a codexbar-shaped payload for the selected sessions (see `select_sessions`).
+
+    The payload also carries `agents` and `sessions` cost summaries. With
+    `since`, `daily` only holds days from that date on.
+    """
+    entries = select_sessions(index_path, agents, sessions, state_dir, workers, progress)
+    payload = build_payload(OPENCLAW_PROVIDER, merge_partials(entries, since))
+    payload["source"] = OPENCLAW_PROVIDER
+    summaries = session_summaries(entries)
+    agent_totals: Dict[str, Dict[str, Any]] = {}
+    for summary in summaries:
+        totals = agent_totals.setdefault(
+            summary["agent"], {"agent": summary["agent"], "totalCost": 0.0, "sessions": 0}
+        )
+        totals["totalCost"] += summary["totalCost"]
+        totals["sessions"] += 1
+    payload["agents"] = sorted(agent_totals.values(), key=lambda record: -record["totalCost"])
+    payload["sessions"] = summaries
+    return payload
+
+
+def load_openclaw_groups(
+    group_by: str,
+    index_path: Optional[str] = None,
+    agents: Optional[Iterable[str]] = None,
+    sessions: Optional[Iterable[str]] = None,
+    state_dir: Optional[Path] = None,
+    workers: int = 1,
+    progress: Optional[Progress] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """One codexbar-shaped payload per agent (`agent`) or per `agent/session` (`session`)."""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for entry in select_sessions(index_path, agents, sessions, state_dir, workers, progress):
+        name = entry.get("agent", "")
+        if group_by == "session":
+            name = f"{name}/{entry.get('session', '')}"
+        groups.setdefault(name, []).append(entry)
+    return {name: build_payload(OPENCLAW_PROVIDER, merge_partials(group)) for name, group in sorted(groups.items())}
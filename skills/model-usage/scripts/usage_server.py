@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Long-running model_usage server.
+
+Keeps the per-provider DailyIndex state in memory and answers the same
+reports as model_usage.py over a local Unix socket or localhost HTTP. State
+is rebuilt only when the watched log directories change (inotify on Linux,
+stat polling elsewhere), so callers skip interpreter startup, the codexbar
+subprocess and JSON parsing on every request.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ctypes
+import ctypes.util
+import http.client
+import json
+import os
+import select
+import signal
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import model_usage
+from usage_logs import default_log_roots, discover_log_files
+
+DEFAULT_SOCKET_PATH = "~/.cache/openclaw/model-usage/server.sock"
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_MAX_AGE = 300.0
+DEBOUNCE_SECONDS = 0.25
+# UsageState.report exit code for a provider this server did not load; answered
+# with HTTP 404 so `--server` clients fall back to loading it themselves.
+NOT_LOADED_EXIT = 3
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """Detects changes by comparing (file count, total size, newest mtime)."""
+
+    def __init__(self, roots: Iterable[Path], interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        self.roots = [Path(root).expanduser() for root in roots]
+        self.interval = interval
+        self.signature = self._snapshot()
+
+    def _snapshot(self) -> Tuple[int, int, int]:
+        count = size = newest = 0
+        for root in self.roots:
+            paths = [root] if root.is_file() else discover_log_files([root])
+            for path in paths:
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                count += 1
+                size += stat.st_size
+                newest = max(newest, stat.st_mtime_ns)
+        return count, size, newest
+
+    def wait(self, timeout: float) -> bool:
+        time.sleep(min(self.interval, timeout))
+        signature = self._snapshot()
+        changed = signature != self.signature
+        self.signature = signature
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Recursive inotify watch over the log roots (Linux only)."""
+
+    def __init__(self, roots: Iterable[Path], accept: Callable[[str], bool] = bool) -> None:
+        self.accept = accept
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.paths: Dict[int, str] = {}
+        for root in roots:
+            root = Path(root).expanduser()
+            if root.is_file():
+                root = root.parent
+            if root.is_dir():
+                self._watch_tree(str(root))
+
+    def _watch_tree(self, top: str) -> None:
+        for directory, _, _ in os.walk(top):
+            wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd >= 0:
+                self.paths[wd] = directory
+
+    def wait(self, timeout: float) -> bool:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        changed = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and wd in self.paths:
+                    self._watch_tree(os.path.join(self.paths[wd], os.fsdecode(name)))
+                changed = True
+            elif self.accept(os.fsdecode(name)):
+                changed = True
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def make_watcher(roots: Iterable[Path], interval: float = DEFAULT_POLL_INTERVAL) -> Any:
+    roots = [Path(root).expanduser() for root in roots]
+    files = {root.name for root in roots if root.is_file()}
+    if files:
+
+        def accept(name: str) -> bool:
+            return name in files
+
+    else:
+
+        def accept(name: str) -> bool:
+            return name.endswith(".jsonl")
+
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(roots, accept)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(roots, interval)
+
+
+def watch_roots(args: argparse.Namespace, providers: List[str]) -> List[Path]:
+    if args.input:
+        return [Path(args.input)]
+    roots: List[Path] = []
+    for provider in providers:
+        roots.extend(default_log_roots(provider))
+    return roots
+
+
+class UsageState:
+    """Current per-provider views; refreshes swap in a freshly built dict."""
+
+    def __init__(self, args: argparse.Namespace, providers: List[str]) -> None:
+        self.args = args
+        self.providers = providers
+        self.views: Dict[str, Any] = {}
+        self.generation = 0
+        self.loaded_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> bool:
+        with self._lock:
+            try:
+                views = model_usage.load_views(self.args, self.providers)
+            except Exception as exc:
+                self.error = str(exc)
+                model_usage.eprint(f"Refresh failed: {exc}")
+                return False
+            self.views = views
+            self.generation += 1
+            self.loaded_at = time.time()
+            self.error = None
+            return True
+
+    def report(self, options: Dict[str, Any]) -> Tuple[int, str, str]:
+        try:
+            args = parse_report_options(options)
+        except ValueError as exc:
+            return 2, "", str(exc)
+        views = self.views
+        if args.provider != "all":
+            if args.provider not in views:
+                return NOT_LOADED_EXIT, "", f"Provider '{args.provider}' is not loaded by this server."
+            views = {args.provider: views[args.provider]}
+        if not views:
+            return 1, "", self.error or "No provider payloads loaded yet."
+        return model_usage.build_report(args, views)
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "ok": self.error is None and bool(self.views),
+            "generation": self.generation,
+            "loadedAt": self.loaded_at,
+            "providers": sorted(self.views),
+            "error": self.error,
+        }
+
+
+def parse_report_options(options: Dict[str, Any]) -> argparse.Namespace:
+    args = model_usage.build_parser().parse_args([])
+    for key in model_usage.REPORT_OPTIONS:
+        if key in options and options[key] is not None:
+            setattr(args, key, options[key])
+    if args.provider not in ("all",) + model_usage.PROVIDERS:
+        raise ValueError(f"Unsupported provider: {args.provider}")
+    if args.mode not in model_usage.MODE_CHOICES:
+        raise ValueError(f"Unsupported mode: {args.mode}")
+    if args.format not in model_usage.FORMAT_CHOICES:
+        raise ValueError(f"Unsupported format: {args.format}")
+    for key in ("since", "until"):
+        value = getattr(args, key)
+        if isinstance(value, str):
+            try:
+                setattr(args, key, model_usage.iso_date(value))
+            except argparse.ArgumentTypeError as exc:
+                raise ValueError(f"{key} {exc}") from exc
+    if args.group_by is not None and args.group_by not in model_usage.GROUP_BY_CHOICES:
+        raise ValueError(f"Unsupported group_by: {args.group_by}")
+    if (args.mode == "rows") != (args.format == "ndjson"):
+        raise ValueError("mode rows and format ndjson go together")
+    if args.top is not None:
+        try:
+            args.top = model_usage.positive_int(str(args.top))
+        except argparse.ArgumentTypeError as exc:
+            raise ValueError(f"top {exc}") from exc
+        if args.mode != "all" or args.group_by:
+            raise ValueError("top requires mode all without group_by")
+    if args.days is not None:
+        if isinstance(args.days, str):
+            try:
+                args.days = model_usage.positive_int(args.days)
+            except argparse.ArgumentTypeError as exc:
+                raise ValueError(f"days {exc}") from exc
+        if not isinstance(args.days, int) or args.days < 1:
+            raise ValueError("days must be >= 1")
+    if isinstance(args.pretty, str):
+        args.pretty = args.pretty.lower() in ("1", "true", "yes")
+    return args
+
+
+def refresh_loop(state: UsageState, watcher: Any, interval: float, max_age: float) -> None:
+    last = time.monotonic()
+    while True:
+        changed = watcher.wait(interval)
+        if changed:
+            while watcher.wait(DEBOUNCE_SECONDS):
+                pass
+        if changed or time.monotonic() - last >= max_age:
+            state.refresh()
+            last = time.monotonic()
+
+
+class UsageRequestHandler(BaseHTTPRequestHandler):
+    server_version = "model-usage"
+    state: UsageState
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send(self, status: int, body: str, content_type: str) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        self._send(status, json.dumps(payload), "application/json")
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path == "/healthz":
+            self._send_json(200, self.state.health())
+            return
+        if url.path not in ("/v1/usage", "/metrics"):
+            self._send_json(404, {"error": "not found"})
+            return
+        options: Dict[str, Any] = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if url.path == "/metrics":
+            options.setdefault("provider", "all")
+            options["format"] = "openmetrics"
+        options.setdefault("format", "json")
+        code, out, err = self.state.report(options)
+        if code != 0:
+            status = {2: 400, NOT_LOADED_EXIT: 404}.get(code, 503)
+            self._send_json(status, {"error": err, "exitCode": code})
+        elif options["format"] == "json":
+            self._send(200, out, "application/json")
+        elif options["format"] == "openmetrics":
+            self._send(200, out + "\n", model_usage.OPENMETRICS_CONTENT_TYPE)
+        else:
+            self._send(200, out + "\n", "text/plain; charset=utf-8")
+
+    def do_POST(self) -> None:
+        if urlsplit(self.path).path != "/v1/report":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            options = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(options, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as exc:
+            self._send_json(400, {"error": f"invalid request: {exc}"})
+            return
+        code, out, err = self.state.report(options)
+        if code == NOT_LOADED_EXIT:
+            self._send_json(404, {"error": err, "exitCode": code})
+            return
+        self._send_json(200, {"exitCode": code, "stdout": out, "stderr": err})
+
+
+class UnixHTTPServer(socketserver.UnixStreamServer):
+    def get_request(self) -> Tuple[socket.socket, Tuple[str, int]]:
+        request, _ = super().get_request()
+        return request, ("local", 0)
+
+
+def remove_stale_socket(path: Path) -> None:
+    """Unlink a socket left behind by a dead server; refuse anything else at `path`."""
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} exists and is not a socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(str(path))
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise FileExistsError(f"another server is listening on {path}")
+
+
+def make_server(state: UsageState, socket_path: Optional[str], host: str, port: Optional[int]) -> Any:
+    handler = type("BoundUsageRequestHandler", (UsageRequestHandler,), {"state": state})
+    if port is not None:
+        return HTTPServer((host, port), handler)
+    path = Path(socket_path or DEFAULT_SOCKET_PATH).expanduser()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    remove_stale_socket(path)
+    server = UnixHTTPServer(str(path), handler)
+    os.chmod(path, 0o600)
+    return server
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.unix_path)
+        self.sock = sock
+
+
+def connect(address: str, timeout: float) -> http.client.HTTPConnection:
+    """Open a connection to `unix:/path`, `/path`, `http://host:port` or `host:port`."""
+    if address.startswith("unix:"):
+        return UnixHTTPConnection(os.path.expanduser(address[5:]), timeout)
+    if address.startswith(("/", "~")):
+        return UnixHTTPConnection(os.path.expanduser(address), timeout)
+    url = urlsplit(address if "://" in address else f"http://{address}")
+    return http.client.HTTPConnection(url.hostname or "127.0.0.1", url.port or 80, timeout=timeout)
+
+
+def request_report(
+    address: str, options: Dict[str, Any], timeout: float = 5.0
+) -> Tuple[int, str, str]:
+    conn = connect(address, timeout)
+    try:
+        conn.request(
+            "POST",
+            "/v1/report",
+            body=json.dumps(options, default=str),
+            headers={"Content-Type": "application/json"},
+        )
+        response = conn.getresponse()
+        data = json.loads(response.read())
+    finally:
+        conn.close()
+    if response.status != 200 or not isinstance(data, dict):
+        raise ValueError(f"server returned HTTP {response.status}")
+    return int(data["exitCode"]), str(data.get("stdout", "")), str(data.get("stderr", ""))
+
+
+def build_serve_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="model_usage.py serve",
+        description="Serve model usage reports from memory over a Unix socket or localhost HTTP.",
+    )
+    parser.add_argument(
+        "--socket",
+        help=f"Unix socket path (default: {DEFAULT_SOCKET_PATH}; ignored with --port).",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP bind host for --port.")
+    parser.add_argument("--port", type=int, help="Serve HTTP on this port instead of a Unix socket.")
+    parser.add_argument("--provider", choices=["codex", "claude", "all"], default="all")
+    parser.add_argument("--source", choices=["codexbar", "logs"], default="codexbar")
+    parser.add_argument("--input", help="Serve a codexbar cost JSON file instead (reloaded on change).")
+    parser.add_argument("--log-index", help="Incremental index file for --source logs.")
+    parser.add_argument("--timeout", type=float, default=model_usage.DEFAULT_FETCH_TIMEOUT)
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help="Seconds between change checks when inotify is unavailable.",
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=DEFAULT_MAX_AGE,
+        help="Refresh at least this often even without file changes.",
+    )
+    return parser
+
+
+def _interrupt(signum: int, frame: Any) -> None:
+    raise KeyboardInterrupt
+
+
+def serve_main(argv: Optional[List[str]] = None) -> int:
+    args = build_serve_parser().parse_args(argv)
+    if args.input == "-":
+        model_usage.eprint("serve cannot read --input from stdin.")
+        return 1
+    args.store_only = False
+    providers = list(model_usage.PROVIDERS) if args.provider == "all" else [args.provider]
+
+    state = UsageState(args, providers)
+    if not state.refresh():
+        return 1
+    try:
+        server = make_server(state, args.socket, args.host, args.port)
+    except OSError as exc:
+        model_usage.eprint(f"Failed to start server: {exc}")
+        return 1
+
+    watcher = make_watcher(watch_roots(args, providers), args.poll_interval)
+    thread = threading.Thread(
+        target=refresh_loop,
+        args=(state, watcher, args.poll_interval, args.max_age),
+        daemon=True,
+    )
+    thread.start()
+    address = f"http://{args.host}:{args.port}" if args.port is not None else server.server_address
+    model_usage.eprint(f"model_usage serving on {address} ({type(watcher).__name__})")
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.port is None:
+            try:
+                os.unlink(server.server_address)
+            except OSError:
+                pass
+    return 0
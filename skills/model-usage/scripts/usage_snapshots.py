@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Merge many codexbar cost snapshots (e.g. one per host) into one payload per provider.
+
+`--input` may name several files, globs or directories. Files are parsed in a
+process pool; rows for the same (host, provider, date) are deduped keeping the
+snapshot with the newest `updatedAt`, then summed across hosts per day.
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Below this many files, process start-up costs more than parallel parsing saves.
+PARALLEL_MIN_FILES = 4
+HOST_FROM_CHOICES = ("file", "dir")
+SUM_FIELDS = (
+    "inputTokens",
+    "outputTokens",
+    "cacheReadTokens",
+    "cacheCreationTokens",
+    "totalTokens",
+    "totalCost",
+)
+
+# (provider, host, updatedAt, daily entries) for one payload in a snapshot file.
+Snapshot = Tuple[str, Optional[str], Optional[str], List[Dict[str, Any]]]
+
+
+def is_pattern(value: str) -> bool:
+    return any(char in value for char in "*?[")
+
+
+def expand_inputs(values: Iterable[str]) -> List[str]:
+    """Expand globs and directories (recursively, `*.json`) into a sorted, unique file list."""
+    paths: List[str] = []
+    for value in values:
+        value = os.path.expanduser(value)
+        if is_pattern(value):
+            paths.extend(sorted(glob.glob(value, recursive=True)))
+        elif os.path.isdir(value):
+            paths.extend(sorted(str(path) for path in Path(value).rglob("*.json")))
+        else:
+            paths.append(value)
+    return list(dict.fromkeys(paths))
+
+
+def read_snapshot(path: str) -> Tuple[List[Snapshot], Optional[str]]:
+    """Parse one snapshot file, returning (payloads, error). Runs in worker processes."""
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError) as exc:
+        return [], f"{path}: {exc}"
+    items = data if isinstance(data, list) else [data]
+    snapshots: List[Snapshot] = []
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get("provider"), str):
+            continue
+        host = item.get("host") or item.get("hostname")
+        updated_at = item.get("updatedAt")
+        daily = item.get("daily")
+        entries = [entry for entry in daily if isinstance(entry, dict)] if isinstance(daily, list) else []
+        snapshots.append(
+            (
+                item["provider"],
+                host if isinstance(host, str) else None,
+                updated_at if isinstance(updated_at, str) else None,
+                entries,
+            )
+        )
+    if not snapshots:
+        return [], f"{path}: no codexbar provider payloads found."
+    return snapshots, None
+
+
+def read_snapshots(
+    paths: List[str], workers: Optional[int] = None
+) -> Tuple[List[Tuple[str, List[Snapshot]]], List[str]]:
+    """Parse files (in a process pool when there are enough of them), in input order."""
+    workers = min(len(paths), workers or os.cpu_count() or 1)
+    if workers > 1 and len(paths) >= PARALLEL_MIN_FILES:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(paths) // (workers * 4))
+            results = list(pool.map(read_snapshot, paths, chunksize=chunksize))
+    else:
+        results = [read_snapshot(path) for path in paths]
+    parsed: List[Tuple[str, List[Snapshot]]] = []
+    errors: List[str] = []
+    for path, (snapshots, error) in zip(paths, results):
+        if error:
+            errors.append(error)
+        else:
+            parsed.append((path, snapshots))
+    return parsed, errors
+
+
+def snapshot_host(path: str, host_from: str) -> str:
+    """Fallback host name when a payload has no `host`: the file stem or its directory name."""
+    resolved = Path(path)
+    if host_from == "dir":
+        return resolved.resolve().parent.name
+    return resolved.stem
+
+
+def merge_day(day: str, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    merged: Dict[str, Any] = {"date": day}
+    for field in SUM_FIELDS:
+        values = [entry[field] for entry in entries if isinstance(entry.get(field), (int, float))]
+        if values:
+            merged[field] = sum(values)
+    costs: Dict[str, float] = {}
+    models_used: Dict[str, None] = {}
+    for entry in entries:
+        breakdowns = entry.get("modelBreakdowns")
+        if isinstance(breakdowns, list):
+            for item in breakdowns:
+                if not isinstance(item, dict):
+                    continue
+                model = item.get("modelName")
+                cost = item.get("cost")
+                if isinstance(model, str) and isinstance(cost, (int, float)):
+                    costs[model] = costs.get(model, 0.0) + float(cost)
+        used = entry.get("modelsUsed")
+        if isinstance(used, list):
+            models_used.update((model, None) for model in used if isinstance(model, str))
+    if costs:
+        merged["modelBreakdowns"] = [
+            {"modelName": model, "cost": cost} for model, cost in costs.items()
+        ]
+    if models_used:
+        merged["modelsUsed"] = list(models_used)
+    return merged
+
+
+def merge_snapshots(
+    parsed: List[Tuple[str, List[Snapshot]]], host_from: str = "file"
+) -> Dict[str, Dict[str, Any]]:
+    """Dedupe (host, provider, date) rows, newest `updatedAt` winning (later file on ties),
+    and sum the surviving rows per (provider, date)."""
+    best: Dict[Tuple[str, str, str], Tuple[Tuple[str, int], Dict[str, Any]]] = {}
+    hosts: Dict[str, Dict[str, None]] = {}
+    updated: Dict[str, str] = {}
+    sequence = 0
+    for path, snapshots in parsed:
+        for provider, host, updated_at, entries in snapshots:
+            host = host or snapshot_host(path, host_from)
+            hosts.setdefault(provider, {})[host] = None
+            if updated_at and updated_at > updated.get(provider, ""):
+                updated[provider] = updated_at
+            rank = (updated_at or "", sequence)
+            sequence += 1
+            for entry in entries:
+                day = entry.get("date")
+                if not isinstance(day, str):
+                    continue
+                key = (host, provider, day)
+                current = best.get(key)
+                if current is None or rank > current[0]:
+                    best[key] = (rank, entry)
+
+    by_day: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+    for (_host, provider, day), (_rank, entry) in best.items():
+        by_day.setdefault(provider, {}).setdefault(day, []).append(entry)
+    payloads: Dict[str, Dict[str, Any]] = {}
+    for provider, days in by_day.items():
+        payload: Dict[str, Any] = {
+            "provider": provider,
+            "source": "snapshots",
+            "hosts": sorted(hosts[provider]),
+            "daily": [merge_day(day, days[day]) for day in sorted(days)],
+        }
+        if provider in updated:
+            payload["updatedAt"] = updated[provider]
+        payloads[provider] = payload
+    return payloads
+
+
+def load_snapshot_payloads(
+    inputs: List[str], host_from: str = "file", workers: Optional[int] = None
+) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """Expand, parse and merge snapshot inputs, returning (payloads by provider, file errors)."""
+    paths = expand_inputs(inputs)
+    if not paths:
+        raise RuntimeError("--input matched no files.")
+    if "-" in paths:
+        raise RuntimeError("--input - (stdin) cannot be combined with other inputs.")
+    parsed, errors = read_snapshots(paths, workers)
+    return merge_snapshots(parsed, host_from), errors
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Persistent SQLite cost history for model_usage.
+
+Ingests codexbar-shaped `daily[]` rows keyed by (provider, date, model) and
+answers the current/all summaries with indexed SQL aggregates, so history
+outlives CodexBar's window and queries stay fast over years of data.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+SCHEMA_VERSION = 2
+MAX_DATE = "9999-12-31"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    provider TEXT NOT NULL,
+    date TEXT NOT NULL,
+    updated_at TEXT,
+    fingerprint TEXT NOT NULL,
+    models_used TEXT NOT NULL,
+    has_costs INTEGER NOT NULL,
+    input_tokens INTEGER NOT NULL DEFAULT 0,
+    output_tokens INTEGER NOT NULL DEFAULT 0,
+    cache_read_tokens INTEGER NOT NULL DEFAULT 0,
+    cache_creation_tokens INTEGER NOT NULL DEFAULT 0,
+    total_tokens INTEGER NOT NULL DEFAULT 0,
+    total_cost REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (provider, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS model_costs (
+    provider TEXT NOT NULL,
+    date TEXT NOT NULL,
+    model TEXT NOT NULL,
+    cost REAL NOT NULL,
+    PRIMARY KEY (provider, date, model)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS model_costs_by_model ON model_costs (provider, model, date);
+"""
+
+# days columns added after schema version 1, with their types.
+TOKEN_COLUMNS = {
+    "input_tokens": "INTEGER",
+    "output_tokens": "INTEGER",
+    "cache_read_tokens": "INTEGER",
+    "cache_creation_tokens": "INTEGER",
+    "total_tokens": "INTEGER",
+    "total_cost": "REAL",
+}
+
+
+def _valid_date(value: Any) -> bool:
+    if not isinstance(value, str):
+        return False
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        return False
+    return True
+
+
+def _day_costs(entry: Dict[str, Any]) -> Dict[str, float]:
+    costs: Dict[str, float] = {}
+    breakdowns = entry.get("modelBreakdowns")
+    if not isinstance(breakdowns, list):
+        return costs
+    for item in breakdowns:
+        if not isinstance(item, dict):
+            continue
+        model = item.get("modelName")
+        cost = item.get("cost")
+        if isinstance(model, str) and isinstance(cost, (int, float)):
+            costs[model] = costs.get(model, 0.0) + float(cost)
+    return costs
+
+
+def _day_tokens(entry: Dict[str, Any], costs: Dict[str, float]) -> List[Any]:
+    values: List[Any] = []
+    for field in ("inputTokens", "outputTokens", "cacheReadTokens", "cacheCreationTokens"):
+        value = entry.get(field)
+        values.append(int(value) if isinstance(value, (int, float)) else 0)
+    total_tokens = entry.get("totalTokens")
+    values.append(int(total_tokens) if isinstance(total_tokens, (int, float)) else sum(values))
+    total_cost = entry.get("totalCost")
+    values.append(float(total_cost) if isinstance(total_cost, (int, float)) else sum(costs.values()))
+    return values
+
+
+def _models_used(entry: Dict[str, Any]) -> List[str]:
+    models = entry.get("modelsUsed")
+    if not isinstance(models, list):
+        return []
+    return [model for model in models if isinstance(model, str)]
+
+
+class UsageStore:
+    def __init__(self, path: str) -> None:
+        db_path = Path(path).expanduser()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(db_path))
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _migrate(self) -> None:
+        existing = {row[1] for row in self.conn.execute("PRAGMA table_info(days)")}
+        with self.conn:
+            for column, kind in TOKEN_COLUMNS.items():
+                if column not in existing:
+                    self.conn.execute(
+                        f"ALTER TABLE days ADD COLUMN {column} {kind} NOT NULL DEFAULT 0"
+                    )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "UsageStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def ingest(
+        self, provider: str, entries: Iterable[Dict[str, Any]], updated_at: Optional[str] = None
+    ) -> int:
+        """Upsert daily rows, skipping days that are unchanged or not newer.
+
+        Returns the number of days written.
+        """
+        written = 0
+        with self.conn:
+            for entry in entries:
+                day = entry.get("date")
+                if not _valid_date(day):
+                    continue
+                costs = _day_costs(entry)
+                models_used = _models_used(entry)
+                tokens = _day_tokens(entry, costs)
+                fingerprint = json.dumps([sorted(costs.items()), models_used, tokens])
+                row = self.conn.execute(
+                    "SELECT updated_at, fingerprint FROM days WHERE provider = ? AND date = ?",
+                    (provider, day),
+                ).fetchone()
+                if row is not None:
+                    stored_updated_at, stored_fingerprint = row
+                    if stored_fingerprint == fingerprint:
+                        continue
+                    if updated_at and stored_updated_at and updated_at < stored_updated_at:
+                        continue
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO days (provider, date, updated_at, fingerprint, "
+                    "models_used, has_costs, input_tokens, output_tokens, cache_read_tokens, "
+                    "cache_creation_tokens, total_tokens, total_cost) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        provider,
+                        day,
+                        updated_at,
+                        fingerprint,
+                        json.dumps(models_used),
+                        int(bool(costs)),
+                        *tokens,
+                    ),
+                )
+                self.conn.execute(
+                    "DELETE FROM model_costs WHERE provider = ? AND date = ?", (provider, day)
+                )
+                self.conn.executemany(
+                    "INSERT INTO model_costs VALUES (?, ?, ?, ?)",
+                    [(provider, day, model, cost) for model, cost in costs.items()],
+                )
+                written += 1
+        return written
+
+    def day_count(
+        self, provider: str, since: Optional[str] = None, until: Optional[str] = None
+    ) -> int:
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM days WHERE provider = ? AND date >= ? AND date <= ?",
+            (provider, since or "", until or MAX_DATE),
+        ).fetchone()
+        return int(row[0])
+
+    def model_totals(
+        self, provider: str, since: Optional[str] = None, until: Optional[str] = None
+    ) -> Dict[str, float]:
+        rows = self.conn.execute(
+            "SELECT model, SUM(cost) FROM model_costs "
+            "WHERE provider = ? AND date >= ? AND date <= ? GROUP BY model",
+            (provider, since or "", until or MAX_DATE),
+        )
+        return {model: float(total) for model, total in rows}
+
+    def current_model(
+        self, provider: str, since: Optional[str] = None, until: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        row = self.conn.execute(
+            "SELECT date, models_used, has_costs FROM days "
+            "WHERE provider = ? AND date >= ? AND date <= ? "
+            "AND (has_costs = 1 OR models_used != '[]') "
+            "ORDER BY date DESC LIMIT 1",
+            (provider, since or "", until or MAX_DATE),
+        ).fetchone()
+        if row is None:
+            return None, None
+        day, models_used, has_costs = row
+        if has_costs:
+            top = self.conn.execute(
+                "SELECT model FROM model_costs WHERE provider = ? AND date = ? "
+                "ORDER BY cost DESC LIMIT 1",
+                (provider, day),
+            ).fetchone()
+            return top[0], day
+        return json.loads(models_used)[-1], day
+
+    def latest_day_cost(
+        self,
+        provider: str,
+        model: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> Tuple[Optional[str], Optional[float]]:
+        row = self.conn.execute(
+            "SELECT date, cost FROM model_costs "
+            "WHERE provider = ? AND model = ? AND date >= ? AND date <= ? "
+            "ORDER BY date DESC LIMIT 1",
+            (provider, model, since or "", until or MAX_DATE),
+        ).fetchone()
+        if row is None:
+            return None, None
+        return row[0], float(row[1])
+
+    def token_totals(
+        self, provider: str, since: Optional[str] = None, until: Optional[str] = None
+    ) -> Dict[str, float]:
+        row = self.conn.execute(
+            "SELECT COUNT(*), TOTAL(input_tokens), TOTAL(output_tokens), "
+            "TOTAL(cache_read_tokens), TOTAL(cache_creation_tokens), TOTAL(total_tokens), "
+            "TOTAL(total_cost) FROM days WHERE provider = ? AND date >= ? AND date <= ?",
+            (provider, since or "", until or MAX_DATE),
+        ).fetchone()
+        keys = (
+            "days",
+            "inputTokens",
+            "outputTokens",
+            "cacheReadTokens",
+            "cacheCreationTokens",
+            "totalTokens",
+        )
+        totals: Dict[str, float] = {key: int(value) for key, value in zip(keys, row)}
+        totals["totalCost"] = float(row[-1])
+        return totals
+
+    def daily_costs(
+        self, provider: str, since: Optional[str] = None, until: Optional[str] = None
+    ) -> Iterator[Tuple[str, str, float]]:
+        yield from self.conn.execute(
+            "SELECT date, model, cost FROM model_costs "
+            "WHERE provider = ? AND date >= ? AND date <= ? ORDER BY date",
+            (provider, since or "", until or MAX_DATE),
+        )
+
+    def rows(
+        self, provider: str, since: Optional[str] = None, until: Optional[str] = None
+    ) -> Iterator[Tuple[Any, ...]]:
+        """Yield (date, model, cost, input, output, cache read, cache creation, total tokens,
+        day cost) per (date, model); days without model costs yield model and cost None."""
+        yield from self.conn.execute(
+            "SELECT d.date, m.model, m.cost, d.input_tokens, d.output_tokens, "
+            "d.cache_read_tokens, d.cache_creation_tokens, d.total_tokens, d.total_cost "
+            "FROM days d LEFT JOIN model_costs m ON m.provider = d.provider AND m.date = d.date "
+            "WHERE d.provider = ? AND d.date >= ? AND d.date <= ? ORDER BY d.date, m.model",
+            (provider, since or "", until or MAX_DATE),
+        )
+
+    def view(self, provider: str) -> "ProviderView":
+        return ProviderView(self, provider)
+
+
+def _date_key(value: Optional[date]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+class ProviderView:
+    """Read-only view of one provider's history with the DailyIndex query API."""
+
+    __slots__ = ("store", "provider")
+
+    def __init__(self, store: UsageStore, provider: str) -> None:
+        self.store = store
+        self.provider = provider
+
+    def count(self, since: Optional[date] = None, until: Optional[date] = None) -> int:
+        return self.store.day_count(self.provider, _date_key(since), _date_key(until))
+
+    def current_model(
+        self, since: Optional[date] = None, until: Optional[date] = None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        return self.store.current_model(self.provider, _date_key(since), _date_key(until))
+
+    def model_totals(
+        self, since: Optional[date] = None, until: Optional[date] = None
+    ) -> Dict[str, float]:
+        return self.store.model_totals(self.provider, _date_key(since), _date_key(until))
+
+    def latest_day_cost(
+        self, model: str, since: Optional[date] = None, until: Optional[date] = None
+    ) -> Tuple[Optional[str], Optional[float]]:
+        return self.store.latest_day_cost(
+            self.provider, model, _date_key(since), _date_key(until)
+        )
+
+    def token_totals(
+        self, since: Optional[date] = None, until: Optional[date] = None
+    ) -> Dict[str, float]:
+        return self.store.token_totals(self.provider, _date_key(since), _date_key(until))
+
+    def rows(
+        self, since: Optional[date] = None, until: Optional[date] = None
+    ) -> Iterator[Tuple[Any, ...]]:
+        return self.store.rows(self.provider, _date_key(since), _date_key(until))
+
+    def daily_costs(
+        self, since: Optional[date] = None, until: Optional[date] = None
+    ) -> Iterator[Tuple[int, str, float]]:
+        rows = self.store.daily_costs(self.provider, _date_key(since), _date_key(until))
+        ordinals: Dict[str, int] = {}
+        for day, model, cost in rows:
+            ordinal = ordinals.get(day)
+            if ordinal is None:
+                ordinal = ordinals[day] = date.fromisoformat(day).toordinal()
+            yield ordinal, model, cost
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Streaming decoder for codexbar cost JSON.
+
+Yields `daily[]` entries one at a time from a file or stdin so aggregation
+starts before the input is complete and memory does not grow with the raw
+text. Uses ijson when it is installed, else a chunked `raw_decode` scanner.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import sys
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import ijson
+except ImportError:  # optional dependency
+    ijson = None
+
+CHUNK_SIZE = 1 << 16
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# (kind, key, value): ("start", None, is_array) once, then per payload
+# ("key", name, scalar), ("entry", None, dict) and ("end", None, None).
+Event = Tuple[str, Optional[str], Any]
+
+
+class _ChunkReader:
+    """Incremental JSON scanner over a text handle using `JSONDecoder.raw_decode`."""
+
+    def __init__(self, handle: Any, chunk_size: int) -> None:
+        self.handle = handle
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size: int) -> bool:
+        if self.eof:
+            return False
+        chunk = self.handle.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it ('' at EOF)."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill(self.chunk_size):
+                return ""
+
+    def take(self) -> str:
+        char = self.peek()
+        self.pos += 1
+        return char
+
+    def expect(self, char: str) -> None:
+        found = self.take()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in codexbar JSON, found {found or 'EOF'!r}.")
+
+    def value(self) -> Any:
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill(size):
+                    raise
+                size *= 2
+                continue
+            # A number ending exactly at the buffer edge may continue in the next chunk.
+            if end == len(self.buf) and self.fill(size):
+                continue
+            self.pos = end
+            return value
+
+
+def _chunked_payload(reader: _ChunkReader) -> Iterator[Event]:
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.take()
+        yield ("end", None, None)
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise ValueError("Expected an object key in codexbar JSON.")
+        reader.expect(":")
+        if key == "daily" and reader.peek() == "[":
+            reader.take()
+            if reader.peek() == "]":
+                reader.take()
+            else:
+                while True:
+                    entry = reader.value()
+                    if isinstance(entry, dict):
+                        yield ("entry", None, entry)
+                    separator = reader.take()
+                    if separator == "]":
+                        break
+                    if separator != ",":
+                        raise ValueError("Malformed daily[] array in codexbar JSON.")
+        else:
+            value = reader.value()
+            if not isinstance(value, (dict, list)):
+                yield ("key", key, value)
+        separator = reader.take()
+        if separator == "}":
+            break
+        if separator != ",":
+            raise ValueError("Malformed payload object in codexbar JSON.")
+    yield ("end", None, None)
+
+
+def chunked_events(handle: Any, chunk_size: int = CHUNK_SIZE) -> Iterator[Event]:
+    reader = _ChunkReader(handle, chunk_size)
+    top = reader.peek()
+    if top not in ("{", "["):
+        raise RuntimeError("Unsupported JSON input format.")
+    yield ("start", None, top == "[")
+    if top == "{":
+        yield from _chunked_payload(reader)
+        return
+    reader.take()
+    if reader.peek() == "]":
+        return
+    while True:
+        if reader.peek() == "{":
+            yield from _chunked_payload(reader)
+        else:
+            reader.value()
+        separator = reader.take()
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError("Malformed codexbar JSON array.")
+
+
+def ijson_events(handle: Any) -> Iterator[Event]:
+    events = ijson.parse(handle, use_float=True)
+    base: Optional[str] = None
+    builder: Any = None
+    depth = 0
+    for prefix, event, value in events:
+        if builder is not None:
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+                if depth == 0:
+                    yield ("entry", None, builder.value)
+                    builder = None
+            continue
+        if base is None:
+            if event == "start_map":
+                base = ""
+            elif event == "start_array":
+                base = "item"
+            else:
+                raise RuntimeError("Unsupported JSON input format.")
+            yield ("start", None, bool(base))
+            continue
+        key_prefix = f"{base}." if base else ""
+        if prefix == base and event == "end_map":
+            yield ("end", None, None)
+        elif prefix == f"{key_prefix}daily.item" and event == "start_map":
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+            depth = 1
+        elif event in ("string", "number", "boolean", "null") and prefix.startswith(key_prefix):
+            key = prefix[len(key_prefix) :]
+            if key and "." not in key:
+                yield ("key", key, value)
+
+
+def stream_payloads(
+    input_path: str,
+    consume: Callable[[Dict[str, Any], Iterator[Dict[str, Any]]], Any],
+    chunk_size: int = CHUNK_SIZE,
+) -> Tuple[List[Tuple[Dict[str, Any], Any]], bool]:
+    """Stream every payload object in `input_path` ('-' for stdin).
+
+    `consume(meta, entries)` is called once per payload with the scalar fields
+    seen so far and an iterator over its daily entries. Returns a list of
+    (meta, result) per payload plus whether the input was a JSON array.
+    """
+    binary = ijson is not None
+    if input_path == "-":
+        handle = sys.stdin.buffer if binary else sys.stdin
+        return _drive(handle, consume, chunk_size)
+    with open(input_path, "rb") if binary else open(input_path, "r", encoding="utf-8") as handle:
+        return _drive(handle, consume, chunk_size)
+
+
+def _drive(
+    handle: Any,
+    consume: Callable[[Dict[str, Any], Iterator[Dict[str, Any]]], Any],
+    chunk_size: int,
+) -> Tuple[List[Tuple[Dict[str, Any], Any]], bool]:
+    source = ijson_events(handle) if ijson is not None else chunked_events(handle, chunk_size)
+    pending: List[Event] = []
+
+    def next_event() -> Optional[Event]:
+        if pending:
+            return pending.pop()
+        return next(source, None)
+
+    def entries() -> Iterator[Dict[str, Any]]:
+        while True:
+            event = next_event()
+            if event is None:
+                return
+            if event[0] != "entry":
+                pending.append(event)
+                return
+            yield event[2]
+
+    payloads: List[Tuple[Dict[str, Any], Any]] = []
+    meta: Dict[str, Any] = {}
+    result: Any = None
+    consumed = False
+    is_array = False
+    while True:
+        event = next_event()
+        if event is None:
+            break
+        kind, key, value = event
+        if kind == "start":
+            is_array = value
+        elif kind == "key":
+            meta[key] = value
+        elif kind == "entry":
+            pending.append(event)
+            stream = entries()
+            result = consume(dict(meta), stream)
+            for _ in stream:
+                pass
+            consumed = True
+        else:
+            if not consumed:
+                result = consume(dict(meta), iter(()))
+            payloads.append((meta, result))
+            meta, result, consumed = {}, None, False
+    return payloads, is_array
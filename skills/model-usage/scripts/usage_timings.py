@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Phase timing instrumentation for model_usage (`--timings`, `--profile`).
+
+Phases record wall and CPU time plus optional fields (bytes, provider);
+counters accumulate row statistics. When no recorder is active every hook
+is a cheap no-op, so the instrumented code paths cost nothing by default.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+_ACTIVE: Optional["Timings"] = None
+
+
+class Timings:
+    def __init__(self) -> None:
+        self.phases: List[Dict[str, Any]] = []
+        self.counters: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+
+    @contextmanager
+    def phase(self, name: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+        """Time a block; callers may add fields (e.g. bytes) to the yielded record."""
+        record: Dict[str, Any] = {"phase": name, **fields}
+        wall = time.perf_counter()
+        # Per-thread CPU so concurrent provider fetches are not double counted.
+        cpu = time.thread_time()
+        try:
+            yield record
+        finally:
+            record["wallMs"] = round((time.perf_counter() - wall) * 1000, 3)
+            record["cpuMs"] = round((time.thread_time() - cpu) * 1000, 3)
+            with self.lock:
+                self.phases.append(record)
+
+    def count(self, key: str, amount: int = 1) -> None:
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "totalWallMs": round((time.perf_counter() - self.wall_start) * 1000, 3),
+            "totalCpuMs": round((time.process_time() - self.cpu_start) * 1000, 3),
+            "phases": list(self.phases),
+            **self.counters,
+        }
+
+    def render_text(self) -> str:
+        data = self.as_dict()
+        lines = [f"Timings (wall / cpu): {data['totalWallMs']:.1f} ms / {data['totalCpuMs']:.1f} ms"]
+        for record in self.phases:
+            extra = [
+                f"{key}={value}"
+                for key, value in record.items()
+                if key not in ("phase", "wallMs", "cpuMs")
+            ]
+            suffix = f"  {' '.join(extra)}" if extra else ""
+            lines.append(
+                f"- {record['phase']:<10} {record['wallMs']:10.2f} ms {record['cpuMs']:10.2f} ms{suffix}"
+            )
+        for key, value in self.counters.items():
+            lines.append(f"{key}: {value}")
+        return "\n".join(lines)
+
+
+def start() -> Timings:
+    global _ACTIVE
+    _ACTIVE = Timings()
+    return _ACTIVE
+
+
+def stop() -> None:
+    global _ACTIVE
+    _ACTIVE = None
+
+
+def phase(name: str, **fields: Any) -> ContextManager[Dict[str, Any]]:
+    if _ACTIVE is None:
+        return nullcontext({})
+    return _ACTIVE.phase(name, **fields)
+
+
+def count(key: str, amount: int = 1) -> None:
+    if _ACTIVE is not None:
+        _ACTIVE.count(key, amount)
+
+
+def active() -> bool:
+    return _ACTIVE is not None
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Bounded-memory heavy hitters for `--top K` (weighted Space-Saving).
+
+Tracks at most `capacity` keys no matter how many distinct model names the
+input has. Estimates never undercount; each overcounts by at most its
+recorded error, and every error is at most total / capacity. With no more
+distinct keys than `capacity` the summary is exact.
+"""
+
+from __future__ import annotations
+
+from heapq import heappush, heapreplace
+from typing import Any, Dict, Hashable, List, Tuple
+
+# Counters kept per requested top entry; the error bound is total / (K * factor).
+TOP_CAPACITY_FACTOR = 10
+
+
+class SpaceSaving:
+    __slots__ = ("capacity", "counts", "errors", "heap", "total")
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.counts: Dict[Hashable, float] = {}
+        self.errors: Dict[Hashable, float] = {}
+        # One (count, key) entry per tracked key. Increments leave entries stale
+        # (too low); they are corrected lazily when they reach the top.
+        self.heap: List[Tuple[float, Any]] = []
+        self.total = 0.0
+
+    def add(self, key: Hashable, weight: float) -> None:
+        if not weight > 0:
+            return
+        self.total += weight
+        counts = self.counts
+        if key in counts:
+            counts[key] += weight
+            return
+        if len(counts) < self.capacity:
+            counts[key] = weight
+            self.errors[key] = 0.0
+            heappush(self.heap, (weight, key))
+            return
+        heap = self.heap
+        while True:
+            floor, victim = heap[0]
+            actual = counts[victim]
+            if actual == floor:
+                break
+            heapreplace(heap, (actual, victim))
+        heapreplace(heap, (floor + weight, key))
+        del counts[victim]
+        del self.errors[victim]
+        counts[key] = floor + weight
+        self.errors[key] = floor
+
+    @property
+    def exact(self) -> bool:
+        return not any(self.errors.values())
+
+    @property
+    def error_bound(self) -> float:
+        return 0.0 if self.exact else self.total / self.capacity
+
+    def top(self, k: int) -> List[Tuple[Any, float, float]]:
+        """Return up to k (key, estimated total, max overcount), largest first."""
+        ranked = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(key, count, self.errors[key]) for key, count in ranked]
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark SKILL.md frontmatter parsing on large synthetic files.
+
+Compares three paths on each generated file:
+    full_safe_loader   read_text() + splitlines() + yaml.safe_load (the old path)
+    head_c_loader      streamed head + CSafeLoader (SafeLoader without libyaml)
+    head_simple        streamed head + the built-in key/value fallback parser
+
+Usage:
+    bench_frontmatter.py [--body-sizes 65536,1048576,16777216] [--install-entries 200]
+                         [--repeat 5] [--output results.json]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+import quick_validate
+
+DEFAULT_BODY_SIZES = (64 * 1024, 1024 * 1024, 16 * 1024 * 1024)
+DEFAULT_INSTALL_ENTRIES = 200
+
+
+def generate_skill_md(body_bytes: int, install_entries: int = DEFAULT_INSTALL_ENTRIES) -> str:
+    """Build a SKILL.md with a large flow-style `metadata` block and a ~body_bytes body."""
+    install = [
+        {
+            "id": f"brew-{index}",
+            "kind": "brew",
+            "formula": f"example/tap/tool-{index}",
+            "bins": [f"tool-{index}"],
+            "label": f"Install tool {index} (brew)",
+        }
+        for index in range(install_entries)
+    ]
+    metadata = {"openclaw": {"emoji": "x", "os": ["darwin", "linux"], "requires": {"bins": ["tool-0"]}, "install": install}}
+    metadata_text = json.dumps(metadata, indent=2).replace("\n", "\n  ")
+    paragraph = "Use the bundled scripts for repeatable work; keep SKILL.md short and link references.\n"
+    body = "# Synthetic skill\n\n" + paragraph * (body_bytes // len(paragraph) + 1)
+    return (
+        "---\n"
+        "name: synthetic-skill\n"
+        'description: "Synthetic skill used to benchmark frontmatter parsing."\n'
+        f"metadata:\n  {metadata_text}\n"
+        "---\n"
+        f"{body[:body_bytes]}"
+    )
+
+
+def _legacy_extract(content: str) -> Optional[str]:
+    lines = content.splitlines()
+    if not lines or lines[0].strip() != "---":
+        return None
+    for i in range(1, len(lines)):
+        if lines[i].strip() == "---":
+            return "\n".join(lines[1:i])
+    return None
+
+
+def full_safe_loader(path: Path) -> dict:
+    text = _legacy_extract(path.read_text(encoding="utf-8"))
+    return quick_validate.get_yaml().safe_load(text)
+
+
+def head_c_loader(path: Path) -> dict:
+    with open(path, "rb") as handle:
+        text, _ = quick_validate.read_frontmatter(handle)
+    return quick_validate.get_yaml().load(text, Loader=quick_validate._yaml_loader())
+
+
+def head_simple(path: Path) -> dict:
+    with open(path, "rb") as handle:
+        text, _ = quick_validate.read_frontmatter(handle)
+    return quick_validate._parse_simple_frontmatter(text)
+
+
+PATHS: tuple[tuple[str, Callable[[Path], dict]], ...] = (
+    ("full_safe_loader", full_safe_loader),
+    ("head_c_loader", head_c_loader),
+    ("head_simple", head_simple),
+)
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def parse_sizes(value: str) -> list[int]:
+    try:
+        sizes = [int(part.replace("_", "")) for part in value.split(",") if part.strip()]
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError("must be comma-separated integers") from exc
+    if not sizes or min(sizes) < 0:
+        raise argparse.ArgumentTypeError("must be non-negative integers")
+    return sizes
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark SKILL.md frontmatter parsing paths.")
+    parser.add_argument(
+        "--body-sizes",
+        type=parse_sizes,
+        default=list(DEFAULT_BODY_SIZES),
+        help="Comma-separated body sizes in bytes (default: 64 KiB, 1 MiB, 16 MiB).",
+    )
+    parser.add_argument("--install-entries", type=int, default=DEFAULT_INSTALL_ENTRIES)
+    parser.add_argument("--repeat", type=int, default=5, help="Best-of runs per path.")
+    parser.add_argument("--output", help="Write JSON results here (default: stdout).")
+    args = parser.parse_args(argv)
+    if quick_validate.get_yaml() is None:
+        print("PyYAML is required for this benchmark.", file=sys.stderr)
+        return 1
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench_frontmatter_") as work_dir:
+        for body_bytes in args.body_sizes:
+            path = Path(work_dir) / f"SKILL-{body_bytes}.md"
+            path.write_text(generate_skill_md(body_bytes, args.install_entries), encoding="utf-8")
+            for name, func in PATHS:
+                seconds = best_of(lambda: func(path), max(1, args.repeat))
+                results.append(
+                    {"bodyBytes": body_bytes, "fileBytes": path.stat().st_size, "path": name, "seconds": seconds}
+                )
+                print(f"{body_bytes:>10} {name:<18} {seconds * 1000:10.2f} ms", file=sys.stderr)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "libyaml": bool(getattr(quick_validate.yaml, "__with_libyaml__", False)),
+        "installEntries": args.install_entries,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Check the import-time cost of the skill-creator scripts against a budget.
+
+Each script module is imported in a fresh interpreter under
+`python -X importtime`; the cumulative time of its own line is its
+cold-start import cost (best of --runs). The budget file holds a limit in
+milliseconds per script plus modules each script must not import at load
+time (e.g. PyYAML, which is imported only when a SKILL.md is parsed).
+
+Usage:
+    bench_startup.py [--runs 5] [--budget startup_budget.json] [--output results.json]
+    bench_startup.py --update-budget [--headroom 2.0]
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from pathlib import Path
+from typing import Optional
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+SCRIPTS = ("init_skill", "quick_validate", "package_skill")
+DEFAULT_BUDGET_PATH = SCRIPT_DIR / "startup_budget.json"
+DEFAULT_RUNS = 5
+DEFAULT_HEADROOM = 2.0
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """Parse `-X importtime` lines into {module, selfUs, cumulativeUs, depth} records."""
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        records.append(
+            {
+                "module": stripped,
+                "selfUs": int(fields[0]),
+                "cumulativeUs": int(fields[1]),
+                "depth": (len(name) - len(stripped) - 1) // 2,
+            }
+        )
+    return records
+
+
+def measure_import(module: str, python: str = sys.executable) -> list[dict]:
+    completed = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(SCRIPT_DIR),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(completed.stderr)
+
+
+def bench_script(module: str, runs: int, python: str = sys.executable) -> dict:
+    best: Optional[list[dict]] = None
+    best_us = None
+    for _ in range(runs):
+        records = measure_import(module, python)
+        own = [record for record in records if record["module"] == module and record["depth"] == 0]
+        if not own:
+            raise RuntimeError(f"{module} did not appear in -X importtime output")
+        if best_us is None or own[-1]["cumulativeUs"] < best_us:
+            best, best_us = records, own[-1]["cumulativeUs"]
+    # Modules imported while loading `module` follow the interpreter's own start-up imports.
+    start = max(i for i, record in enumerate(best) if record["module"] == module and record["depth"] == 0)
+    first = start
+    while first > 0 and best[first - 1]["depth"] > 0:
+        first -= 1
+    loaded = best[first : start + 1]
+    heaviest = sorted(loaded[:-1], key=lambda record: record["selfUs"], reverse=True)[:5]
+    return {
+        "script": module,
+        "importMs": round(best_us / 1000, 2),
+        "modules": sorted({record["module"] for record in loaded}),
+        "heaviest": [{"module": record["module"], "selfMs": round(record["selfUs"] / 1000, 2)} for record in heaviest],
+    }
+
+
+def check_budget(results: list[dict], budget: dict) -> list[str]:
+    """Return one message per script that is over its time limit or loads a forbidden module."""
+    problems = []
+    limits = budget.get("importMs", {})
+    forbidden = budget.get("forbiddenImports", {})
+    for result in results:
+        script = result["script"]
+        limit = limits.get(script)
+        if limit is not None and result["importMs"] > limit:
+            problems.append(f"{script}: import takes {result['importMs']:.1f} ms, budget {limit} ms")
+        loaded = set(result["modules"])
+        for module in forbidden.get(script, []):
+            if module in loaded:
+                problems.append(f"{script}: imports {module} at load time")
+    return problems
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check skill-creator script import time against a budget.")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Best-of runs per script.")
+    parser.add_argument("--budget", default=str(DEFAULT_BUDGET_PATH), help="Budget file (JSON).")
+    parser.add_argument("--output", help="Write JSON results here (default: stdout).")
+    parser.add_argument(
+        "--update-budget",
+        action="store_true",
+        help="Rewrite the time limits as the measured times times --headroom.",
+    )
+    parser.add_argument("--headroom", type=float, default=DEFAULT_HEADROOM)
+    args = parser.parse_args(argv)
+
+    budget_path = Path(args.budget)
+    try:
+        budget = json.loads(budget_path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        budget = {}
+    except (OSError, ValueError) as exc:
+        print(f"Failed to read budget: {exc}", file=sys.stderr)
+        return 1
+
+    results = [bench_script(script, max(1, args.runs)) for script in SCRIPTS]
+    for result in results:
+        print(f"{result['script']:<16} {result['importMs']:8.2f} ms", file=sys.stderr)
+
+    if args.update_budget:
+        budget["importMs"] = {result["script"]: round(result["importMs"] * args.headroom) for result in results}
+        budget_path.write_text(json.dumps(budget, indent=2) + "\n", encoding="utf-8")
+    problems = check_budget(results, budget)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "runs": args.runs,
+        "results": results,
+        "problems": problems,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    for message in problems:
+        print(f"Over budget: {message}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
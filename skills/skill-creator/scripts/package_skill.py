@@ -11,10 +11,14 @@ Example:
 """
 
 import sys
-import zipfile
 from pathlib import Path
 
-from quick_validate import validate_skill
+
+def validate_skill(skill_path):
+    # Imported on first use: quick_validate pulls in PyYAML when it parses.
+    from quick_validate import validate_skill as validate
+
+    return validate(skill_path)
 
 
 def _is_within(path: Path, root: Path) -> bool:
@@ -74,6 +78,8 @@ def package_skill(skill_path, output_dir=None):
 
     EXCLUDED_DIRS = {".git", ".svn", ".hg", "__pycache__", "node_modules"}
 
+    import zipfile
+
     # Create the .skill file (zip format)
     try:
         with zipfile.ZipFile(skill_filename, "w", zipfile.ZIP_DEFLATED) as zipf:
@@ -1,29 +1,89 @@
 #!/usr/bin/env python3
 """
 Quick validation script for skills - minimal version
+
+Usage:
+    python quick_validate.py <skill_directory>
+    python quick_validate.py --all [root-or-glob ...] [--workers N]
+    python quick_validate.py --cache [cache-file] ...
 """
 
+import io
+import json
+import os
 import re
 import sys
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
 
-try:
-    import yaml
-except ModuleNotFoundError:
-    yaml = None
+# PyYAML and the modules used only by the CLI, the cache or --all are
+# imported on first use so that importing this module stays cheap.
+_NOT_IMPORTED = object()
+yaml = _NOT_IMPORTED
 
 MAX_SKILL_NAME_LENGTH = 64
+DEFAULT_SKILLS_ROOT = Path(__file__).resolve().parents[2]
+SKIPPED_DIRS = {".git", ".svn", ".hg", "__pycache__", "node_modules"}
+
+# Bump whenever a rule changes so cached verdicts from older rules are ignored.
+RULES_VERSION = 1
+DEFAULT_CACHE_PATH = Path("~/.cache/openclaw/skill-validate.json")
+MAX_CACHE_ENTRIES = 4096
+# Frontmatter larger than this is rejected without reading further.
+MAX_FRONTMATTER_BYTES = 256 * 1024
+
+
+def read_frontmatter(stream, limit: int = MAX_FRONTMATTER_BYTES) -> tuple[Optional[str], Optional[str]]:
+    """
+    Read the `---` fenced frontmatter from the start of a binary stream.
 
+    Only the head of the stream is consumed, up to the closing fence or
+    `limit` bytes. Returns (frontmatter text, None) or (None, error message).
+    """
+    line = stream.readline(limit + 1)
+    if line.strip() != b"---":
+        return None, "Invalid frontmatter format"
+    consumed = len(line)
+    lines = []
+    while True:
+        line = stream.readline(limit - consumed + 1)
+        if not line:
+            return None, "Invalid frontmatter format"
+        consumed += len(line)
+        if consumed > limit:
+            return None, f"Frontmatter exceeds {limit} bytes"
+        if line.strip() == b"---":
+            break
+        lines.append(line)
+    try:
+        return b"".join(lines).decode("utf-8"), None
+    except UnicodeDecodeError as e:
+        return None, f"Could not read SKILL.md: {e}"
+
+
+def get_yaml():
+    """Return the PyYAML module, importing it on first use, or None when it is not installed."""
+    global yaml
+    if yaml is _NOT_IMPORTED:
+        try:
+            import yaml as module
+        except ModuleNotFoundError:
+            module = None
+        yaml = module
+    return yaml
 
-def _extract_frontmatter(content: str) -> Optional[str]:
-    lines = content.splitlines()
-    if not lines or lines[0].strip() != "---":
-        return None
-    for i in range(1, len(lines)):
-        if lines[i].strip() == "---":
-            return "\n".join(lines[1:i])
-    return None
+
+def yaml_available() -> bool:
+    if yaml is _NOT_IMPORTED:
+        import importlib.util
+
+        return importlib.util.find_spec("yaml") is not None
+    return yaml is not None
+
+
+def _yaml_loader():
+    # libyaml's CSafeLoader is several times faster than the pure-Python SafeLoader.
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
 def _parse_simple_frontmatter(frontmatter_text: str) -> Optional[dict[str, str]]:
@@ -64,8 +124,63 @@ def _parse_simple_frontmatter(frontmatter_text: str) -> Optional[dict[str, str]]
     return parsed
 
 
-def validate_skill(skill_path):
-    """Basic validation of a skill"""
+def _cache_key(data: bytes) -> str:
+    import hashlib
+
+    # Checking for PyYAML without importing it keeps cache hits parse-free.
+    loader = "yaml" if yaml_available() else "simple"
+    return f"{RULES_VERSION}:{loader}:{hashlib.sha256(data).hexdigest()}"
+
+
+def load_cache(cache_path) -> dict[str, list]:
+    """Read a validation cache file; a missing or unreadable file is an empty cache."""
+    try:
+        with open(Path(cache_path).expanduser(), encoding="utf-8") as handle:
+            data = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    entries = data.get("entries") if isinstance(data, dict) else None
+    return entries if isinstance(entries, dict) else {}
+
+
+def save_cache(cache_path, cache: dict[str, list]) -> None:
+    """
+    Merge `cache` into the file and replace it atomically, so concurrent
+    runs never see a partial file and rarely drop each other's entries.
+    """
+    path = Path(cache_path).expanduser()
+    entries = load_cache(path)
+    entries.update(cache)
+    if len(entries) > MAX_CACHE_ENTRIES:
+        entries = dict(list(entries.items())[-MAX_CACHE_ENTRIES:])
+    write_json_atomic(path, {"entries": entries})
+
+
+def write_json_atomic(path: Path, data) -> None:
+    import tempfile
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(data, handle, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def validate_skill(skill_path, cache: Optional[dict[str, list]] = None):
+    """
+    Basic validation of a skill.
+
+    With `cache` (see load_cache/save_cache), verdicts are looked up and
+    stored by SHA-256 of the SKILL.md bytes plus RULES_VERSION, so an
+    unchanged file is never parsed again.
+    """
     skill_path = Path(skill_path)
 
     skill_md = skill_path / "SKILL.md"
@@ -73,28 +188,61 @@ def validate_skill(skill_path):
         return False, "SKILL.md not found"
 
     try:
-        content = skill_md.read_text(encoding="utf-8")
+        if cache is None:
+            with open(skill_md, "rb") as handle:
+                frontmatter_text, error = read_frontmatter(handle)
+            return _validate_frontmatter_text(frontmatter_text, error)
+        data = skill_md.read_bytes()
     except OSError as e:
         return False, f"Could not read SKILL.md: {e}"
 
-    frontmatter_text = _extract_frontmatter(content)
+    key = _cache_key(data)
+    cached = cache.get(key)
+    if isinstance(cached, list) and len(cached) == 2:
+        return bool(cached[0]), str(cached[1])
+    valid, message = _validate_content(data)
+    cache[key] = [valid, message]
+    return valid, message
+
+
+def parse_skill_md(data: bytes) -> tuple[Optional[dict], Optional[str]]:
+    """Return (frontmatter, None) for SKILL.md bytes, or (None, error message)."""
+    frontmatter_text, error = read_frontmatter(io.BytesIO(data))
     if frontmatter_text is None:
-        return False, "Invalid frontmatter format"
-    if yaml is not None:
+        return None, error
+    return load_frontmatter(frontmatter_text)
+
+
+def load_frontmatter(frontmatter_text: str) -> tuple[Optional[dict], Optional[str]]:
+    if get_yaml() is not None:
         try:
-            frontmatter = yaml.safe_load(frontmatter_text)
+            frontmatter = yaml.load(frontmatter_text, Loader=_yaml_loader())
             if not isinstance(frontmatter, dict):
-                return False, "Frontmatter must be a YAML dictionary"
+                return None, "Frontmatter must be a YAML dictionary"
         except yaml.YAMLError as e:
-            return False, f"Invalid YAML in frontmatter: {e}"
+            return None, f"Invalid YAML in frontmatter: {e}"
     else:
         frontmatter = _parse_simple_frontmatter(frontmatter_text)
         if frontmatter is None:
-            return (
-                False,
-                "Invalid YAML in frontmatter: unsupported syntax without PyYAML installed",
-            )
+            return None, "Invalid YAML in frontmatter: unsupported syntax without PyYAML installed"
+    return frontmatter, None
+
+
+def _validate_frontmatter_text(frontmatter_text: Optional[str], error: Optional[str]):
+    if frontmatter_text is None:
+        return False, error
+    frontmatter, error = load_frontmatter(frontmatter_text)
+    if frontmatter is None:
+        return False, error
+    return check_frontmatter(frontmatter)
 
+
+def _validate_content(data: bytes):
+    return _validate_frontmatter_text(*read_frontmatter(io.BytesIO(data)))
+
+
+def check_frontmatter(frontmatter: dict):
+    """Apply the validation rules to parsed frontmatter; returns (valid, message)."""
     allowed_properties = {"name", "description", "license", "allowed-tools", "metadata"}
 
     unexpected_keys = set(frontmatter.keys()) - allowed_properties
@@ -149,11 +297,132 @@ def validate_skill(skill_path):
     return True, "Skill is valid!"
 
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python quick_validate.py <skill_directory>")
-        sys.exit(1)
+def _find_skill_dirs(root: Path) -> list[Path]:
+    found = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if name not in SKIPPED_DIRS)
+        if "SKILL.md" in filenames:
+            found.append(Path(dirpath))
+    return found
+
+
+def discover_skills(targets: Iterable[str]) -> list[Path]:
+    """
+    Resolve roots, skill directories, SKILL.md paths or glob patterns to the
+    sorted, de-duplicated list of skill directories they contain.
+    """
+    import glob
+
+    skill_dirs: dict[Path, None] = {}
+    for target in targets:
+        matches = glob.glob(os.path.expanduser(target), recursive=True)
+        if not matches and not glob.has_magic(target):
+            matches = [target]
+        for match in matches:
+            path = Path(match)
+            if path.name == "SKILL.md" and path.is_file():
+                skill_dirs[path.parent.resolve()] = None
+            elif path.is_dir() and path.name not in SKIPPED_DIRS:
+                for skill_dir in _find_skill_dirs(path):
+                    skill_dirs[skill_dir.resolve()] = None
+    return sorted(skill_dirs)
+
+
+def validate_all(
+    skill_dirs: list[Path],
+    workers: Optional[int] = None,
+    cache: Optional[dict[str, list]] = None,
+) -> list[tuple[Path, bool, str]]:
+    """
+    Validate every skill directory and return (path, valid, message) in input
+    order. Threads share this process's already-imported YAML loader instead
+    of paying interpreter and PyYAML start-up once per skill.
+    """
+    if workers is None:
+        workers = min(32, (os.cpu_count() or 1) + 4)
+    if workers <= 1 or len(skill_dirs) <= 1:
+        results = [validate_skill(skill_dir, cache) for skill_dir in skill_dirs]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+
+        if cache is None:
+            # Share one loader across the workers; with a cache, hits may not need it at all.
+            get_yaml()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda skill_dir: validate_skill(skill_dir, cache), skill_dirs))
+    return [(skill_dir, valid, message) for skill_dir, (valid, message) in zip(skill_dirs, results)]
+
+
+def _display_path(path: Path) -> str:
+    try:
+        return str(path.relative_to(Path.cwd()))
+    except ValueError:
+        return str(path)
+
+
+def _positive_int(value: str) -> int:
+    import argparse
+
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be >= 1")
+    return number
+
 
-    valid, message = validate_skill(sys.argv[1])
-    print(message)
-    sys.exit(0 if valid else 1)
+def main(argv: Optional[list[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Validate skill directories (SKILL.md frontmatter).")
+    parser.add_argument("skill_directory", nargs="*", help="Skill directory to validate.")
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Validate every SKILL.md under the given roots or globs "
+        f"(default: {DEFAULT_SKILLS_ROOT}) and print one aggregated report.",
+    )
+    parser.add_argument("--workers", type=_positive_int, help="Worker threads for --all.")
+    parser.add_argument(
+        "--cache",
+        nargs="?",
+        const=str(DEFAULT_CACHE_PATH),
+        metavar="PATH",
+        help=f"Reuse verdicts for unchanged SKILL.md files (default file: {DEFAULT_CACHE_PATH}).",
+    )
+    args = parser.parse_args(argv)
+    cache = load_cache(args.cache) if args.cache else None
+    cached_keys = len(cache) if cache is not None else 0
+    try:
+        return _run(args, cache)
+    finally:
+        if cache is not None and len(cache) != cached_keys:
+            try:
+                save_cache(args.cache, cache)
+            except OSError as e:
+                print(f"[WARN] Could not write validation cache: {e}", file=sys.stderr)
+
+
+def _run(args, cache: Optional[dict[str, list]]) -> int:
+
+    if not args.all:
+        if len(args.skill_directory) != 1:
+            print("Usage: python quick_validate.py <skill_directory>")
+            print("       python quick_validate.py --all [root-or-glob ...]")
+            return 1
+        valid, message = validate_skill(args.skill_directory[0], cache)
+        print(message)
+        return 0 if valid else 1
+
+    skill_dirs = discover_skills(args.skill_directory or [str(DEFAULT_SKILLS_ROOT)])
+    if not skill_dirs:
+        print("[ERROR] No SKILL.md found")
+        return 1
+    results = validate_all(skill_dirs, args.workers, cache)
+    failures = [(skill_dir, message) for skill_dir, valid, message in results if not valid]
+    for skill_dir, message in failures:
+        print(f"[FAIL] {_display_path(skill_dir)}: {message}")
+    print(f"{len(results) - len(failures)}/{len(results)} skills valid, {len(failures)} failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Skill catalog - one JSON index of every skill's SKILL.md frontmatter
+
+Each entry holds the parsed frontmatter, the validation verdict, the SHA-256
+and size of SKILL.md, plus the `metadata.openclaw` fields used for discovery
+(`os`, `requires.bins`, `requires.anyBins`). Refreshing re-reads only files
+whose size or mtime changed and re-parses only files whose hash changed.
+
+Usage:
+    python skill_catalog.py [root-or-glob ...] [--output catalog.json]
+
+Example:
+    python skill_catalog.py
+    python skill_catalog.py skills ~/my-skills --output dist/skill-catalog.json
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import quick_validate
+
+CATALOG_VERSION = 1
+DEFAULT_CATALOG_PATH = Path("~/.cache/openclaw/skill-catalog.json")
+
+
+def _string_list(value) -> list[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [item for item in value if isinstance(item, str)]
+    return []
+
+
+def _openclaw_fields(frontmatter: Optional[dict]) -> dict:
+    metadata = frontmatter.get("metadata") if isinstance(frontmatter, dict) else None
+    openclaw = metadata.get("openclaw") if isinstance(metadata, dict) else None
+    if not isinstance(openclaw, dict):
+        openclaw = {}
+    requires = openclaw.get("requires")
+    if not isinstance(requires, dict):
+        requires = {}
+    return {
+        "os": _string_list(openclaw["os"]) if "os" in openclaw else None,
+        "bins": _string_list(requires.get("bins")),
+        "anyBins": _string_list(requires.get("anyBins")),
+    }
+
+
+def _skill_entry(skill_dir: Path, data: bytes, stat) -> dict:
+    frontmatter, error = quick_validate.parse_skill_md(data)
+    if frontmatter is None:
+        valid, message = False, error
+    else:
+        valid, message = quick_validate.check_frontmatter(frontmatter)
+        # YAML may yield dates and other non-JSON scalars; store them as strings.
+        frontmatter = json.loads(json.dumps(frontmatter, default=str))
+    name = frontmatter.get("name") if frontmatter else None
+    entry = {
+        "name": name.strip() if isinstance(name, str) and name.strip() else skill_dir.name,
+        "path": str(skill_dir),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "size": stat.st_size,
+        "mtimeNs": stat.st_mtime_ns,
+        "valid": valid,
+        "message": message,
+        "frontmatter": frontmatter,
+    }
+    entry.update(_openclaw_fields(frontmatter))
+    return entry
+
+
+def _catalog_header() -> dict:
+    return {
+        "version": CATALOG_VERSION,
+        "rulesVersion": quick_validate.RULES_VERSION,
+        "loader": "yaml" if quick_validate.yaml_available() else "simple",
+    }
+
+
+def _is_current(catalog: dict) -> bool:
+    """True when `catalog` was built with the current rules and frontmatter loader."""
+    return all(catalog.get(key) == value for key, value in _catalog_header().items())
+
+
+def build_catalog(targets: Iterable[str], previous: Optional[dict] = None) -> tuple[dict, int]:
+    """
+    Build a catalog for the skills under `targets`, reusing entries from
+    `previous` whose SKILL.md is unchanged. Returns (catalog, reparsed count).
+    Entries are keyed by the resolved skill directory, so the same skill
+    reached through a relative path or a symlink is found again.
+    """
+    reusable: dict[str, dict] = {}
+    if previous and _is_current(previous):
+        reusable = {entry["path"]: entry for entry in previous.get("skills", [])}
+
+    skills = []
+    reparsed = 0
+    for skill_dir in quick_validate.discover_skills(targets):
+        skill_dir = skill_dir.resolve()
+        skill_md = skill_dir / "SKILL.md"
+        try:
+            stat = skill_md.stat()
+        except OSError:
+            continue
+        old = reusable.get(str(skill_dir))
+        if old and old["size"] == stat.st_size and old["mtimeNs"] == stat.st_mtime_ns:
+            skills.append(old)
+            continue
+        try:
+            data = skill_md.read_bytes()
+        except OSError:
+            continue
+        if old and old["sha256"] == hashlib.sha256(data).hexdigest():
+            skills.append(dict(old, size=stat.st_size, mtimeNs=stat.st_mtime_ns))
+            continue
+        skills.append(_skill_entry(skill_dir, data, stat))
+        reparsed += 1
+    skills.sort(key=lambda entry: (entry["name"], entry["path"]))
+    return dict(_catalog_header(), skills=skills), reparsed
+
+
+def read_catalog(path) -> Optional[dict]:
+    try:
+        with open(Path(path).expanduser(), encoding="utf-8") as handle:
+            catalog = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(catalog, dict) or catalog.get("version") != CATALOG_VERSION:
+        return None
+    return catalog
+
+
+def refresh_catalog(path, targets: Iterable[str]) -> tuple["SkillCatalog", int]:
+    """Bring the catalog file at `path` up to date; it is rewritten only when something changed."""
+    path = Path(path).expanduser()
+    previous = read_catalog(path)
+    catalog, reparsed = build_catalog(targets, previous)
+    if catalog != previous:
+        quick_validate.write_json_atomic(path, catalog)
+    return SkillCatalog(catalog["skills"]), reparsed
+
+
+class SkillCatalog:
+    """Read-side view of a catalog file with dictionary lookups by name, OS and binary."""
+
+    def __init__(self, entries: list[dict]):
+        self.entries = entries
+        self.by_name: dict[str, dict] = {}
+        self.by_os: dict[str, list[dict]] = {}
+        self.by_bin: dict[str, list[dict]] = {}
+        self.any_os: list[dict] = []
+        for entry in entries:
+            self.by_name.setdefault(entry["name"], entry)
+            if entry["os"] is None:
+                self.any_os.append(entry)
+            for os_name in entry["os"] or ():
+                self.by_os.setdefault(os_name, []).append(entry)
+            for binary in dict.fromkeys(entry["bins"] + entry["anyBins"]):
+                self.by_bin.setdefault(binary, []).append(entry)
+
+    @classmethod
+    def load(cls, path=DEFAULT_CATALOG_PATH) -> "SkillCatalog":
+        catalog = read_catalog(path)
+        if catalog is None:
+            raise ValueError(f"Not a skill catalog (version {CATALOG_VERSION}): {path}")
+        if not _is_current(catalog):
+            raise ValueError(f"Stale skill catalog (validation rules or loader changed), rebuild it: {path}")
+        return cls(catalog["skills"])
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.entries)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.by_name
+
+    def get(self, name: str) -> Optional[dict]:
+        return self.by_name.get(name)
+
+    def names(self) -> list[str]:
+        return list(self.by_name)
+
+    def for_os(self, os_name: str) -> list[dict]:
+        """Skills usable on `os_name` (sys.platform style): those without an `os` list plus those naming it."""
+        return self.any_os + self.by_os.get(os_name, [])
+
+    def requiring_bin(self, binary: str) -> list[dict]:
+        """Skills that list `binary` in `requires.bins` or `requires.anyBins`."""
+        return list(self.by_bin.get(binary, []))
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or refresh the skill catalog index.")
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        help=f"Skill roots, directories or globs (default: {quick_validate.DEFAULT_SKILLS_ROOT}).",
+    )
+    parser.add_argument(
+        "--output",
+        default=str(DEFAULT_CATALOG_PATH),
+        help=f"Catalog file (default: {DEFAULT_CATALOG_PATH}).",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        catalog, reparsed = refresh_catalog(args.output, args.targets or [str(quick_validate.DEFAULT_SKILLS_ROOT)])
+    except OSError as e:
+        print(f"[ERROR] Could not write catalog: {e}")
+        return 1
+    invalid = sum(1 for entry in catalog if not entry["valid"])
+    print(f"[OK] {len(catalog)} skills ({reparsed} parsed, {invalid} invalid) -> {Path(args.output).expanduser()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Tests for the frontmatter parsing benchmark.
+"""
+
+import tempfile
+from pathlib import Path
+from unittest import TestCase, main, skipIf
+
+import quick_validate
+from bench_frontmatter import PATHS, generate_skill_md
+
+
+class TestBenchFrontmatter(TestCase):
+    @skipIf(not quick_validate.yaml_available(), "PyYAML not installed")
+    def test_paths_agree_on_generated_skill(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            skill_dir = Path(temp_dir) / "synthetic-skill"
+            skill_dir.mkdir()
+            path = skill_dir / "SKILL.md"
+            path.write_text(generate_skill_md(200_000, install_entries=20), encoding="utf-8")
+
+            parsed = {name: func(path) for name, func in PATHS}
+            valid, message = quick_validate.validate_skill(skill_dir)
+
+        self.assertTrue(valid, message)
+        self.assertEqual(parsed["full_safe_loader"], parsed["head_c_loader"])
+        self.assertEqual(len(parsed["head_c_loader"]["metadata"]["openclaw"]["install"]), 20)
+        for frontmatter in parsed.values():
+            self.assertEqual(frontmatter["name"], "synthetic-skill")
+
+
+if __name__ == "__main__":
+    main()
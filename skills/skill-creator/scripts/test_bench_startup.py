@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for the skill-creator import-time budget check.
+"""
+
+import json
+from unittest import TestCase, main
+
+from bench_startup import DEFAULT_BUDGET_PATH, SCRIPTS, bench_script, check_budget, parse_importtime
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       457 |       1191 | _frozen_importlib_external
+import time:       120 |        120 |     re._parser
+import time:       677 |        797 |   re
+import time:      3305 |       4102 | package_skill
+"""
+
+
+class TestBenchStartup(TestCase):
+    def test_parse_importtime_reads_depth_and_times(self):
+        records = parse_importtime(SAMPLE)
+
+        self.assertEqual(
+            [(record["module"], record["depth"], record["cumulativeUs"]) for record in records],
+            [("_frozen_importlib_external", 0, 1191), ("re._parser", 2, 120), ("re", 1, 797), ("package_skill", 0, 4102)],
+        )
+
+    def test_check_budget_reports_slow_and_forbidden_imports(self):
+        budget = {"importMs": {"a": 10, "b": 10}, "forbiddenImports": {"b": ["yaml"]}}
+        results = [
+            {"script": "a", "importMs": 12.5, "modules": ["a"]},
+            {"script": "b", "importMs": 5.0, "modules": ["b", "yaml"]},
+        ]
+
+        self.assertEqual(
+            check_budget(results, budget),
+            ["a: import takes 12.5 ms, budget 10 ms", "b: imports yaml at load time"],
+        )
+
+    def test_scripts_do_not_load_forbidden_modules(self):
+        budget = json.loads(DEFAULT_BUDGET_PATH.read_text(encoding="utf-8"))
+        results = [bench_script(script, runs=1) for script in SCRIPTS]
+
+        self.assertEqual(check_budget(results, {"forbiddenImports": budget["forbiddenImports"]}), [])
+        self.assertEqual(set(budget["importMs"]), set(SCRIPTS))
+
+
+if __name__ == "__main__":
+    main()
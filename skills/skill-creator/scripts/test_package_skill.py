@@ -5,7 +5,6 @@ Regression tests for skill packaging security behavior.
 
 import sys
 import tempfile
-import types
 import zipfile
 from pathlib import Path
 from unittest import TestCase, main
@@ -15,24 +14,18 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 if str(SCRIPT_DIR) not in sys.path:
     sys.path.insert(0, str(SCRIPT_DIR))
 
-
-fake_quick_validate = types.ModuleType("quick_validate")
-fake_quick_validate.validate_skill = lambda _path: (True, "Skill is valid!")
-original_quick_validate = sys.modules.get("quick_validate")
-sys.modules["quick_validate"] = fake_quick_validate
-
 import package_skill as package_skill_module
 from package_skill import package_skill
 
-if original_quick_validate is not None:
-    sys.modules["quick_validate"] = original_quick_validate
-else:
-    sys.modules.pop("quick_validate", None)
-
 
 class TestPackageSkillSecurity(TestCase):
     def setUp(self):
         self.temp_dir = Path(tempfile.mkdtemp(prefix="test_skill_"))
+        validate_patch = patch.object(
+            package_skill_module, "validate_skill", lambda _path: (True, "Skill is valid!")
+        )
+        validate_patch.start()
+        self.addCleanup(validate_patch.stop)
 
     def tearDown(self):
         import shutil
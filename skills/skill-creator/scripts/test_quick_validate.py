@@ -3,9 +3,14 @@
 Regression tests for quick skill validation.
 """
 
+import io
+import subprocess
+import sys
 import tempfile
+from contextlib import redirect_stdout
 from pathlib import Path
 from unittest import TestCase, main
+from unittest.mock import patch
 
 import quick_validate
 
@@ -20,6 +25,12 @@ class TestQuickValidate(TestCase):
         if self.temp_dir.exists():
             shutil.rmtree(self.temp_dir)
 
+    def _write_skill(self, relative, frontmatter):
+        skill_dir = self.temp_dir / relative
+        skill_dir.mkdir(parents=True, exist_ok=True)
+        (skill_dir / "SKILL.md").write_text(f"---\n{frontmatter}\n---\n# Skill\n", encoding="utf-8")
+        return skill_dir.resolve()
+
     def test_accepts_crlf_frontmatter(self):
         skill_dir = self.temp_dir / "crlf-skill"
         skill_dir.mkdir(parents=True, exist_ok=True)
@@ -58,15 +69,135 @@ metadata: |
 """
         (skill_dir / "SKILL.md").write_text(content, encoding="utf-8")
 
-        previous_yaml = quick_validate.yaml
-        quick_validate.yaml = None
-        try:
+        with patch.object(quick_validate, "yaml", None):
             valid, message = quick_validate.validate_skill(skill_dir)
-        finally:
-            quick_validate.yaml = previous_yaml
 
         self.assertTrue(valid, message)
 
+    def test_reads_only_the_frontmatter_head(self):
+        skill_dir = self.temp_dir / "big-body"
+        skill_dir.mkdir(parents=True, exist_ok=True)
+        body = b"# Skill\n" + b"\xff invalid utf-8 body\n" * 100_000
+        (skill_dir / "SKILL.md").write_bytes(b"---\nname: big-body\ndescription: ok\n---\n" + body)
+
+        valid, message = quick_validate.validate_skill(skill_dir)
+
+        self.assertTrue(valid, message)
+        self.assertEqual(quick_validate.validate_skill(skill_dir, {}), (True, "Skill is valid!"))
+
+    def test_rejects_frontmatter_over_the_size_cap(self):
+        skill_dir = self.temp_dir / "huge-frontmatter"
+        skill_dir.mkdir(parents=True, exist_ok=True)
+        padding = "# pad\n" * (quick_validate.MAX_FRONTMATTER_BYTES // 6 + 1)
+        content = f"---\nname: huge-frontmatter\ndescription: ok\n{padding}---\n"
+        (skill_dir / "SKILL.md").write_text(content, encoding="utf-8")
+
+        valid, message = quick_validate.validate_skill(skill_dir)
+
+        self.assertFalse(valid)
+        self.assertEqual(message, f"Frontmatter exceeds {quick_validate.MAX_FRONTMATTER_BYTES} bytes")
+
+    def test_discover_skills_accepts_roots_globs_and_files(self):
+        alpha = self._write_skill("alpha", "name: alpha\ndescription: ok")
+        beta = self._write_skill("nested/beta", "name: beta\ndescription: ok")
+        self._write_skill("node_modules/dep", "name: dep\ndescription: ok")
+
+        self.assertEqual(quick_validate.discover_skills([str(self.temp_dir)]), [alpha, beta])
+        self.assertEqual(
+            quick_validate.discover_skills([str(self.temp_dir / "*"), str(beta / "SKILL.md")]),
+            [alpha, beta],
+        )
+
+    def test_all_reports_every_failure_and_exits_non_zero(self):
+        self._write_skill("good", "name: good\ndescription: ok")
+        self._write_skill("bad-name", "name: Bad_Name\ndescription: ok")
+        self._write_skill("bad-key", "name: bad-key\ndescription: ok\nextra: 1")
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            code = quick_validate.main(["--all", str(self.temp_dir), "--workers", "4"])
+
+        report = out.getvalue()
+        self.assertEqual(code, 1)
+        self.assertIn("bad-name: Name 'Bad_Name' should be hyphen-case", report)
+        self.assertIn("bad-key: Unexpected key(s)", report)
+        self.assertIn("1/3 skills valid, 2 failed", report)
+
+    def test_all_exits_zero_when_every_skill_is_valid(self):
+        self._write_skill("one", "name: one\ndescription: ok")
+        self._write_skill("two", "name: two\ndescription: ok")
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            code = quick_validate.main(["--all", str(self.temp_dir / "*")])
+
+        self.assertEqual(code, 0)
+        self.assertEqual(out.getvalue(), "2/2 skills valid, 0 failed\n")
+
+    def test_cache_returns_stored_verdict_without_parsing(self):
+        skill_dir = self._write_skill("cached", "name: cached\ndescription: ok")
+        cache_path = self.temp_dir / "cache" / "validate.json"
+        cache = {}
+        self.assertEqual(quick_validate.validate_skill(skill_dir, cache), (True, "Skill is valid!"))
+        quick_validate.save_cache(cache_path, cache)
+
+        loaded = quick_validate.load_cache(cache_path)
+        self.assertEqual(loaded, cache)
+        with patch.object(quick_validate, "read_frontmatter", None):
+            self.assertEqual(quick_validate.validate_skill(skill_dir, loaded), (True, "Skill is valid!"))
+
+        (skill_dir / "SKILL.md").write_text("---\nname: Cached\ndescription: ok\n---\n", encoding="utf-8")
+        valid, _ = quick_validate.validate_skill(skill_dir, loaded)
+        self.assertFalse(valid)
+        self.assertEqual(len(loaded), 2)
+
+    def test_cache_key_includes_rules_version(self):
+        skill_dir = self._write_skill("versioned", "name: versioned\ndescription: ok")
+        cache = {}
+        quick_validate.validate_skill(skill_dir, cache)
+        with patch.object(quick_validate, "RULES_VERSION", quick_validate.RULES_VERSION + 1):
+            quick_validate.validate_skill(skill_dir, cache)
+
+        self.assertEqual(len(cache), 2)
+
+    def test_cli_cache_file_is_written_once_and_reused(self):
+        self._write_skill("one", "name: one\ndescription: ok")
+        cache_path = self.temp_dir / "validate.json"
+        argv = ["--all", str(self.temp_dir / "*"), "--cache", str(cache_path)]
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(quick_validate.main(argv), 0)
+        mtime = cache_path.stat().st_mtime_ns
+        self.assertEqual(len(quick_validate.load_cache(cache_path)), 1)
+
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(quick_validate.main(argv), 0)
+        self.assertEqual(cache_path.stat().st_mtime_ns, mtime)
+
+    def test_cache_hits_do_not_import_yaml(self):
+        self._write_skill("one", "name: one\ndescription: ok")
+        self._write_skill("two", "name: two\ndescription: ok")
+        cache_path = self.temp_dir / "validate.json"
+        script = (
+            "import contextlib, io, sys, quick_validate\n"
+            "with contextlib.redirect_stdout(io.StringIO()):\n"
+            f"    code = quick_validate.main(['--all', {str(self.temp_dir / '*')!r}, '--cache', {str(cache_path)!r}])\n"
+            "print(code, 'yaml' in sys.modules)\n"
+        )
+        outputs = [
+            subprocess.run(
+                [sys.executable, "-c", script],
+                cwd=str(Path(quick_validate.__file__).parent),
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.split()
+            for _ in range(2)
+        ]
+
+        if quick_validate.yaml_available():
+            self.assertEqual(outputs[0], ["0", "True"])
+        self.assertEqual(outputs[1], ["0", "False"])
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for the skill catalog index.
+"""
+
+import io
+import json
+import os
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import TestCase, main
+
+import quick_validate
+import skill_catalog
+from skill_catalog import SkillCatalog, refresh_catalog
+
+
+def _frontmatter(name, os_list=None, bins=None, any_bins=None):
+    openclaw = {}
+    if os_list is not None:
+        openclaw["os"] = os_list
+    requires = {}
+    if bins:
+        requires["bins"] = bins
+    if any_bins:
+        requires["anyBins"] = any_bins
+    if requires:
+        openclaw["requires"] = requires
+    return f"name: {name}\ndescription: {name} skill\nmetadata: {json.dumps({'openclaw': openclaw})}"
+
+
+class TestSkillCatalog(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.temp_dir.name) / "skills"
+        self.catalog_path = Path(self.temp_dir.name) / "catalog.json"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _write_skill(self, directory, frontmatter):
+        skill_dir = self.root / directory
+        skill_dir.mkdir(parents=True, exist_ok=True)
+        skill_md = skill_dir / "SKILL.md"
+        skill_md.write_text(f"---\n{frontmatter}\n---\n# Skill\n", encoding="utf-8")
+        return skill_md
+
+    def test_lookups_by_name_os_and_binary(self):
+        self._write_skill("notes", _frontmatter("apple-notes", ["darwin"], ["memo"]))
+        self._write_skill("tmux", _frontmatter("tmux", ["darwin", "linux"], ["tmux"]))
+        self._write_skill("coding", _frontmatter("coding-agent", any_bins=["claude", "codex"]))
+        (self.root / "broken").mkdir()
+        (self.root / "broken" / "SKILL.md").write_text("# no frontmatter\n", encoding="utf-8")
+
+        refresh_catalog(self.catalog_path, [str(self.root)])
+        catalog = SkillCatalog.load(self.catalog_path)
+
+        self.assertEqual(catalog.names(), ["apple-notes", "broken", "coding-agent", "tmux"])
+        notes = catalog.get("apple-notes")
+        self.assertTrue(notes["valid"])
+        self.assertEqual(notes["frontmatter"]["description"], "apple-notes skill")
+        self.assertEqual(notes["size"], (self.root / "notes" / "SKILL.md").stat().st_size)
+        self.assertEqual(catalog.get("broken")["message"], "Invalid frontmatter format")
+        self.assertIsNone(catalog.get("missing"))
+        self.assertEqual(
+            sorted(entry["name"] for entry in catalog.for_os("linux")), ["broken", "coding-agent", "tmux"]
+        )
+        self.assertEqual([entry["name"] for entry in catalog.requiring_bin("codex")], ["coding-agent"])
+        self.assertEqual([entry["name"] for entry in catalog.requiring_bin("memo")], ["apple-notes"])
+
+    def test_refresh_reparses_only_changed_skills(self):
+        first = self._write_skill("one", _frontmatter("one"))
+        self._write_skill("two", _frontmatter("two"))
+        _, reparsed = refresh_catalog(self.catalog_path, [str(self.root)])
+        self.assertEqual(reparsed, 2)
+        mtime = self.catalog_path.stat().st_mtime_ns
+
+        os.utime(first, ns=(first.stat().st_atime_ns, first.stat().st_mtime_ns + 10**9))
+        _, reparsed = refresh_catalog(self.catalog_path, [str(self.root)])
+        self.assertEqual(reparsed, 0)
+
+        self._write_skill("two", _frontmatter("two", ["linux"]))
+        self._write_skill("three", _frontmatter("three"))
+        catalog, reparsed = refresh_catalog(self.catalog_path, [str(self.root)])
+        self.assertEqual(reparsed, 2)
+        self.assertEqual(catalog.get("two")["os"], ["linux"])
+        self.assertNotEqual(self.catalog_path.stat().st_mtime_ns, mtime)
+
+        (self.root / "three" / "SKILL.md").unlink()
+        catalog, reparsed = refresh_catalog(self.catalog_path, [str(self.root)])
+        self.assertEqual((reparsed, catalog.names()), (0, ["one", "two"]))
+
+    def test_rules_version_change_reparses_everything(self):
+        self._write_skill("one", _frontmatter("one"))
+        refresh_catalog(self.catalog_path, [str(self.root)])
+        previous_version = quick_validate.RULES_VERSION
+        quick_validate.RULES_VERSION = previous_version + 1
+        try:
+            _, reparsed = refresh_catalog(self.catalog_path, [str(self.root)])
+        finally:
+            quick_validate.RULES_VERSION = previous_version
+
+        self.assertEqual(reparsed, 1)
+        # The file now holds entries validated under the other rules version.
+        with self.assertRaisesRegex(ValueError, "Stale skill catalog"):
+            SkillCatalog.load(self.catalog_path)
+
+    def test_entries_are_keyed_by_resolved_path(self):
+        self._write_skill("one", _frontmatter("one"))
+        link = Path(self.temp_dir.name) / "linked"
+        link.symlink_to(self.root, target_is_directory=True)
+        cwd = os.getcwd()
+        os.chdir(self.temp_dir.name)
+        try:
+            catalog, reparsed = refresh_catalog(self.catalog_path, ["skills"])
+        finally:
+            os.chdir(cwd)
+        self.assertEqual(reparsed, 1)
+        self.assertEqual(catalog.get("one")["path"], str((self.root / "one").resolve()))
+
+        for target in (self.root, link):
+            _, reparsed = refresh_catalog(self.catalog_path, [str(target)])
+            self.assertEqual(reparsed, 0)
+
+    def test_cli_writes_catalog(self):
+        self._write_skill("one", _frontmatter("one"))
+        out = io.StringIO()
+        with redirect_stdout(out):
+            code = skill_catalog.main([str(self.root), "--output", str(self.catalog_path)])
+
+        self.assertEqual(code, 0)
+        self.assertIn("1 skills (1 parsed, 0 invalid)", out.getvalue())
+        self.assertEqual(SkillCatalog.load(self.catalog_path).names(), ["one"])
+
+
+if __name__ == "__main__":
+    main()